@@ -0,0 +1,95 @@
+"""Compares drawing sprites with one Surface.blit call each, as the cap7
+entities used to, against handing them all to a single Surface.blits
+call, with and without grouping them by image.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_blits
+
+The sprites use the ant, leaf and spider images from cap7, mixed in the
+proportions of the ant colony, at random positions on a 640x480 surface.
+No window is opened; the images are converted for a hidden display.
+
+"""
+
+import os
+from random import Random
+from timeit import Timer
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+SCREEN_SIZE = (640, 480)
+IMAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cap7")
+
+
+def best_time(function, number=10, repeat=5):
+    """Returns the best time per call, in milliseconds."""
+
+    return min(Timer(function).repeat(repeat, number)) / number * 1e3
+
+
+class Sprite(object):
+
+    def __init__(self, image, x, y):
+        self.image = image
+        self.x = x
+        self.y = y
+
+
+def make_sprites(images, count, seed=0):
+    rnd = Random(seed)
+    ant, leaf, spider = images
+    w, h = SCREEN_SIZE
+    sprites = []
+    for _ in range(count):
+        # Mostly ants, some leaves, and the odd spider
+        image = rnd.choice((ant, ant, ant, ant, ant, leaf, leaf, spider))
+        sprites.append(Sprite(image, rnd.uniform(0, w), rnd.uniform(0, h)))
+    return sprites
+
+
+def blit_each(surface, sprites):
+    for sprite in sprites:
+        w, h = sprite.image.get_size()
+        surface.blit(sprite.image, (sprite.x - w / 2, sprite.y - h / 2))
+
+
+def make_blits(sort):
+    blits = []
+    half_sizes = {}
+
+    def blits_once(surface, sprites):
+        for sprite in sprites:
+            image = sprite.image
+            half_size = half_sizes.get(image)
+            if half_size is None:
+                w, h = image.get_size()
+                half_size = half_sizes[image] = (w / 2, h / 2)
+            blits.append((image, (sprite.x - half_size[0], sprite.y - half_size[1])))
+        if sort:
+            blits.sort(key=lambda blit: id(blit[0]))
+        surface.blits(blits, False)
+        del blits[:]
+
+    return blits_once
+
+
+def run():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    images = [pygame.image.load(os.path.join(IMAGE_PATH, filename)).convert_alpha()
+              for filename in ("ant.png", "leaf.png", "spider.png")]
+    surface = pygame.Surface(SCREEN_SIZE).convert()
+
+    for count in (1000, 10000):
+        sprites = make_sprites(images, count)
+        print("%i sprites" % count)
+        for name, draw in (("blit each", blit_each),
+                           ("blits", make_blits(False)),
+                           ("blits by image", make_blits(True))):
+            print("  %-16s %8.3f ms" % (name, best_time(lambda: draw(surface, sprites))))
+
+
+if __name__ == "__main__":
+    run()
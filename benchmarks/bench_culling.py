@@ -0,0 +1,49 @@
+"""Times classifying bounding boxes against a frustum, one at a time and
+batched with numpy.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_culling
+
+"""
+
+from math import radians
+from timeit import Timer
+
+import numpy
+
+from gameobjects.matrix44 import Matrix44
+from gameobjects.bounds import AABB, Frustum
+
+
+def best_time(function, number=5, repeat=5):
+    """Returns the best time per call, in milliseconds."""
+
+    return min(Timer(function).repeat(repeat, number)) / number * 1e3
+
+
+def run():
+    projection = Matrix44.perspective_projection_fov(radians(60.), 4. / 3., .1, 1000.)
+    camera = Matrix44.y_rotation(radians(30.))
+    camera.translate = (50., 1., 50.)
+    frustum = Frustum.from_matrix(projection * camera.get_inverse())
+
+    rnd = numpy.random.RandomState(1)
+    for count in (1000, 10000, 100000):
+        # A square map, with chunks spread over it
+        mins = rnd.uniform(0., 1000., (count, 3))
+        mins[:, 1] = 0.
+        maxs = mins + 8.
+        boxes = [AABB(a, b) for a, b in zip(mins.tolist(), maxs.tolist())]
+
+        scalar_time = best_time(lambda: [frustum.classify_aabb(box) for box in boxes], number=1)
+        batch_time = best_time(lambda: frustum.classify_aabbs(mins, maxs))
+        visible = len(frustum.cull_aabbs(mins, maxs))
+
+        print("%i boxes (%i visible)" % (count, visible))
+        print("  classify_aabb loop %9.3f ms" % scalar_time)
+        print("  classify_aabbs     %9.3f ms (%.0fx)" % (batch_time, scalar_time / batch_time))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,346 @@
+"""Benchmarks for the hot operations in gameobjects.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_gameobjects
+
+The results (microseconds per call, for each case) are compared against a
+baseline recorded on the same machine. If any case is slower than the
+baseline by more than the threshold, the script exits with a status of 1,
+so it can be used as a check before committing changes to gameobjects.
+
+Timings depend on the machine (and on what else it is doing), so no
+baseline is kept in the repository. Record one before making changes:
+
+    python -m benchmarks.bench_gameobjects --save-baseline
+
+then run the benchmarks again after the change to compare. The baseline is
+written to benchmarks/baseline.json, which git ignores.
+
+"""
+
+import json
+import os
+import sys
+from optparse import OptionParser
+from timeit import Timer
+
+from gameobjects.vector2 import Vector2
+from gameobjects.vector3 import Vector3, distance3d
+from gameobjects.matrix44 import Matrix44
+
+try:
+    # The camera update is the demo's own, shared with check_camera_alloc
+    from benchmarks.check_camera_alloc import make_frame, measure_allocations
+except ImportError:
+    # cap9/firstopengl.py needs PyOpenGL
+    make_frame = None
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CASES = []
+
+
+def case(function):
+    """Registers a benchmark case. The function does any setup, and returns
+    the callable to be timed."""
+
+    CASES.append((function.__name__, function))
+    return function
+
+
+@case
+def vector2_construct():
+    return lambda: Vector2(1., 2.)
+
+
+@case
+def vector2_add():
+    v1 = Vector2(1., 2.)
+    v2 = Vector2(3., 4.)
+    return lambda: v1 + v2
+
+
+@case
+def vector2_mul():
+    v = Vector2(1., 2.)
+    return lambda: v * 3.
+
+
+@case
+def vector2_normalise():
+    v = Vector2(3., 4.)
+    return v.normalise
+
+
+@case
+def vector2_distance():
+    v1 = Vector2(1., 2.)
+    v2 = Vector2(3., 4.)
+    return lambda: v1.get_distance_to(v2)
+
+
+@case
+def vector3_construct():
+    return lambda: Vector3(1., 2., 3.)
+
+
+@case
+def vector3_from_floats():
+    from_floats = Vector3.from_floats
+    return lambda: from_floats(1., 2., 3.)
+
+
+@case
+def vector3_add():
+    v1 = Vector3(1., 2., 3.)
+    v2 = Vector3(4., 5., 6.)
+    return lambda: v1 + v2
+
+
+@case
+def vector3_iadd():
+    v1 = Vector3(1., 2., 3.)
+    v2 = Vector3(0., 0., 0.)
+
+    def iadd():
+        v = v1
+        v += v2
+    return iadd
+
+
+@case
+def vector3_mul():
+    v = Vector3(1., 2., 3.)
+    return lambda: v * 3.
+
+
+@case
+def vector3_cross():
+    v1 = Vector3(1., 2., 3.)
+    v2 = Vector3(4., 5., 6.)
+    return lambda: v1.cross(v2)
+
+
+@case
+def vector3_normalise():
+    v = Vector3(1., 2., 3.)
+    return v.normalise
+
+
+@case
+def vector3_distance():
+    v1 = Vector3(1., 2., 3.)
+    v2 = Vector3(4., 5., 6.)
+    return lambda: v1.get_distance_to(v2)
+
+
+@case
+def vector3_distance3d():
+    p1 = (1., 2., 3.)
+    p2 = (4., 5., 6.)
+    return lambda: distance3d(p1, p2)
+
+
+@case
+def matrix44_construct():
+    return Matrix44
+
+
+@case
+def matrix44_xyz_rotation():
+    return lambda: Matrix44.xyz_rotation(.1, .2, .3)
+
+
+@case
+def matrix44_mul():
+    m1 = Matrix44.xyz_rotation(.1, .2, .3)
+    m2 = Matrix44.translation(1., 2., 3.)
+    return lambda: m1 * m2
+
+
+@case
+def matrix44_imul():
+    m = Matrix44.xyz_rotation(.1, .2, .3)
+    rhs = Matrix44.xyz_rotation(.3, .2, .1) * Matrix44.translation(1., 2., 3.)
+
+    def imul():
+        matrix = m
+        matrix *= rhs
+    return imul
+
+
+@case
+def matrix44_imul_identity():
+    # Multiplying by an identity matrix is a copy
+    m = Matrix44.xyz_rotation(.1, .2, .3)
+    identity = Matrix44()
+
+    def imul():
+        matrix = m
+        matrix *= identity
+    return imul
+
+
+@case
+def matrix44_fast_mul():
+    m = Matrix44.xyz_rotation(.1, .2, .3)
+    identity = Matrix44()
+    return lambda: m.fast_mul(identity)
+
+
+@case
+def matrix44_multiply_out():
+    m1 = Matrix44.xyz_rotation(.1, .2, .3)
+    m2 = Matrix44.translation(1., 2., 3.)
+    out = Matrix44()
+    return lambda: m1.multiply(m2, out)
+
+
+@case
+def matrix44_transform():
+    m = Matrix44.xyz_rotation(.1, .2, .3)
+    m.translate = (1., 2., 3.)
+    v = (1., 2., 3.)
+    return lambda: m.transform(v)
+
+
+@case
+def matrix44_transform_vec3():
+    m = Matrix44.xyz_rotation(.1, .2, .3)
+    v = Vector3(1., 2., 3.)
+    return lambda: m.transform_vec3(v)
+
+
+@case
+def matrix44_transform_sequence():
+    m = Matrix44.xyz_rotation(.1, .2, .3)
+    points = [(float(i), 2., 3.) for i in range(100)]
+    return lambda: m.transform_sequence(points)
+
+
+@case
+def matrix44_get_inverse():
+    m = Matrix44.xyz_rotation(.1, .2, .3) * Matrix44.translation(1., 2., 3.)
+    return m.get_inverse
+
+
+@case
+def matrix44_get_inverse_rot_trans():
+    m = Matrix44.xyz_rotation(.1, .2, .3) * Matrix44.translation(1., 2., 3.)
+    return m.get_inverse_rot_trans
+
+
+@case
+def matrix44_to_opengl():
+    m = Matrix44.xyz_rotation(.1, .2, .3)
+    return m.to_opengl
+
+
+if make_frame is not None:
+    @case
+    def camera_update():
+        # One frame of cap9/firstopengl.py's camera: update_camera, then the
+        # inverse and the conversions for OpenGL
+        return make_frame()
+
+
+def time_case(function, repeat=7, min_time=.1):
+    """Returns the best time of a callable, in microseconds per call.
+
+    function -- The callable to time
+    repeat -- Number of times the measurement is repeated
+    min_time -- Minimum time (in seconds) of each measurement
+
+    """
+
+    timer = Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / .2))
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def run_cases(names=None):
+    results = {}
+    for name, function in CASES:
+        if names and name not in names:
+            continue
+        results[name] = time_case(function())
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints a comparison with the baseline, and returns a list of the
+    names of the cases that regressed.
+
+    results -- Dictionary of timings for this run
+    baseline -- Dictionary of stored timings
+    threshold -- Allowed slow down, as a fraction (e.g. .25 is 25% slower)
+
+    """
+
+    regressions = []
+    for name in sorted(results):
+        time = results[name]
+        base_time = baseline.get(name)
+        if base_time is None:
+            print("%-32s %10.3f us" % (name, time))
+            continue
+        change = (time - base_time) / base_time
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print("%-32s %10.3f us %+7.1f%%%s" % (name, time, change * 100., flag))
+    return regressions
+
+
+def run(args=None):
+    parser = OptionParser(usage="%prog [options] [case ...]")
+    parser.add_option("-o", "--output", help="write results as JSON to this file")
+    parser.add_option("-b", "--baseline", default=BASELINE_PATH,
+                      help="baseline to compare against [%default]")
+    parser.add_option("-t", "--threshold", type="float", default=.25,
+                      help="allowed slow down before failing [%default]")
+    parser.add_option("--save-baseline", action="store_true",
+                      help="store the results as the new baseline")
+    options, names = parser.parse_args(args)
+
+    if make_frame is None:
+        print("PyOpenGL is not installed, skipping the camera update")
+        allocated = None
+    else:
+        allocated = measure_allocations(make_frame(), 1000)
+    results = run_cases(names)
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump({"results": results, "allocated_bytes": allocated}, f,
+                      indent=2, sort_keys=True)
+
+    baseline = {}
+    if options.save_baseline:
+        with open(options.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Saved baseline to %s" % options.baseline)
+    elif os.path.exists(options.baseline):
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+    else:
+        print("No baseline to compare with, record one with --save-baseline")
+
+    regressions = compare(results, baseline, options.threshold)
+
+    failed = False
+    if allocated:
+        print("camera update allocated %i bytes" % allocated)
+        failed = True
+    if regressions:
+        print("%i case(s) regressed by more than %i%%" % (
+            len(regressions), options.threshold * 100.))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
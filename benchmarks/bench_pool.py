@@ -0,0 +1,151 @@
+"""Measures the allocations and garbage collector work saved by reusing
+objects from a Pool.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_pool
+
+Two workloads are run, each with and without a pool:
+
+  stars    -- The parallax stars in cap8, one star created each frame and
+              the ones off screen dropped
+  entities -- Entities with a location and destination Vector2, a tenth
+              of them replaced each frame, like the leaves in cap7
+
+For each, the time per frame, the number of objects created, the number
+of garbage collections run and the memory allocated by the last frame
+are printed.
+
+"""
+
+import gc
+import tracemalloc
+from random import Random
+from timeit import default_timer
+
+from gameobjects.vector2 import Vector2
+from gameobjects.pool import Pool
+
+FRAMES = 2000
+TIME_PASSED = 1. / 60.
+
+
+class Star(object):
+
+    def __init__(self, x, y, speed):
+        self.x = x
+        self.y = y
+        self.speed = speed
+
+
+class Entity(object):
+
+    def __init__(self, x, y):
+        self.location = Vector2(x, y)
+        self.destination = Vector2(x, y)
+        self.speed = 0.
+
+    def reset(self, x, y):
+        self.location.set(x, y)
+        self.destination.set(x, y)
+        self.speed = 0.
+
+
+def stars_frame(rnd, stars, pool, created):
+    y = float(rnd.randint(0, 479))
+    speed = float(rnd.randint(10, 300))
+    if pool is None:
+        stars.append(Star(640., y, speed))
+        created[0] += 1
+    else:
+        stars.append(pool.acquire(640., y, speed))
+    for star in stars:
+        star.x -= TIME_PASSED * star.speed
+    if pool is None:
+        stars[:] = [star for star in stars if star.x > 0]
+    else:
+        visible = 0
+        for star in stars:
+            if star.x > 0:
+                stars[visible] = star
+                visible += 1
+            else:
+                pool.release(star)
+        del stars[visible:]
+
+
+def entities_frame(rnd, entities, pool, created):
+    for _ in range(len(entities) // 10):
+        index = rnd.randrange(len(entities))
+        x = rnd.uniform(0., 640.)
+        y = rnd.uniform(0., 480.)
+        if pool is None:
+            entities[index] = Entity(x, y)
+            created[0] += 1
+        else:
+            pool.release(entities[index])
+            entities[index] = pool.acquire(x, y)
+
+
+def measure(frame, objects, pool):
+    """Runs a workload, and returns (ms per frame, objects created,
+    collections, bytes allocated by the last frame).
+
+    """
+
+    rnd = Random(1)
+    created = [0]
+    collections = [0]
+
+    def count_collections(phase, info):
+        if phase == "start":
+            collections[0] += 1
+
+    # Warm up, so the pool has objects to reuse
+    for _ in range(FRAMES // 10):
+        frame(rnd, objects, pool, created)
+    created[0] = 0
+    if pool is not None:
+        pool.created = 0
+
+    gc.collect()
+    gc.callbacks.append(count_collections)
+    try:
+        start = default_timer()
+        for _ in range(FRAMES):
+            frame(rnd, objects, pool, created)
+        time_taken = default_timer() - start
+    finally:
+        gc.callbacks.remove(count_collections)
+
+    tracemalloc.start()
+    try:
+        frame(rnd, objects, pool, created)
+        allocated = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    if pool is not None:
+        created[0] = pool.created
+    return time_taken / FRAMES * 1e3, created[0], collections[0], allocated
+
+
+def run():
+    workloads = (
+        ("stars", stars_frame,
+         lambda: [Star(float(x), 0., 100.) for x in range(0, 640, 3)],
+         lambda: Pool(Star, Star.__init__)),
+        ("entities", entities_frame,
+         lambda: [Entity(0., 0.) for _ in range(5000)],
+         lambda: Pool(Entity, Entity.reset)),
+    )
+    for name, frame, make_objects, make_pool in workloads:
+        print(name)
+        for label, pool in (("new objects", None), ("Pool", make_pool())):
+            frame_time, created, collections, allocated = measure(frame, make_objects(), pool)
+            print("  %-12s %8.4f ms/frame %8i created %6i collections %8i bytes/frame"
+                  % (label, frame_time, created, collections, allocated))
+
+
+if __name__ == "__main__":
+    run()
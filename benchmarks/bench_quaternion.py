@@ -0,0 +1,98 @@
+"""Compares rotating with Quaternions against rotating with Matrix44s.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_quaternion
+
+"""
+
+from math import radians
+from timeit import Timer
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from gameobjects.matrix44 import Matrix44
+from gameobjects.quaternion import Quaternion, slerp_array
+
+ROTATION = (radians(1.), radians(2.), radians(3.))
+NUMBER = 20000
+
+
+def make_matrix_update():
+    # What cap9/firstopengl.py's update_camera does with the rotation: make
+    # this frame's rotation in a work matrix and multiply it in, in place
+    camera = Matrix44()
+    rotation_matrix = Matrix44()
+    angle_x, angle_y, angle_z = ROTATION
+
+    def matrix_update():
+        rotation_matrix.make_xyz_rotation(angle_x, angle_y, angle_z)
+        camera.multiply(rotation_matrix, out=camera)
+
+    return matrix_update
+
+
+def make_quaternion_update(convert=True):
+    # The same with quaternions, converted to a Matrix44 once a frame for
+    # uploading. A unit quaternion drifts slowly, so it only needs to be
+    # normalised now and then, not every frame
+    orientation = Quaternion()
+    rotation = Quaternion()
+    matrix = Matrix44()
+    angle_x, angle_y, angle_z = ROTATION
+
+    def quaternion_update():
+        rotation.make_xyz_rotation(angle_x, angle_y, angle_z)
+        orientation.__imul__(rotation)
+        orientation.to_matrix44(out=matrix)
+
+    def quaternion_combine():
+        rotation.make_xyz_rotation(angle_x, angle_y, angle_z)
+        orientation.__imul__(rotation)
+
+    return quaternion_update if convert else quaternion_combine
+
+
+def best_time(function, number=NUMBER, repeat=5):
+    """Returns the best time per call, in microseconds."""
+
+    return min(Timer(function).repeat(repeat, number)) / number * 1e6
+
+
+def run():
+    matrix_time = best_time(make_matrix_update())
+    quaternion_time = best_time(make_quaternion_update())
+    combine_time = best_time(make_quaternion_update(convert=False))
+
+    print("Per frame rotation update, in place")
+    print("  Matrix44                      %8.3f us" % matrix_time)
+    print("  Quaternion, to Matrix44       %8.3f us (%.2fx)" % (quaternion_time, matrix_time / quaternion_time))
+    print("  Quaternion, no to_matrix44   %8.3f us (%.2fx)" % (combine_time, matrix_time / combine_time))
+
+    q1 = Quaternion.xyz_rotation(.1, .2, .3)
+    q2 = Quaternion.xyz_rotation(1., 2., 3.)
+    count = 10000
+    pairs = [(q1, q2)] * count
+
+    def slerp_loop():
+        for a, b in pairs:
+            a.slerp(b, .5)
+
+    array1 = [q1.as_tuple()] * count
+    array2 = [q2.as_tuple()] * count
+    loop_time = best_time(slerp_loop, number=5) / 1000.
+    print("Slerp of %i rotations" % count)
+    print("  Quaternion.slerp loop %8.3f ms" % loop_time)
+    if numpy is not None:
+        array1 = numpy.array(array1)
+        array2 = numpy.array(array2)
+        out = numpy.empty_like(array1)
+        array_time = best_time(lambda: slerp_array(array1, array2, .5, out=out), number=5) / 1000.
+        print("  slerp_array           %8.3f ms (%.2fx)" % (array_time, loop_time / array_time))
+
+
+if __name__ == "__main__":
+    run()
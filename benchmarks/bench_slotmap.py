@@ -0,0 +1,128 @@
+"""Compares storing entities in a dictionary under ever increasing ids, as
+the cap7 World used to, with storing them in a SlotMap.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_slotmap
+
+Each tick replaces a tenth of the entities (the churn of leaves being
+collected and new ones appearing), looks up some by id, then iterates over
+them twice, as World.process and World.render do.
+
+"""
+
+from random import Random
+from timeit import Timer
+
+from gameobjects.slotmap import SlotMap
+
+CHURN = .1
+LOOKUPS = .2
+
+
+class Entity(object):
+
+    def __init__(self):
+        self.id = None
+
+
+def best_time(function, number=20, repeat=5):
+    """Returns the best time per call, in milliseconds."""
+
+    return min(Timer(function).repeat(repeat, number)) / number * 1e3
+
+
+class DictStore(object):
+
+    def __init__(self):
+        self.entities = {}
+        self.entity_id = 0
+
+    def add(self, entity):
+        self.entities[self.entity_id] = entity
+        entity.id = self.entity_id
+        self.entity_id += 1
+
+    def remove(self, entity):
+        del self.entities[entity.id]
+
+    def get(self, entity_id):
+        if entity_id in self.entities:
+            return self.entities[entity_id]
+        else:
+            return None
+
+    def process(self):
+        for entity in list(self.entities.values()):
+            pass
+
+    def render(self):
+        for entity in self.entities.values():
+            pass
+
+
+class SlotMapStore(object):
+
+    def __init__(self):
+        self.entities = SlotMap()
+
+    def add(self, entity):
+        entity.id = self.entities.add(entity)
+
+    def remove(self, entity):
+        self.entities.remove(entity.id)
+
+    def get(self, entity_id):
+        return self.entities.get(entity_id)
+
+    def process(self):
+        for entity in self.entities.values():
+            pass
+
+    def render(self):
+        for entity in self.entities:
+            pass
+
+
+def make_tick(store, count, seed):
+    rnd = Random(seed)
+    live = []
+    for _ in range(count):
+        entity = Entity()
+        store.add(entity)
+        live.append(entity)
+    churn = int(count * CHURN)
+    lookups = int(count * LOOKUPS)
+
+    def tick():
+        for _ in range(churn):
+            index = rnd.randrange(len(live))
+            store.remove(live[index])
+            live[index] = entity = Entity()
+            store.add(entity)
+        for _ in range(lookups):
+            store.get(live[rnd.randrange(len(live))].id)
+        store.process()
+        store.render()
+
+    def iterate():
+        store.process()
+        store.render()
+
+    return tick, iterate
+
+
+def run():
+    for count in (1000, 10000, 100000):
+        print("%i entities" % count)
+        for name, store_class in (("dict", DictStore), ("SlotMap", SlotMapStore)):
+            tick, iterate = make_tick(store_class(), count, count)
+            # Churn for a while, so the dictionary has had time to fragment
+            for _ in range(50):
+                tick()
+            print("  %-8s tick %8.3f ms, process + render %8.3f ms"
+                  % (name, best_time(tick), best_time(iterate)))
+
+
+if __name__ == "__main__":
+    run()
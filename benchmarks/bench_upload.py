@@ -0,0 +1,91 @@
+"""Compares the cost of handing matrices and vertices to OpenGL as lists
+against handing them over as buffers.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_upload
+
+This measures the conversion PyOpenGL does before every call (e.g. in
+glLoadMatrixd), so no window or OpenGL context is needed. If PyOpenGL is not
+installed, the equivalent ctypes conversions are timed instead.
+
+"""
+
+import ctypes
+from timeit import Timer
+
+try:
+    from OpenGL.arrays import GLdoubleArray, GLfloatArray
+except ImportError:
+    GLdoubleArray = GLfloatArray = None
+
+from gameobjects.matrix44 import Matrix44
+
+try:
+    from gameobjects.vector3array import Vector3Array
+except ImportError:
+    # Vector3Array requires numpy
+    Vector3Array = None
+
+NUMBER = 20000
+
+
+def best_time(function, number=NUMBER, repeat=5):
+    """Returns the best time per call, in microseconds."""
+
+    return min(Timer(function).repeat(repeat, number)) / number * 1e6
+
+
+def converters():
+    """Returns functions that convert values to doubles and floats, the same
+    way they would be before an OpenGL call."""
+
+    if GLdoubleArray is not None:
+        return "PyOpenGL", GLdoubleArray.from_param, GLfloatArray.from_param
+
+    def from_param(ctype):
+        def convert(values):
+            if isinstance(values, memoryview):
+                return ctypes.addressof(ctype.from_buffer(values))
+            return ctypes.addressof((ctype * len(values))(*values))
+        return convert
+
+    return "ctypes", from_param(ctypes.c_double), from_param(ctypes.c_float)
+
+
+def run():
+    name, to_doubles, to_floats = converters()
+    print("Conversion with %s" % name)
+
+    matrix = Matrix44.xyz_rotation(.1, .2, .3)
+    gl_list = [0.] * 16
+    gl_doubles = matrix.to_buffer()
+    gl_floats = matrix.to_buffer('f')
+
+    list_time = best_time(lambda: to_doubles(matrix.to_opengl(out=gl_list)))
+    doubles_time = best_time(lambda: to_doubles(matrix.to_buffer(out=gl_doubles)))
+    floats_time = best_time(lambda: to_floats(matrix.to_buffer('f', out=gl_floats)))
+
+    print("Matrix upload (glLoadMatrix)")
+    print("  to_opengl list        %8.3f us" % list_time)
+    print("  to_buffer doubles     %8.3f us (%.2fx)" % (doubles_time, list_time / doubles_time))
+    print("  to_buffer floats      %8.3f us (%.2fx)" % (floats_time, list_time / floats_time))
+
+    if Vector3Array is None:
+        return
+
+    count = 10000
+    vertices = Vector3Array([(float(i), 2., 3.) for i in range(count)])
+    vertex_list = vertices.array.ravel().tolist()
+    vertex_buffer = vertices.to_buffer()
+
+    list_time = best_time(lambda: to_doubles(vertex_list), number=20) / 1000.
+    buffer_time = best_time(lambda: to_doubles(vertex_buffer), number=20) / 1000.
+
+    print("Upload of %i vertices (glVertexPointer / glBufferData)" % count)
+    print("  list of values        %8.3f ms" % list_time)
+    print("  Vector3Array buffer   %8.3f ms (%.0fx)" % (buffer_time, list_time / buffer_time))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,110 @@
+"""Compares the memory used by, and the time to move, many Vector2s against
+the same number of vectors in a Vector2Pool.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_vector2pool
+
+The update is the movement done by every entity in cap7 each frame, moving
+the location towards the destination at a constant speed.
+
+"""
+
+import tracemalloc
+from random import Random
+from timeit import Timer
+
+from gameobjects.vector2 import Vector2
+from gameobjects.vector2pool import Vector2Pool
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SPEED = 80.
+TIME_PASSED = 1. / 30.
+
+
+def measure_memory(create):
+    """Returns the number of bytes allocated by a function, and its result."""
+
+    tracemalloc.start()
+    try:
+        result = create()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return size, result
+
+
+def best_time(function, number=3, repeat=5):
+    """Returns the best time per call, in milliseconds."""
+
+    return min(Timer(function).repeat(repeat, number)) / number * 1e3
+
+
+def move_vectors(locations, destinations):
+    for location, destination in zip(locations, destinations):
+        if location != destination:
+            vec_to_destination = destination - location
+            distance_to_destination = vec_to_destination.get_length()
+            heading = vec_to_destination.get_normalized()
+            travel_distance = min(distance_to_destination, TIME_PASSED * SPEED)
+            location += travel_distance * heading
+
+
+def move_pool(locations, destinations):
+    # The same calculation for every vector at once
+    x, y = locations.arrays()
+    dest_x, dest_y = destinations.arrays()
+    dx = dest_x - x
+    dy = dest_y - y
+    distance = numpy.hypot(dx, dy)
+    moving = distance > 0.
+    step = numpy.minimum(distance, TIME_PASSED * SPEED)
+    scale = numpy.divide(step, distance, out=numpy.zeros_like(distance), where=moving)
+    x += dx * scale
+    y += dy * scale
+
+
+def run():
+    for count in (10000, 100000):
+        rnd = Random(count)
+        points = [(rnd.randint(0, 640), rnd.randint(0, 480)) for _ in range(count * 2)]
+
+        vector_size, vectors = measure_memory(
+            lambda: [Vector2(x, y) for x, y in points])
+
+        def create_pool():
+            pool = Vector2Pool(count * 2)
+            return pool, [pool.new(x, y) for x, y in points]
+
+        pool_size, (pool, views) = measure_memory(create_pool)
+
+        print("%i entities (a location and a destination each)" % count)
+        print("  Vector2          %7.1f bytes per vector" % (vector_size / float(count * 2)))
+        print("  Vector2Pool view %7.1f bytes per vector" % (pool_size / float(count * 2)))
+
+        locations = vectors[:count]
+        destinations = vectors[count:]
+        vector_time = best_time(lambda: move_vectors(locations, destinations))
+        print("  Vector2 update          %8.2f ms" % vector_time)
+
+        view_time = best_time(lambda: move_vectors(views[:count], views[count:]))
+        print("  Vector2View update      %8.2f ms" % view_time)
+
+        if numpy is not None:
+            # Separate pools, so each can be moved with one array operation
+            location_pool = Vector2Pool(count)
+            destination_pool = Vector2Pool(count)
+            for x, y in points[:count]:
+                location_pool.new(x, y)
+            for x, y in points[count:]:
+                destination_pool.new(x, y)
+            pool_time = best_time(lambda: move_pool(location_pool, destination_pool))
+            print("  Vector2Pool batch update %7.2f ms (%.0fx)" % (pool_time, vector_time / pool_time))
+
+
+if __name__ == "__main__":
+    run()
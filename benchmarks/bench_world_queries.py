@@ -0,0 +1,107 @@
+"""Compares the World entity queries in cap7 made with a SpatialHash against
+the linear scan that get_close_entity used to do.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.bench_world_queries
+
+Entities are spread over the 640x480 ant world, and every query looks for
+entities within 100 pixels of a random point, as an exploring ant does.
+
+"""
+
+from random import Random
+from timeit import Timer
+
+from gameobjects.vector2 import Vector2
+from gameobjects.spatialhash import SpatialHash
+
+SCREEN_SIZE = (640, 480)
+GRID_CELL_SIZE = 64
+QUERY_RANGE = 100
+QUERY_COUNT = 1000
+
+
+class Entity(object):
+
+    def __init__(self, name, location):
+        self.name = name
+        self.location = location
+
+
+def best_time(function, number=1, repeat=5):
+    """Returns the best time per call, in milliseconds."""
+
+    return min(Timer(function).repeat(repeat, number)) / number * 1e3
+
+
+def linear_first(entities, name, location, e_range):
+    # The original World.get_close_entity
+    location = Vector2(*location)
+    for entity in entities.values():
+        if entity.name == name:
+            distance = location.get_distance_to(entity.location)
+            if distance < e_range:
+                return entity
+    return None
+
+
+def linear_nearest(entities, name, location, e_range):
+    location = Vector2(*location)
+    closest = None
+    closest_distance = e_range
+    for entity in entities.values():
+        if entity.name == name:
+            distance = location.get_distance_to(entity.location)
+            if distance < closest_distance:
+                closest = entity
+                closest_distance = distance
+    return closest
+
+
+def run():
+    w, h = SCREEN_SIZE
+    for count in (100, 1000, 10000):
+        rnd = Random(count)
+        entities = {}
+        grid = SpatialHash(GRID_CELL_SIZE)
+        for entity_id in range(count):
+            # Half leaves, so the name filter matters for the linear scans
+            name = "leaf" if entity_id % 2 else "ant"
+            entity = Entity(name, Vector2(rnd.uniform(0, w), rnd.uniform(0, h)))
+            entities[entity_id] = entity
+            if name == "leaf":
+                grid.insert(entity, entity.location)
+        queries = [(rnd.uniform(0, w), rnd.uniform(0, h)) for _ in range(QUERY_COUNT)]
+
+        def per_query(function):
+            return best_time(lambda: [function(q) for q in queries]) / QUERY_COUNT * 1e3
+
+        print("%i entities (%i leaves), times per query" % (count, len(grid)))
+        first_time = per_query(lambda q: linear_first(entities, "leaf", q, QUERY_RANGE))
+        print("  linear scan, first in range %9.2f us" % first_time)
+        linear_time = per_query(lambda q: linear_nearest(entities, "leaf", q, QUERY_RANGE))
+        print("  linear scan, nearest        %9.2f us" % linear_time)
+        nearest_time = per_query(lambda q: grid.nearest(q, QUERY_RANGE))
+        print("  grid nearest                %9.2f us (%.0fx)" % (nearest_time, linear_time / nearest_time))
+        unbounded_time = per_query(lambda q: grid.nearest(q))
+        print("  grid nearest, no range      %9.2f us" % unbounded_time)
+        k_time = per_query(lambda q: grid.k_nearest(q, 5, QUERY_RANGE))
+        print("  grid k_nearest (k=5)        %9.2f us" % k_time)
+        within_time = per_query(lambda q: grid.query_radius(q, QUERY_RANGE))
+        print("  grid all_within             %9.2f us" % within_time)
+
+        # The cost of keeping the grid up to date, if every leaf moved
+        leaves = [entity for entity in entities.values() if entity.name == "leaf"]
+        for leaf in leaves:
+            leaf.location += (rnd.uniform(-2, 2), rnd.uniform(-2, 2))
+
+        def update():
+            for leaf in leaves:
+                grid.update(leaf, leaf.location)
+
+        print("  grid update, every leaf     %9.3f ms" % best_time(update))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,103 @@
+"""Checks that the camera update in cap9/firstopengl.py allocates no memory,
+once it is running.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.check_camera_alloc
+
+Each frame does what the demo's main loop does with the camera: update it
+with update_camera, invert it with get_inverse(out=), and convert it with
+to_opengl(out=) and to_buffer(out=). After some frames to warm up,
+tracemalloc records the peak memory allocated while many more frames run.
+Any allocation made during a frame raises the peak, even if it is freed
+before the frame ends, so the peak must not rise above the memory in use
+when the frames started. (The floats and small tuples that the matrix code
+makes come from CPython's free lists, which tracemalloc rightly doesn't
+count as allocations.)
+
+No window or OpenGL context is needed, but PyOpenGL must be installed for
+the demo to be imported.
+
+"""
+
+import os
+import sys
+import tracemalloc
+from itertools import repeat
+from math import radians
+from optparse import OptionParser
+
+from gameobjects.matrix44 import Matrix44
+from gameobjects.vector3 import Vector3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cap9"))
+from firstopengl import update_camera
+
+WARM_UP_FRAMES = 100
+
+
+def make_frame():
+    """Returns a function that runs one frame of the camera update, with the
+    same preallocated objects the demo uses."""
+
+    camera_matrix = Matrix44()
+    camera_matrix.translate = (10.0, .6, 10.0)
+    time_passed_seconds = 1. / 60.
+    rotation = Vector3(1.0, -1.0, .5) * (radians(90.0) * time_passed_seconds)
+    movement = 5.0 * time_passed_seconds
+    rotation_matrix = Matrix44()
+    inverse_matrix = Matrix44()
+    gl_list = inverse_matrix.to_opengl()
+    gl_matrix = inverse_matrix.to_buffer()
+
+    def frame():
+        update_camera(camera_matrix, rotation_matrix, rotation, movement)
+        camera_matrix.get_inverse(out=inverse_matrix)
+        inverse_matrix.to_opengl(out=gl_list)
+        inverse_matrix.to_buffer(out=gl_matrix)
+
+    return frame
+
+
+def measure_allocations(frame, frames):
+    """Returns the most memory (in bytes) allocated at any point while
+    running a number of frames, after warming up. A frame that allocates
+    nothing gives 0.
+
+    frame -- Function that runs one frame
+    frames -- Number of frames to run
+
+    """
+
+    # Warm up before tracing, so the free lists hold as many floats as a
+    # frame needs, as they would in the running demo
+    for _ in repeat(None, WARM_UP_FRAMES):
+        frame()
+    tracemalloc.start()
+    try:
+        # The loop counter must not allocate either, so no range
+        count = repeat(None, frames)
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in count:
+            frame()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak - start
+
+
+def run():
+    parser = OptionParser()
+    parser.add_option("-n", "--frames", type="int", default=10000,
+                      help="frames to run after warming up")
+    options, args = parser.parse_args()
+
+    allocated = measure_allocations(make_frame(), options.frames)
+    print("%i frames, %i bytes allocated" % (options.frames, allocated))
+    if allocated:
+        sys.exit("The camera update allocates memory")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,163 @@
+"""Checks that input recorded by gameobjects.inputreplay plays back the
+same, after being saved as JSON and loaded again.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.check_inputreplay
+
+A small loop reads events, the keys held down (through a ScancodeWrapper),
+the mouse, pygame.time.get_ticks and the time a Clock ticks, and runs a
+ThinkScheduler with a time budget (counted with add_counted). It is run
+once while recording, with input made up on each frame, and once while
+playing the recording back, with thinkers that are slower than before.
+Everything the loop sees must be the same both times. No window is opened.
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from pygame.locals import *
+
+from gameobjects.inputreplay import InputRecorder, InputPlayer
+from gameobjects.scheduler import ThinkScheduler
+
+FRAMES = 20
+THINKERS = 50
+
+
+class Thinker(object):
+
+    def __init__(self, think_time):
+        self.think_time = think_time
+        self.thinks = 0
+
+    def think(self):
+        end = time.perf_counter() + self.think_time
+        while time.perf_counter() < end:
+            pass
+        self.thinks += 1
+
+
+def get_key_index(key, key_count):
+    # get_pressed is indexed by scancode, which ScancodeWrapper looks up
+    # from a key constant, so find the index that it looks up
+    for index in range(key_count):
+        pressed = [False] * key_count
+        pressed[index] = True
+        if pygame.key.ScancodeWrapper(pressed)[key]:
+            return index
+    raise ValueError("No scancode for key %i" % key)
+
+
+def make_input():
+    """Replaces pygame.event.get, pygame.key.get_pressed and
+    pygame.mouse.get_rel with functions returning made up input, and
+    returns a function that puts them back."""
+
+    frame = [0]
+    originals = (pygame.event.get, pygame.key.get_pressed, pygame.mouse.get_rel)
+    key_count = len(originals[1]())
+    left = get_key_index(K_LEFT, key_count)
+    right = get_key_index(K_RIGHT, key_count)
+
+    def get_events():
+        frame[0] += 1
+        n = frame[0]
+        return [pygame.event.Event(KEYDOWN, key=K_a + n % 26, mod=0, unicode=chr(97 + n % 26)),
+                pygame.event.Event(MOUSEMOTION, pos=(n, n * 2), rel=(1, -1), buttons=(0, 1, 0)),
+                pygame.event.Event(USEREVENT, code=n, name="frame %i" % n, value=n / 3.)]
+
+    def get_pressed():
+        # Hold the left and right arrows down in turn
+        pressed = [False] * key_count
+        pressed[left if frame[0] % 2 else right] = True
+        return pygame.key.ScancodeWrapper(pressed)
+
+    def get_rel():
+        return (frame[0], -frame[0])
+
+    pygame.event.get = get_events
+    pygame.key.get_pressed = get_pressed
+    pygame.mouse.get_rel = get_rel
+
+    def restore():
+        pygame.event.get, pygame.key.get_pressed, pygame.mouse.get_rel = originals
+
+    return restore
+
+
+def run_loop(think_time):
+    """Runs the loop, and returns a list of what it saw on each frame."""
+
+    clock = pygame.time.Clock()
+    scheduler = ThinkScheduler(budget=.0005)
+    thinkers = [Thinker(think_time) for _ in range(THINKERS)]
+    for thinker in thinkers:
+        scheduler.add(thinker)
+    seen = []
+    for _ in range(FRAMES):
+        events = [(event.type, sorted(event.dict.items())) for event in pygame.event.get()]
+        pressed = pygame.key.get_pressed()
+        seen.append((events,
+                     type(pressed).__name__,
+                     bool(pressed[K_LEFT]), bool(pressed[K_RIGHT]), bool(pressed[K_UP]),
+                     pygame.mouse.get_rel(),
+                     pygame.time.get_ticks(),
+                     clock.tick(60),
+                     scheduler.run(),
+                     [thinker.thinks for thinker in thinkers]))
+    return seen
+
+
+def run():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    restore = make_input()
+    recorder = InputRecorder()
+    recorder.add_counted(ThinkScheduler, "run")
+    recorder.install()
+    try:
+        recorded = run_loop(.00005)
+    finally:
+        recorder.uninstall()
+        restore()
+
+    handle, filename = tempfile.mkstemp(suffix=".json")
+    os.close(handle)
+    try:
+        recorder.save(filename)
+        player = InputPlayer.load(filename)
+    finally:
+        os.remove(filename)
+    player.add_counted(ThinkScheduler, "run")
+
+    player.install()
+    try:
+        # Slower thinkers would fit fewer thinks in the budget
+        played = run_loop(.0002)
+    finally:
+        player.uninstall()
+
+    budget_hit = any(frame[8] < THINKERS for frame in recorded)
+    print("%i frames recorded and played back, budget %s" % (
+        len(recorded), "hit" if budget_hit else "not hit"))
+    failed = False
+    for frame_number, (expected, actual) in enumerate(zip(recorded, played)):
+        if expected != actual:
+            print("Frame %i differs:\n  recorded %r\n  played   %r" % (frame_number, expected, actual))
+            failed = True
+    if len(played) != len(recorded):
+        print("Played %i frames, recorded %i" % (len(played), len(recorded)))
+        failed = True
+    if failed:
+        sys.exit("Playback differs from the recording")
+
+
+if __name__ == "__main__":
+    run()
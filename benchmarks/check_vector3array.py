@@ -0,0 +1,83 @@
+"""Checks that the Vector3 views returned by Vector3Array behave like
+Vector3s, where the numpy row they hold could make them differ.
+
+Run from the top of the repository with:
+
+    python -m benchmarks.check_vector3array
+
+Null rows are normalised and given a length through their views, which
+must leave them null (numpy would give NaN for 0 / 0, with a warning, where
+a Vector3 raises ZeroDivisionError). Vector3s are then added to, subtracted
+from and multiplied by arrays, on both sides of the operator.
+
+"""
+
+import sys
+import warnings
+
+import numpy
+
+from gameobjects.vector3 import Vector3
+from gameobjects.vector3array import Vector3Array
+
+
+def check_null_rows():
+    """Returns a list of the problems found with null row views."""
+
+    problems = []
+    operations = (("normalise", lambda v: v.normalise()),
+                  ("set_length", lambda v: v.set_length(2.)),
+                  ("length =", lambda v: setattr(v, "length", 2.)))
+    for name, operation in operations:
+        vectors = Vector3Array([(0., 0., 0.), (3., 0., 4.)])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            try:
+                operation(vectors[0])
+                operation(vectors[1])
+            except Exception as error:
+                problems.append("%s raised %r" % (name, error))
+                continue
+        values = vectors.array
+        if not (values[0] == 0.).all():
+            problems.append("%s changed a null row to %r" % (name, tuple(values[0])))
+        if abs(numpy.sqrt((values[1] ** 2).sum()) - (1. if name == "normalise" else 2.)) > 1e-12:
+            problems.append("%s gave the wrong length for %r" % (name, tuple(values[1])))
+    return problems
+
+
+def check_operators():
+    """Returns a list of the problems found with Vector3 and Vector3Array
+    operators."""
+
+    problems = []
+    v = Vector3(1., 2., 3.)
+    points = [(1., 1., 1.), (2., 2., 2.), (3., 3., 3.)]
+    vectors = Vector3Array(points)
+    expected = {"+": [(2., 3., 4.), (3., 4., 5.), (4., 5., 6.)],
+                "-": [(0., 1., 2.), (-1., 0., 1.), (-2., -1., 0.)],
+                "*": [(1., 2., 3.), (2., 4., 6.), (3., 6., 9.)]}
+    results = {"+": (v + vectors, vectors + v),
+               "-": (v - vectors, -(vectors - v)),
+               "*": (v * vectors, vectors * v)}
+    for name, (left, right) in sorted(results.items()):
+        for side, result in (("Vector3 %s array" % name, left),
+                             ("array %s Vector3" % name, right)):
+            if not isinstance(result, Vector3Array):
+                problems.append("%s returned %r" % (side, result))
+            elif result.array.tolist() != [list(point) for point in expected[name]]:
+                problems.append("%s gave %r" % (side, result.array.tolist()))
+    return problems
+
+
+def run():
+    problems = check_null_rows() + check_operators()
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit("%i problem(s) with Vector3Array views" % len(problems))
+    print("Vector3Array views OK")
+
+
+if __name__ == "__main__":
+    run()
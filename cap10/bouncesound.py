@@ -2,6 +2,7 @@ import pygame
 from pygame.locals import *
 from random import randint
 from gameobjects.vector2 import Vector2
+from gameobjects.gameclock import GameClock
 
 
 SCREEN_SIZE = (640, 480)
@@ -11,6 +12,10 @@ GRAVITY = 300.0
 # Aumente esse valor para ter mais batidas, mas nao defina um valor maior que 1
 BOUNCINESS = 0.7
 
+# Atualizacoes da fisica por segundo, e o maximo de quadros desenhados por segundo
+UPDATE_RATE = 100
+FRAME_RATE = 60
+
 
 def stereo_pan(x_coord, screen_width):
     right_volume = float(x_coord) / screen_width
@@ -22,6 +27,8 @@ def stereo_pan(x_coord, screen_width):
 class Ball(object):
     def __init__(self, position, speed, image, bounce_sound):
         self.position = Vector2(position)
+        # A posicao antes da ultima atualizacao, para a interpolacao
+        self.previous_position = self.position.copy()
         self.speed = Vector2(speed)
         self.image = image
         self.bounce_sound = bounce_sound
@@ -32,6 +39,8 @@ class Ball(object):
 
         screen_width, screen_height = SCREEN_SIZE
 
+        self.previous_position = self.position.copy()
+
         x, y = self.position
         x -= w/2
         y -= h/2
@@ -76,10 +85,10 @@ class Ball(object):
             channel.set_volume(left, right)
 
 
-    def render(self, surface):
-        # desenha o centro do sprite em self.position
+    def render(self, surface, interpolation=1.0):
+        # desenha o centro do sprite entre a posicao anterior e a atual
         w, h = self.image.get_size()
-        x, y = self.position
+        x, y = self.previous_position + (self.position - self.previous_position) * interpolation
         x -= w/2
         y -= h/2
         surface.blit(self.image, (x,y))
@@ -98,6 +107,8 @@ def run():
 
     pygame.mouse.set_visible(False)
     clock = pygame.time.Clock()
+    # Roda a fisica com um passo fixo, nao importa a taxa de quadros
+    game_clock = GameClock(UPDATE_RATE)
 
     ball_image = pygame.image.load("ball.png").convert_alpha()
     mouse_image = pygame.image.load("mousecursor.png").convert_alpha()
@@ -122,21 +133,25 @@ def run():
                                 bounce_sound)
                 balls.append(new_ball)
 
-        time_passed_seconds = clock.tick() / 1000.
-        screen.fill((0, 0, 0))
-        dead_balls = []
+        time_passed_seconds = clock.tick(FRAME_RATE) / 1000.
 
-        for ball in balls:
-            ball.update(time_passed_seconds)
-            ball.render(screen)
+        for update in range(game_clock.tick(time_passed_seconds)):
+            dead_balls = []
 
-            # nao faz nada com as bolas que tenham mais de 10 segundos de vida
-            if ball.age > 10.0:
-                dead_balls.append(ball)
+            for ball in balls:
+                ball.update(game_clock.step)
 
-        # remove quaisquer bolas 'mortas' da lista principal
-        for ball in dead_balls:
-            balls.remove(ball)
+                # nao faz nada com as bolas que tenham mais de 10 segundos de vida
+                if ball.age > 10.0:
+                    dead_balls.append(ball)
+
+            # remove quaisquer bolas 'mortas' da lista principal
+            for ball in dead_balls:
+                balls.remove(ball)
+
+        screen.fill((0, 0, 0))
+        for ball in balls:
+            ball.render(screen, game_clock.interpolation)
 
         # desenha o cursos do mouse
         mouse_pos = pygame.mouse.get_pos()
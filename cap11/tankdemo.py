@@ -6,6 +6,9 @@ from OpenGL.GLU import *
 import pygame
 from pygame.locals import *
 
+from gameobjects.matrix44 import Matrix44
+from gameobjects.transformnode import TransformNode
+
 # importa a classe Model3D
 import model3d
 
@@ -63,6 +66,12 @@ def run():
 
     rotation = 0.0
 
+    # hierarquia de transformacoes: a camera e o tanque, filho da camera
+    camera = TransformNode(Matrix44.x_rotation(radians(15)) *
+                           Matrix44.translation(0.0, -1.5, -3.5))
+    tank = TransformNode(parent=camera)
+    gl_matrix = tank.get_world_matrix().to_buffer()
+
     while True:
         for event in pygame.event.get():
             if event.type == QUIT:
@@ -73,12 +82,12 @@ def run():
         time_passed = clock.tick()
         time_passed_seconds = time_passed / 1000.
 
-        glLoadIdentity()
-        glRotate(15, 1, 0, 0)
-        glTranslatef(0.0, -1.5, -3.5)
-
         rotation += time_passed_seconds * 45.0
-        glRotatef(rotation, 0, 1, 0)
+        tank.local.make_y_rotation(radians(rotation))
+        tank.invalidate()
+
+        # somente as matrizes que mudaram sao recalculadas
+        glLoadMatrixd(tank.get_world_matrix().to_buffer(out=gl_matrix))
 
         tank_model.draw_quick()
         pygame.display.flip()
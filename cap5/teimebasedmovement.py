@@ -1,6 +1,7 @@
 import pygame
 from pygame.locals import *
 from sys import exit
+from gameobjects.gameclock import GameClock
 
 
 background_image_filename = 'sushiplate.jpg'
@@ -16,8 +17,12 @@ sprite = pygame.image.load(sptrite_image_file)
 # objeto clock
 clock = pygame.time.Clock()
 
-# a coordenada x do sprite
+# move o sprite 60 vezes por segundo, qualquer que seja a taxa de quadros
+game_clock = GameClock(60)
+
+# a coordenada x do sprite, e o seu valor antes da ultima atualizacao
 x = 0.
+previous_x = 0.
 
 # a velocidade em pixels por segundo
 speed = 250
@@ -29,17 +34,21 @@ while True:
             pygame.quit()
             exit()
 
+    # desenha o sprite entre a posicao anterior e a atual
     screen.blit(background, (0, 0))
-    screen.blit(sprite, (x, 100))
+    screen.blit(sprite, (previous_x + (x - previous_x) * game_clock.interpolation, 100))
 
     time_passed = clock.tick()
     time_passed_seconds = time_passed / 1000.0
 
-    distance_moved = time_passed_seconds * speed
-    x += distance_moved
+    for update in range(game_clock.tick(time_passed_seconds)):
+        previous_x = x
+        distance_moved = game_clock.step * speed
+        x += distance_moved
 
-    # se a imagem ultrapassar a extremidade da tela, mova-a de volta
-    if x > 640:
-        x -= 640
+        # se a imagem ultrapassar a extremidade da tela, mova-a de volta
+        if x > 640:
+            x -= 640
+            previous_x -= 640
 
     pygame.display.update()
\ No newline at end of file
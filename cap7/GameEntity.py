@@ -22,4 +22,5 @@ class GameEntity(object):
             distance_to_destination = vec_to_destination.get_length()
             heading = vec_to_destination.get_normalized()
             travel_distance = min(distance_to_destination, time_passed * self.speed)
-            self.location += travel_distance * heading
\ No newline at end of file
+            self.location += travel_distance * heading
+            self.world.entity_moved(self)
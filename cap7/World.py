@@ -3,6 +3,7 @@ class World(object):
     def __init__(self):
         self.entities = {}  # armazena todas as entidades
         self.entity_id = 0  # ultimo id de entidade atribuido
+        self.grids = {}  # um indice espacial para cada nome de entidade
 
         # Desenha o formigueiro (um circulo) no background
         self.background = pygame.surface.Surface(SCREEN_SIZE).convert()
@@ -15,8 +16,21 @@ class World(object):
         entity.id = self.entity_id
         self.entity_id += 1
 
+        # Coloca a entidade na grade das entidades com o mesmo nome
+        grid = self.grids.get(entity.name)
+        if grid is None:
+            grid = self.grids[entity.name] = SpatialHash(GRID_CELL_SIZE)
+        grid.insert(entity, entity.location)
+
     def remove_entity(self, entity):
         del self.entities[entity.id]
+        self.grids[entity.name].remove(entity)
+
+    def entity_moved(self, entity):
+        # Chamado pela entidade depois de mudar de posicao
+        grid = self.grids[entity.name]
+        if entity in grid:
+            grid.update(entity, entity.location)
 
     def get(self, entity_id):
         # Encontra a entidade, dado o seu id (ou retorna None se ela nao for encontrada)
@@ -39,12 +53,27 @@ class World(object):
             entity.render(surface)
 
     def get_close_entity(self, name, location, e_range=100):
-        # encontra uma entidade em um raio a partir de uma posicao
-        location = Vector2(*location)
+        # encontra a entidade mais proxima em um raio a partir de uma posicao
+        return self.nearest(name, location, e_range)
 
-        for entity in self.entities.values():
-            if entity.name == name:
-                distance = location.get_distance_to(entity.location)
-                if distance < e_range:
-                    return entity
-        return None
\ No newline at end of file
+    def nearest(self, name, location, max_range=None):
+        # a entidade mais proxima, olhando apenas as celulas da grade em
+        # aneis cada vez maiores ao redor da posicao
+        grid = self.grids.get(name)
+        if grid is None:
+            return None
+        return grid.nearest(location, max_range)
+
+    def k_nearest(self, name, location, k, max_range=None):
+        # as k entidades mais proximas, da mais proxima para a mais distante
+        grid = self.grids.get(name)
+        if grid is None:
+            return []
+        return grid.k_nearest(location, k, max_range)
+
+    def all_within(self, name, location, e_range):
+        # todas as entidades em um raio a partir de uma posicao
+        grid = self.grids.get(name)
+        if grid is None:
+            return []
+        return grid.query_radius(location, e_range)
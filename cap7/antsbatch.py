@@ -0,0 +1,125 @@
+"""Runs the ant colony from antsstatemachine.py without a display, as fast
+as possible, and prints statistics for each run. Every run has its own
+seed, so a run can be repeated exactly, and the runs are shared out over
+a pool of processes.
+
+    python antsbatch.py --seeds 8 --updates 3000
+
+"""
+
+import os
+from functools import partial
+from multiprocessing import Pool
+from optparse import OptionParser
+from random import Random
+from time import perf_counter
+
+import pygame
+
+from gameobjects.profiler import Profiler
+
+from antsstatemachine import World, ArrayWorld, ANT_COUNT, SIMULATION_RATE, add_ants, spawn_entities
+
+# The images are next to this file, so it can be run from any directory
+IMAGE_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_image(filename):
+    # No display, so the images can't be converted
+    return pygame.image.load(os.path.join(IMAGE_PATH, filename))
+
+
+def run_simulation(seed, updates=3000, ant_count=ANT_COUNT, world_class=World, profile=False,
+                   scent=True):
+    """Runs one colony, and returns a dictionary of statistics.
+
+    seed -- Seed for the world's random numbers
+    updates -- Number of updates to run
+    ant_count -- Number of ants to start with
+    world_class -- World or ArrayWorld
+    profile -- If True, a report of where the time went is added to the
+    statistics, as "profile"
+    scent -- If False, the ants don't follow the scent of the leaves
+
+    """
+
+    # No AI budget, as it depends on how fast the machine is
+    world = world_class(headless=True, rng=Random(seed), ai_budget=None, scent=scent)
+    if profile:
+        world.profiler = Profiler()
+    ant_image = load_image("ant.png")
+    leaf_image = load_image("leaf.png")
+    spider_image = load_image("spider.png")
+
+    add_ants(world, ant_image, ant_count)
+
+    time_passed = 1000. / SIMULATION_RATE
+    start = perf_counter()
+    for update in range(updates):
+        spawn_entities(world, leaf_image, spider_image)
+        world.process(time_passed)
+    time_taken = perf_counter() - start
+
+    stats = dict(world.stats)
+    stats["seed"] = seed
+    stats["updates"] = updates
+    stats["entities"] = len(world.entities)
+    stats["updates_per_second"] = updates / time_taken
+    if profile:
+        stats["profile"] = world.profiler.report()
+    return stats
+
+
+def run():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("-s", "--seeds", type="int", default=8,
+                      help="number of runs, with seeds from --first-seed up")
+    parser.add_option("-f", "--first-seed", type="int", default=0)
+    parser.add_option("-u", "--updates", type="int", default=3000,
+                      help="updates in each run (%d a second of game time)" % SIMULATION_RATE)
+    parser.add_option("-a", "--ants", type="int", default=ANT_COUNT)
+    parser.add_option("-p", "--processes", type="int", default=None,
+                      help="size of the process pool (default: one per CPU)")
+    parser.add_option("--arrays", action="store_true", default=False,
+                      help="use ArrayWorld")
+    parser.add_option("--profile", action="store_true", default=False,
+                      help="print where the time went in each run")
+    parser.add_option("--no-scent", action="store_false", dest="scent", default=True,
+                      help="don't let the ants follow the scent of the leaves")
+    options, args = parser.parse_args()
+
+    seeds = range(options.first_seed, options.first_seed + options.seeds)
+    simulate = partial(run_simulation,
+                       updates=options.updates,
+                       ant_count=options.ants,
+                       world_class=ArrayWorld if options.arrays else World,
+                       profile=options.profile,
+                       scent=options.scent)
+
+    pool = Pool(options.processes)
+    try:
+        results = pool.map(simulate, seeds)
+    finally:
+        pool.close()
+        pool.join()
+
+    columns = ("seed", "leaves_delivered", "spiders_killed", "spiders_delivered",
+               "entities", "updates_per_second")
+    print(" ".join("%18s" % column for column in columns))
+    for stats in results:
+        print(" ".join("%18s" % (int(stats[column]),) for column in columns))
+
+    count = float(len(results))
+    print(" ".join(["%18s" % "mean"] +
+                   ["%18.1f" % (sum(stats[column] for stats in results) / count)
+                    for column in columns[1:]]))
+
+    if options.profile:
+        for stats in results:
+            print("")
+            print("Seed %i" % stats["seed"])
+            print(stats["profile"])
+
+
+if __name__ == "__main__":
+    run()
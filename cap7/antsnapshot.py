@@ -0,0 +1,413 @@
+"""Saves the state of an ant World as a compact binary snapshot, and
+restores it in to a new World, which then carries on exactly as the
+original would have. Used to checkpoint long runs, and to roll back for
+replays.
+
+A snapshot is a small header followed by one array per column (ids,
+locations, speeds, state names and so on), so saving and loading
+thousands of entities takes milliseconds. A delta holds just the values
+that changed between two snapshots of the same world, typically one
+update apart.
+
+    data = take_snapshot(world)
+    world = World()
+    restore_snapshot(world, data, {"ant": ant_image, "leaf": leaf_image,
+                                   "spider": spider_image})
+
+Run this file to time it:
+
+    python antsnapshot.py --ants 5000
+
+"""
+
+import os
+import sys
+import struct
+from array import array
+from optparse import OptionParser
+from random import Random
+from time import perf_counter
+
+import pygame
+
+from gameobjects.spatialhash import SpatialHash
+from gameobjects.scheduler import ThinkScheduler
+
+from antsstatemachine import World, ArrayWorld, Ant, Leaf, Spider, GRID_CELL_SIZE, \
+    SIMULATION_RATE, add_ants, spawn_entities
+
+FORMAT_VERSION = 2
+SNAPSHOT_MAGIC = b"ANTS"
+DELTA_MAGIC = b"ANTD"
+
+# magic, version, update count, the three stats, scheduler update, then
+# the parts of the Random state that aren't in the rng column
+HEADER = struct.Struct("<4sHqqqqqIBd")
+SECTION = struct.Struct("<I")
+PATCH = struct.Struct("<II")
+
+# The columns of a snapshot, in order, with their array typecodes
+COLUMNS = (
+    ("rng", "I"),
+    ("ids", "q"),
+    ("kinds", "B"),
+    ("states", "B"),
+    ("carrying", "B"),
+    ("health", "h"),
+    ("targets", "q"),
+    ("x", "d"),
+    ("y", "d"),
+    ("destination_x", "d"),
+    ("destination_y", "d"),
+    ("speeds", "d"),
+    # The order the brains think in, and the update each is due
+    ("think_ids", "q"),
+    ("think_updates", "q"),
+    # The order the entities are stored in the grids
+    ("grid_ids", "q"),
+    # The order the states made their subscriptions in
+    ("resume_ids", "q"),
+    # The scent of the leaves in each cell, if the world has a scent field
+    ("scent", "d"),
+)
+
+KIND_NAMES = ("ant", "leaf", "spider")
+KIND_CODES = dict((name, code) for code, name in enumerate(KIND_NAMES))
+ENTITY_CLASSES = {"ant": Ant, "leaf": Leaf, "spider": Spider}
+STATE_NAMES = (None, "exploring", "seeking", "delivering", "hunting")
+STATE_CODES = dict((name, code) for code, name in enumerate(STATE_NAMES))
+CARRY_NAMES = (None, "leaf", "spider")
+CARRY_CODES = dict((name, code) for code, name in enumerate(CARRY_NAMES))
+# The attribute of each state that holds the entity it is after
+TARGETS = {"seeking": "leaf", "hunting": "spider"}
+
+# Snapshots are little endian, whatever machine they are made on
+SWAP_BYTES = sys.byteorder != "little"
+
+
+def _pack(magic, header, sections):
+    parts = [HEADER.pack(magic, FORMAT_VERSION, *header)]
+    for section in sections:
+        if isinstance(section, tuple):
+            length, indices, values = section
+            parts.append(PATCH.pack(length, len(indices)))
+            columns = (indices, values)
+        else:
+            parts.append(SECTION.pack(len(section)))
+            columns = (section,)
+        for column in columns:
+            if SWAP_BYTES:
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+    return b"".join(parts)
+
+
+def _read_array(data, offset, typecode, length):
+    column = array(typecode)
+    end = offset + column.itemsize * length
+    column.frombytes(data[offset:end])
+    if SWAP_BYTES:
+        column.byteswap()
+    return column, end
+
+
+def _unpack(magic, data):
+    fields = HEADER.unpack_from(data)
+    if fields[0] != magic:
+        raise ValueError("Not an ant world %s" % ("snapshot" if magic == SNAPSHOT_MAGIC else "delta"))
+    if fields[1] != FORMAT_VERSION:
+        raise ValueError("Unsupported snapshot version %i" % fields[1])
+    offset = HEADER.size
+    sections = []
+    for name, typecode in COLUMNS:
+        if magic == SNAPSHOT_MAGIC:
+            length, = SECTION.unpack_from(data, offset)
+            column, offset = _read_array(data, offset + SECTION.size, typecode, length)
+            sections.append(column)
+        else:
+            length, change_count = PATCH.unpack_from(data, offset)
+            indices, offset = _read_array(data, offset + PATCH.size, "I", change_count)
+            values, offset = _read_array(data, offset, typecode, change_count)
+            sections.append((length, indices, values))
+    return fields[2:], sections
+
+
+def take_snapshot(world):
+    """Returns the state of a World (or ArrayWorld) as a bytes object.
+
+    world -- The world, between updates
+
+    """
+
+    entities = world.entities.values()
+    ids = array('q', world.entities.handles())
+    kinds = array('B')
+    states = array('B')
+    carrying = array('B')
+    health = array('h')
+    targets = array('q')
+    x = array('d')
+    y = array('d')
+    destination_x = array('d')
+    destination_y = array('d')
+    speeds = array('d')
+    brain_ids = {}
+    subscriber_ids = {}
+
+    for entity in entities:
+        kinds.append(KIND_CODES[entity.name])
+        brain = entity.brain
+        brain_ids[brain] = entity.id
+        state = brain.active_state
+        if state is None:
+            states.append(0)
+            targets.append(-1)
+        else:
+            states.append(STATE_CODES[state.name])
+            target_attribute = TARGETS.get(state.name)
+            target = None
+            if target_attribute is not None:
+                target = getattr(state, target_attribute)
+            targets.append(-1 if target is None else target.id)
+            for subscription in brain.subscriptions:
+                subscriber_ids[subscription] = entity.id
+        carrying.append(CARRY_CODES[getattr(entity, "carry_name", None)])
+        health.append(getattr(entity, "health", 0))
+        location_x, location_y = entity.location
+        x.append(location_x)
+        y.append(location_y)
+        location_x, location_y = entity.destination
+        destination_x.append(location_x)
+        destination_y.append(location_y)
+        speeds.append(entity.speed)
+
+    think_ids = array('q')
+    think_updates = array('q')
+    for update, brain in world.scheduler.get_schedule():
+        think_ids.append(brain_ids[brain])
+        think_updates.append(update)
+
+    grid_ids = array('q', [entity.id for grid in world.grids.values()
+                           for entity, position in grid.items()])
+
+    # Each callback dictionary is in the order its subscriptions were
+    # made, so resuming the states in the order they first turn up puts
+    # every dictionary back the same way
+    resume_ids = array('q')
+    seen = set()
+    subscriber_lists = [watch.subscribers for watch in world.watches.values()]
+    subscriber_lists.extend(world.removed_subscribers.values())
+    for subscribers in subscriber_lists:
+        for subscription in subscribers:
+            entity_id = subscriber_ids[subscription]
+            if entity_id not in seen:
+                seen.add(entity_id)
+                resume_ids.append(entity_id)
+
+    scent = array('d')
+    if world.scent is not None:
+        scent.frombytes(world.scent.values.tobytes())
+
+    rng_version, rng_state, gauss_next = world.rng.getstate()
+    stats = world.stats
+    header = (world.update_count,
+              stats["leaves_delivered"], stats["spiders_killed"], stats["spiders_delivered"],
+              world.scheduler.update,
+              rng_version, gauss_next is not None, gauss_next or 0.)
+
+    return _pack(SNAPSHOT_MAGIC, header,
+                 (array('I', rng_state), ids, kinds, states, carrying, health, targets,
+                  x, y, destination_x, destination_y, speeds,
+                  think_ids, think_updates, grid_ids, resume_ids, scent))
+
+
+def restore_snapshot(world, data, images):
+    """Restores a snapshot in to a new World (or ArrayWorld).
+
+    world -- An empty world. It may be a different class to the one the
+    snapshot was taken from.
+    data -- A snapshot from take_snapshot (or apply_delta)
+    images -- Dictionary of images for the entities, by entity name
+
+    The entities get new ids in the restored world.
+
+    """
+
+    if len(world.entities):
+        raise ValueError("Snapshots can only be restored in to an empty World")
+
+    header, sections = _unpack(SNAPSHOT_MAGIC, data)
+    (rng_state, ids, kinds, states, carrying, health, targets,
+     x, y, destination_x, destination_y, speeds,
+     think_ids, think_updates, grid_ids, resume_ids, scent) = sections
+    (update_count, leaves_delivered, spiders_killed, spiders_delivered,
+     scheduler_update, rng_version, has_gauss, gauss_next) = header
+
+    scent_size = 0 if world.scent is None else world.scent.values.size
+    if len(scent) != scent_size:
+        raise ValueError("The snapshot and the World have different scent fields")
+
+    carry_images = {"leaf": images["leaf"],
+                    "spider": pygame.transform.flip(images["spider"], 0, 1)}
+
+    # Maps the ids in the snapshot on to the new entities
+    restored = {}
+    for index, entity_id in enumerate(ids):
+        name = KIND_NAMES[kinds[index]]
+        if name == "ant":
+            entity = Ant(world, images[name])
+            carry_name = CARRY_NAMES[carrying[index]]
+            if carry_name is not None:
+                entity.carry(carry_images[carry_name], carry_name)
+        else:
+            entity = world.create(ENTITY_CLASSES[name], images[name])
+            if name == "spider":
+                entity.health = health[index]
+                if entity.health <= 0:
+                    entity.image = entity.dead_image
+        entity.location.set(x[index], y[index])
+        entity.destination.set(destination_x[index], destination_y[index])
+        entity.speed = speeds[index]
+        world.add_entity(entity)
+        restored[entity_id] = entity
+
+    # Put the grids back in the same order, so queries find entities in
+    # the same order
+    world.grids = {}
+    for entity_id in grid_ids:
+        entity = restored[entity_id]
+        grid = world.grids.get(entity.name)
+        if grid is None:
+            grid = world.grids[entity.name] = SpatialHash(GRID_CELL_SIZE)
+        grid.insert(entity, entity.location)
+
+    for index, entity_id in enumerate(ids):
+        target_id = targets[index]
+        if target_id != -1:
+            ant = restored[entity_id]
+            state_name = STATE_NAMES[states[index]]
+            setattr(ant, TARGETS[state_name] + "_id", restored[target_id].id)
+
+    resume_order = list(resume_ids)
+    subscribed = set(resume_ids)
+    resume_order.extend(entity_id for entity_id in ids if entity_id not in subscribed)
+    state_names = dict(zip(ids, states))
+    for entity_id in resume_order:
+        state_name = STATE_NAMES[state_names[entity_id]]
+        if state_name is not None:
+            restored[entity_id].brain.resume_state(state_name)
+
+    scheduler = ThinkScheduler(world.scheduler.budget)
+    scheduler.update = scheduler_update
+    for entity_id, update in zip(think_ids, think_updates):
+        scheduler.add(restored[entity_id].brain, update)
+    world.scheduler = scheduler
+
+    if scent_size:
+        world.scent.values.flat[:] = scent
+
+    world.update_count = update_count
+    world.stats["leaves_delivered"] = leaves_delivered
+    world.stats["spiders_killed"] = spiders_killed
+    world.stats["spiders_delivered"] = spiders_delivered
+    # Last, as creating spiders uses random numbers
+    world.rng.setstate((rng_version, tuple(rng_state), gauss_next if has_gauss else None))
+
+
+def make_delta(old, new):
+    """Returns a delta that turns one snapshot in to another.
+
+    old -- A snapshot
+    new -- A later snapshot of the same world
+
+    """
+
+    header, old_sections = _unpack(SNAPSHOT_MAGIC, old)
+    header, new_sections = _unpack(SNAPSHOT_MAGIC, new)
+    patches = []
+    for old_column, new_column in zip(old_sections, new_sections):
+        # Removing an entity moves the last one in to its place, so most
+        # columns change at a few indices, and grow or shrink at the end
+        indices = array('I', [index for index, old_value, new_value
+                              in zip(range(len(new_column)), old_column, new_column)
+                              if old_value != new_value])
+        indices.extend(range(len(old_column), len(new_column)))
+        values = array(new_column.typecode, [new_column[index] for index in indices])
+        patches.append((len(new_column), indices, values))
+    return _pack(DELTA_MAGIC, header, patches)
+
+
+def apply_delta(old, delta):
+    """Applies a delta from make_delta to the snapshot it was made from, and
+    returns the new snapshot.
+
+    """
+
+    header, old_sections = _unpack(SNAPSHOT_MAGIC, old)
+    header, patches = _unpack(DELTA_MAGIC, delta)
+    sections = []
+    for column, (length, indices, values) in zip(old_sections, patches):
+        if length < len(column):
+            del column[length:]
+        elif length > len(column):
+            column.frombytes(bytes((length - len(column)) * column.itemsize))
+        for index, value in zip(indices, values):
+            column[index] = value
+        sections.append(column)
+    return _pack(SNAPSHOT_MAGIC, header, sections)
+
+
+def load_image(filename):
+    # No display, so the images can't be converted
+    return pygame.image.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename))
+
+
+def run():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("-a", "--ants", type="int", default=5000)
+    parser.add_option("-u", "--updates", type="int", default=300,
+                      help="updates to run before taking the snapshot")
+    parser.add_option("--arrays", action="store_true", default=False,
+                      help="use ArrayWorld")
+    options, args = parser.parse_args()
+
+    world_class = ArrayWorld if options.arrays else World
+    images = {"ant": load_image("ant.png"),
+              "leaf": load_image("leaf.png"),
+              "spider": load_image("spider.png")}
+    world = world_class(headless=True, rng=Random(0), ai_budget=None)
+    add_ants(world, images["ant"], options.ants)
+
+    time_passed = 1000. / SIMULATION_RATE
+    for update in range(options.updates):
+        spawn_entities(world, images["leaf"], images["spider"])
+        world.process(time_passed)
+
+    start = perf_counter()
+    snapshot = take_snapshot(world)
+    snapshot_time = perf_counter() - start
+
+    start = perf_counter()
+    restore_snapshot(world_class(headless=True, ai_budget=None), snapshot, images)
+    restore_time = perf_counter() - start
+
+    spawn_entities(world, images["leaf"], images["spider"])
+    world.process(time_passed)
+    next_snapshot = take_snapshot(world)
+    start = perf_counter()
+    delta = make_delta(snapshot, next_snapshot)
+    delta_time = perf_counter() - start
+    start = perf_counter()
+    apply_delta(snapshot, delta)
+    apply_time = perf_counter() - start
+
+    print("%i entities" % len(world.entities))
+    print("  snapshot %8i bytes %8.2f ms" % (len(snapshot), snapshot_time * 1e3))
+    print("  restore           %8.2f ms" % (restore_time * 1e3))
+    print("  delta    %8i bytes %8.2f ms, applied in %.2f ms"
+          % (len(delta), delta_time * 1e3, apply_time * 1e3))
+
+
+if __name__ == "__main__":
+    run()
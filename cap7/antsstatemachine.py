@@ -1,16 +1,46 @@
 import pygame
 from pygame.locals import *
 
-from random import randint, choice
+from random import Random, getrandbits
+from array import array
 from gameobjects.vector2 import Vector2
+from gameobjects.vector2pool import Vector2Pool
+from gameobjects.spatialhash import SpatialHash
+from gameobjects.gameclock import GameClock
+from gameobjects.scheduler import ThinkScheduler
+from gameobjects.slotmap import SlotMap
+from gameobjects.pool import Pool
+from gameobjects.profiler import Profiler
+
+try:
+    import numpy
+    from gameobjects.scalarfield import ScalarField
+except ImportError:
+    # numpy is only needed for ArrayWorld, and the scent of the leaves
+    numpy = None
+    ScalarField = None
 
 SCREEN_SIZE = (640, 480)
 NEST_POSITION = (320, 240)
 ANT_COUNT = 10
 NEST_SIZE = 100
+GRID_CELL_SIZE = 64
+# Simulation updates per second, and the most frames drawn per second
+SIMULATION_RATE = 30
+FRAME_RATE = 60
+# Most time to spend on AI in one update, in seconds
+AI_BUDGET = 0.01
+# The scent leaves give off, per second, and the smallest change in scent
+# (per pixel) that an exploring ant will follow
+SCENT_CELL_SIZE = 16
+LEAF_SCENT = 1.
+SCENT_THRESHOLD = 1e-4
 
 
 class State(object):
+    # Number of updates between thinks while in this state
+    think_interval = 1
+
     def __init__(self, name):
         self.name = name
 
@@ -26,86 +56,590 @@ class State(object):
     def exit_actions(self):
         pass
 
+    def resume(self):
+        # Called instead of entry_actions when a restored entity carries on
+        # in this state, to make the subscriptions entry_actions would have
+        pass
+
+
+class Subscription(object):
+    """A callback registered for World events, until it is cancelled."""
+
+    def __init__(self, subscribers, callback):
+
+        self.subscribers = subscribers
+        subscribers[self] = callback
+
+    def cancel(self):
+
+        self.subscribers.pop(self, None)
+
+
+class RadiusWatch(object):
+    """The entities with a name inside a circle, as of the last update."""
+
+    def __init__(self, name, centre, radius, inside):
+
+        self.name = name
+        self.centre = centre
+        self.radius = radius
+        self.inside = inside
+        self.subscribers = {}
+
 
 class StateMachine(object):
-    def __init__(self):
+    def __init__(self, name=None):
 
+        # The name of the entity the state machine is for, in profiles
+        self.name = name
         self.states = {}
         self.active_state = None
+        # Subscriptions made by the active state, cancelled when it exits
+        self.subscriptions = []
+        self.thinking = False
+        # A transition requested by an event while thinking
+        self.next_transition = None
 
     def add_state(self, state):
 
         self.states[state.name] = state
 
+    def get_think_interval(self):
+
+        if self.active_state is None:
+            return 1
+        return self.active_state.think_interval
+
+    def add_subscription(self, subscription):
+
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def transition(self, new_state_name):
+
+        # Events can arrive in the middle of think (e.g. when the entity
+        # removes something it was watching), so wait until it finishes
+        if self.thinking:
+            self.next_transition = (self.active_state, new_state_name)
+        else:
+            self.set_state(new_state_name)
+
     def think(self):
 
         if self.active_state is None:
             return
 
-        self.active_state.do_actions()
+        self.thinking = True
+        try:
+            self.active_state.do_actions()
 
-        new_state_name = self.active_state.check_conditions()
-        if new_state_name is not None:
-            self.set_state(new_state_name)
+            new_state_name = self.active_state.check_conditions()
+            if new_state_name is not None:
+                self.set_state(new_state_name)
+        finally:
+            self.thinking = False
+
+        self.run_next_transition()
+
+    def think_profiled(self, profiler):
+
+        # The same as think, timing each part with a Profiler
+        state = self.active_state
+        if state is None:
+            return
+
+        timer = profiler.timer
+        self.thinking = True
+        try:
+            start = timer()
+            state.do_actions()
+            checking = timer()
+            new_state_name = state.check_conditions()
+            end = timer()
+            profiler.add((self.name, state.name, "do_actions"), checking - start)
+            profiler.add((self.name, state.name, "check_conditions"), end - checking)
+            if new_state_name is not None:
+                self.set_state(new_state_name)
+                profiler.add((self.name, new_state_name, "set_state"), timer() - end)
+        finally:
+            self.thinking = False
+
+        self.run_next_transition()
+
+    def run_next_transition(self):
+
+        if self.next_transition is not None:
+            state, new_state_name = self.next_transition
+            self.next_transition = None
+            # Ignore it if the state that asked has already exited
+            if state is self.active_state:
+                self.set_state(new_state_name)
 
     def set_state(self, new_state_name):
 
         if self.active_state is not None:
+            for subscription in self.subscriptions:
+                subscription.cancel()
+            del self.subscriptions[:]
             self.active_state.exit_actions()
 
         self.active_state = self.states[new_state_name]
         self.active_state.entry_actions()
 
+    def resume_state(self, state_name):
 
-class World(object):
-    def __init__(self):
+        # Makes a state active without running its entry actions again
+        self.active_state = self.states[state_name]
+        self.active_state.resume()
 
-        self.entities = {}
-        self.entity_id = 0
-        self.background = pygame.surface.Surface(SCREEN_SIZE).convert()
-        self.background.fill((255, 255, 255))
-        pygame.draw.circle(self.background, (200, 255, 200), NEST_POSITION, int(NEST_SIZE))
+
+class World(object):
+    def __init__(self, headless=False, rng=None, ai_budget=AI_BUDGET, scent=True):
+
+        # Entity ids are SlotMap handles, so an old id never finds a new
+        # entity
+        self.entities = SlotMap()
+        # A spatial index of the entities with each name
+        self.grids = {}
+        # Decides which entities think on each update
+        self.scheduler = ThinkScheduler(ai_budget)
+        # Callbacks for when entities are removed, by entity id
+        self.removed_subscribers = {}
+        # RadiusWatches, by (name, centre, radius)
+        self.watches = {}
+        # Pools of entities for reuse, by class, and pooled entities removed
+        # during this update
+        self.pools = {}
+        self.released_entities = []
+        # How far between the last two updates to draw the entities
+        self.interpolation = 1.
+        # Set to a Profiler to time each part of process and render
+        self.profiler = None
+        # (image, position) pairs to draw, reused each frame
+        self.blits = []
+        # For render_dirty, the rect each entity was drawn over last frame
+        # (or None to draw everything), and other regions to draw again
+        self.drawn_rects = None
+        self.redraw_rects = []
+        # All the randomness in the world comes from here, so a world made
+        # with a seeded Random always runs the same way. Without one, the
+        # seed comes from the random module, so seeding that (as input
+        # replays do) also repeats a run.
+        self.rng = rng if rng is not None else Random(getrandbits(64))
+        # A field of the scent the leaves give off, if numpy is installed
+        if scent and ScalarField is not None:
+            self.scent = ScalarField(SCREEN_SIZE, SCENT_CELL_SIZE)
+        else:
+            self.scent = None
+        self.update_count = 0
+        self.stats = {"leaves_delivered": 0, "spiders_killed": 0, "spiders_delivered": 0}
+        # A headless world needs no display, but can't be rendered
+        if headless:
+            self.background = None
+        else:
+            self.background = pygame.surface.Surface(SCREEN_SIZE).convert()
+            self.background.fill((255, 255, 255))
+            pygame.draw.circle(self.background, (200, 255, 200), NEST_POSITION, int(NEST_SIZE))
 
     def add_entity(self, entity):
 
-        self.entities[self.entity_id] = entity
-        entity.id = self.entity_id
-        self.entity_id += 1
+        entity.id = self.entities.add(entity)
+
+        grid = self.grids.get(entity.name)
+        if grid is None:
+            grid = self.grids[entity.name] = SpatialHash(GRID_CELL_SIZE)
+        grid.insert(entity, entity.location)
+
+        if entity.brain.states:
+            self.scheduler.add(entity.brain)
 
     def remove_entity(self, entity):
 
-        del self.entities[entity.id]
+        self.entities.remove(entity.id)
+        self.grids[entity.name].remove(entity)
+
+        if entity.brain in self.scheduler:
+            self.scheduler.remove(entity.brain)
+
+        # Pooled entities go back at the end of the update, as they may
+        # still be in use until then
+        if entity.pool is not None:
+            self.released_entities.append(entity)
+
+        subscribers = self.removed_subscribers.pop(entity.id, None)
+        if subscribers:
+            for callback in list(subscribers.values()):
+                callback(entity)
+
+    def create(self, entity_class, image):
+
+        # Reuses a removed entity of the same class, if there is one
+        pool = self.pools.get(entity_class)
+        if pool is None:
+            pool = self.pools[entity_class] = Pool(entity_class, entity_class.reset)
+        entity = pool.acquire(self, image)
+        entity.pool = pool
+        return entity
+
+    def subscribe_removed(self, entity, callback):
+
+        subscribers = self.removed_subscribers.get(entity.id)
+        if subscribers is None:
+            subscribers = self.removed_subscribers[entity.id] = {}
+        return Subscription(subscribers, callback)
+
+    def subscribe_radius(self, name, centre, radius, callback):
+
+        # Subscribers to the same circle share one query per update
+        key = (name, tuple(centre), radius)
+        watch = self.watches.get(key)
+        if watch is None:
+            inside = self.all_within(name, centre, radius)
+            watch = self.watches[key] = RadiusWatch(name, key[1], radius, inside)
+        return Subscription(watch.subscribers, callback)
+
+    def publish_radius_events(self):
+
+        for key, watch in list(self.watches.items()):
+            if not watch.subscribers:
+                del self.watches[key]
+                continue
+            inside = self.all_within(watch.name, watch.centre, watch.radius)
+            inside_set = set(inside)
+            was_inside_set = set(watch.inside)
+            entered = [entity for entity in inside if entity not in was_inside_set]
+            left = [entity for entity in watch.inside if entity not in inside_set]
+            watch.inside = inside
+            for entity in entered:
+                for callback in list(watch.subscribers.values()):
+                    callback("entered", entity)
+            for entity in left:
+                for callback in list(watch.subscribers.values()):
+                    callback("left", entity)
+
+    def entity_moved(self, entity):
+
+        grid = self.grids[entity.name]
+        # Entities removed this frame are still processed
+        if entity in grid:
+            grid.update(entity, entity.location)
 
     def get(self, entity_id):
 
-        if entity_id in self.entities:
-            return self.entities[entity_id]
-        else:
-            return None
+        return self.entities.get(entity_id)
 
     def process(self, time_passed):
 
         time_passed_seconds = time_passed / 1000.0
-        for entity in list(self.entities.values()):
-            entity.process(time_passed_seconds)
+        self.update_count += 1
+        profiler = self.profiler
+        if profiler is None:
+            self.scheduler.run()
+            for entity in self.entities.values():
+                entity.process(time_passed_seconds)
+            self.move_entities(time_passed_seconds)
+            if self.watches:
+                self.publish_radius_events()
+            if self.scent is not None:
+                self.update_scent(time_passed_seconds)
+        else:
+            self.process_profiled(time_passed_seconds, profiler)
 
-    def render(self, surface):
+        if self.released_entities:
+            for entity in self.released_entities:
+                entity.pool.release(entity)
+            del self.released_entities[:]
 
-        surface.blit(self.background, (0, 0))
+    def process_profiled(self, time_passed, profiler):
+
+        # The same as process, timing each part with a Profiler
+        timer = profiler.timer
+
+        def think(brain):
+            brain.think_profiled(profiler)
+
+        self.scheduler.run(think)
         for entity in self.entities.values():
+            start = timer()
+            entity.process(time_passed)
+            profiler.add((entity.name, "process"), timer() - start)
+
+        start = timer()
+        self.move_entities(time_passed)
+        profiler.add(("world", "move_entities"), timer() - start)
+
+        if self.watches:
+            start = timer()
+            self.publish_radius_events()
+            profiler.add(("world", "radius_events"), timer() - start)
+
+        if self.scent is not None:
+            start = timer()
+            self.update_scent(time_passed)
+            profiler.add(("world", "scent"), timer() - start)
+
+    def update_scent(self, time_passed):
+
+        # Every leaf adds to the scent, which then spreads and fades, all
+        # with whole array operations
+        grid = self.grids.get("leaf")
+        if grid:
+            positions = [position for leaf, position in grid.items()]
+            self.scent.deposit_many(positions, LEAF_SCENT * time_passed)
+        self.scent.update(time_passed)
+
+    def move_entities(self, time_passed):
+
+        # Entities in a World move themselves, in GameEntity.process
+        pass
+
+    def render(self, surface, interpolation=1.):
+
+        self.interpolation = interpolation
+        # Anything render_dirty drew may have been drawn over
+        self.drawn_rects = None
+        profiler = self.profiler
+        if profiler is None:
+            # Everything is drawn with one call to blits, which saves the
+            # overhead of a call to blit for each image
+            blits = self.blits
+            blits.append((self.background, (0, 0)))
+            for entity in self.entities:
+                entity.add_blits(blits)
+            surface.blits(blits, False)
+            del blits[:]
+        else:
+            self.render_profiled(surface, profiler)
+
+    def render_dirty(self, surface, interpolation=1.):
+
+        # Like render, but only draws the background where the entities
+        # were last frame (and anything passed to redraw), so the work
+        # grows with the number of entities rather than the screen size.
+        # The surface must be left as it was since the last call. Returns
+        # the rects that changed, for pygame.display.update.
+        self.interpolation = interpolation
+        background = self.background
+        previous_rects = self.drawn_rects
+        profiler = self.profiler
+
+        if profiler is not None:
+            start = profiler.timer()
+        if previous_rects is None:
+            surface.blit(background, (0, 0))
+            previous_rects = {}
+            dirty_rects = [surface.get_rect()]
+        else:
+            blits = self.blits
+            blits.extend((background, rect, rect) for rect in previous_rects.values())
+            blits.extend((background, rect, rect) for rect in self.redraw_rects)
+            surface.blits(blits, False)
+            del blits[:]
+            dirty_rects = self.redraw_rects
+        self.redraw_rects = []
+        if profiler is not None:
+            profiler.add(("world", "background"), profiler.timer() - start)
+
+        # Every entity is drawn again, as it may overlap a region that
+        # has just been drawn over
+        drawn_rects = {}
+        if profiler is None:
+            blits = self.blits
+            entities = self.entities.values()
+            # The number of blits after each entity's
+            ends = []
+            for entity in entities:
+                entity.add_blits(blits)
+                ends.append(len(blits))
+            rects = surface.blits(blits)
+            del blits[:]
+            start = 0
+            for entity, end in zip(entities, ends):
+                rect = rects[start]
+                if end - start > 1:
+                    rect = rect.unionall(rects[start + 1:end])
+                drawn_rects[entity] = rect
+                start = end
+        else:
+            timer = profiler.timer
+            for entity in self.entities:
+                start = timer()
+                drawn_rects[entity] = entity.render(surface)
+                profiler.add((entity.name, "render"), timer() - start)
+
+        # One rect per entity, covering where it was and where it is now
+        for entity, rect in drawn_rects.items():
+            previous_rect = previous_rects.pop(entity, None)
+            if previous_rect is None:
+                dirty_rects.append(rect)
+            else:
+                dirty_rects.append(rect.union(previous_rect))
+        # Entities that have been removed
+        dirty_rects.extend(previous_rects.values())
+
+        self.drawn_rects = drawn_rects
+        return dirty_rects
+
+    def redraw(self, rect=None):
+
+        # Makes render_dirty draw a region again next frame, for when
+        # something else has drawn over the surface or the background. With
+        # no rect, the whole surface is drawn again.
+        if rect is None:
+            self.drawn_rects = None
+            self.redraw_rects = []
+        elif self.drawn_rects is not None:
+            self.redraw_rects.append(pygame.Rect(rect))
+
+    def render_profiled(self, surface, profiler):
+
+        # The same as render, timing each part with a Profiler
+        timer = profiler.timer
+        start = timer()
+        surface.blit(self.background, (0, 0))
+        profiler.add(("world", "background"), timer() - start)
+        for entity in self.entities:
+            start = timer()
             entity.render(surface)
+            profiler.add((entity.name, "render"), timer() - start)
+
+    def get_render_location(self, entity):
+
+        previous = entity.previous_location
+        if previous is None or self.interpolation >= 1.:
+            return entity.location
+        x, y = entity.location
+        previous_x, previous_y = previous
+        i = self.interpolation
+        return (previous_x + (x - previous_x) * i, previous_y + (y - previous_y) * i)
 
     def get_close_entity(self, name, location, e_range=100):
 
-        location = Vector2(*location)
+        return self.nearest(name, location, e_range)
 
-        for entity in self.entities.values():
+    def nearest(self, name, location, max_range=None):
 
-            if entity.name == name:
-                distance = location.get_distance_to(entity.location)
-                if distance < e_range:
-                    return entity
-        return None
+        grid = self.grids.get(name)
+        if grid is None:
+            return None
+        return grid.nearest(location, max_range)
+
+    def k_nearest(self, name, location, k, max_range=None):
+
+        grid = self.grids.get(name)
+        if grid is None:
+            return []
+        return grid.k_nearest(location, k, max_range)
+
+    def all_within(self, name, location, e_range):
+
+        grid = self.grids.get(name)
+        if grid is None:
+            return []
+        return grid.query_radius(location, e_range)
+
+
+class ArrayWorld(World):
+    """A World that keeps the location, destination and speed of every
+    entity in arrays, and moves all the entities at once with numpy.
+
+    Entities work as they do in World; their location and destination are
+    Vector2Views of the arrays, and assigning to them copies the values in.
+    Each entity thinks in turn, then they all move together, so an entity
+    sees the others where they were at the start of the frame rather than
+    where some of them have already moved to.
+
+    """
+
+    def __init__(self, headless=False, rng=None, ai_budget=AI_BUDGET, scent=True):
+
+        if numpy is None:
+            raise ImportError("numpy is required for ArrayWorld")
+        World.__init__(self, headless, rng, ai_budget, scent)
+        self.locations = Vector2Pool()
+        self.destinations = Vector2Pool()
+        self.speeds = array('d')
+        # The entity at each index in the arrays (or None)
+        self.indexed_entities = []
+        # Locations before the last update, for interpolation
+        self.previous_x = None
+        self.previous_y = None
+
+    def add_entity(self, entity):
+
+        location = self.locations.new(entity.location)
+        destination = self.destinations.new(entity.destination)
+        # Both pools hand out (and reuse) indices in the same order
+        index = location.index
+        if index == len(self.speeds):
+            self.speeds.append(entity.speed)
+            self.indexed_entities.append(entity)
+        else:
+            self.speeds[index] = entity.speed
+            self.indexed_entities[index] = entity
+        entity._location = location
+        entity._destination = destination
+        entity.index = index
+        if self.previous_x is not None and index < len(self.previous_x):
+            self.previous_x[index], self.previous_y[index] = location
+
+        World.add_entity(self, entity)
+
+    def remove_entity(self, entity):
+
+        World.remove_entity(self, entity)
+
+        # Give the entity its own vectors again, so it still works if it is
+        # kept after being removed
+        index = entity.index
+        location = entity._location
+        destination = entity._destination
+        entity.index = None
+        entity._location = location.copy()
+        entity._destination = destination.copy()
+        entity._speed = self.speeds[index]
+        self.locations.free(location)
+        self.destinations.free(destination)
+        self.speeds[index] = 0.
+        self.indexed_entities[index] = None
+
+    def move_entities(self, time_passed):
+
+        # The same sums as GameEntity.process, for every entity at once
+        x, y = self.locations.arrays()
+        self.previous_x = x.copy()
+        self.previous_y = y.copy()
+        destination_x, destination_y = self.destinations.arrays()
+        speeds = numpy.frombuffer(self.speeds, dtype=numpy.float64)
+        dx = destination_x - x
+        dy = destination_y - y
+        moving = numpy.flatnonzero((speeds > 0.) & ((dx != 0.) | (dy != 0.)))
+        if not len(moving):
+            return
+        dx = dx[moving]
+        dy = dy[moving]
+        distance_to_destination = numpy.sqrt(dx * dx + dy * dy)
+        travel_distance = numpy.minimum(distance_to_destination, time_passed * speeds[moving])
+        x[moving] += travel_distance * (dx / distance_to_destination)
+        y[moving] += travel_distance * (dy / distance_to_destination)
+
+        indexed_entities = self.indexed_entities
+        for index, new_x, new_y in zip(moving.tolist(), x[moving].tolist(), y[moving].tolist()):
+            entity = indexed_entities[index]
+            self.grids[entity.name].update(entity, (new_x, new_y))
+
+    def get_render_location(self, entity):
+
+        index = entity.index
+        if index is None or self.previous_x is None or index >= len(self.previous_x):
+            return World.get_render_location(self, entity)
+        if self.interpolation >= 1.:
+            return entity.location
+        x, y = entity.location
+        previous_x = float(self.previous_x[index])
+        previous_y = float(self.previous_y[index])
+        i = self.interpolation
+        return (previous_x + (x - previous_x) * i, previous_y + (y - previous_y) * i)
 
 
 class GameEntity(object):
@@ -113,21 +647,86 @@ class GameEntity(object):
         self.world = world
         self.name = name
         self.image = image
-        self.location = Vector2(0, 0)
-        self.destination = Vector2(0, 0)
-        self.speed = 0.
+        # The index of the entity in an ArrayWorld's arrays, or None
+        self.index = None
+        self._location = Vector2(0, 0)
+        self._destination = Vector2(0, 0)
+        self._speed = 0.
+        # The location before the last update, if it has had one
+        self.previous_location = None
 
-        self.brain = StateMachine()
+        self.brain = StateMachine(name)
 
         self.id = 0
+        # The Pool the entity came from, if any
+        self.pool = None
 
-    def render(self, surface):
-        x, y = self.location
+    def reset(self, world, image):
+        # Makes a removed entity like new, for reuse
+        self.world = world
+        self.image = image
+        self.index = None
+        self._location.set(0, 0)
+        self._destination.set(0, 0)
+        self._speed = 0.
+        self.previous_location = None
+        self.id = 0
+
+    def get_location(self):
+        return self._location
+
+    def set_location(self, location):
+        if self.index is None:
+            self._location = location
+        else:
+            self._location.set(*location)
+
+    location = property(get_location, set_location)
+
+    def get_destination(self):
+        return self._destination
+
+    def set_destination(self, destination):
+        if self.index is None:
+            self._destination = destination
+        else:
+            self._destination.set(*destination)
+
+    destination = property(get_destination, set_destination)
+
+    def get_speed(self):
+        if self.index is None:
+            return self._speed
+        return self.world.speeds[self.index]
+
+    def set_speed(self, speed):
+        if self.index is None:
+            self._speed = speed
+        else:
+            self.world.speeds[self.index] = speed
+
+    speed = property(get_speed, set_speed)
+
+    def add_blits(self, blits):
+        # Adds the images to draw to a list, for Surface.blits
+        x, y = self.world.get_render_location(self)
         w, h = self.image.get_size()
-        surface.blit(self.image, (x - w / 2, y - h / 2))
+        blits.append((self.image, (x - w / 2, y - h / 2)))
+
+    def render(self, surface):
+        # Returns the rect drawn over
+        blits = []
+        self.add_blits(blits)
+        rects = surface.blits(blits)
+        return rects[0].unionall(rects[1:])
 
     def process(self, time_passed):
-        self.brain.think()
+        # The brain is run by the world's scheduler. An ArrayWorld moves all
+        # its entities together.
+        if self.index is not None:
+            return
+
+        self.previous_location = self.location.as_tuple()
 
         if self.speed > 0 and self.location != self.destination:
             vec_to_destination = self.destination - self.location
@@ -135,6 +734,7 @@ class GameEntity(object):
             heading = vec_to_destination.get_normalized()
             travel_distance = min(distance_to_destination, time_passed * self.speed)
             self.location += travel_distance * heading
+            self.world.entity_moved(self)
 
 
 class Leaf(GameEntity):
@@ -142,12 +742,34 @@ class Leaf(GameEntity):
         GameEntity.__init__(self, world, "leaf", image)
 
 
+def make_health_bars():
+
+    # An empty and a full health bar
+    empty_bar = pygame.surface.Surface((25, 4))
+    empty_bar.fill((255, 0, 0))
+    full_bar = pygame.surface.Surface((25, 4))
+    full_bar.fill((0, 255, 0))
+    return empty_bar, full_bar
+
+
 class Spider(GameEntity):
+    # Images of the health bar, made when first needed
+    health_bars = None
+
     def __init__(self, world, image):
         GameEntity.__init__(self, world, "spider", image)
+        self.live_image = image
         self.dead_image = pygame.transform.flip(image, 0, 1)
         self.health = 25
-        self.speed = 50 + randint(-20, 20)
+        self.speed = 50 + world.rng.randint(-20, 20)
+
+    def reset(self, world, image):
+        GameEntity.reset(self, world, image)
+        if image is not self.live_image:
+            self.live_image = image
+            self.dead_image = pygame.transform.flip(image, 0, 1)
+        self.health = 25
+        self.speed = 50 + world.rng.randint(-20, 20)
 
     def bitten(self):
 
@@ -157,16 +779,20 @@ class Spider(GameEntity):
             self.image = self.dead_image
         self.speed = 140
 
-    def render(self, surface):
+    def add_blits(self, blits):
 
-        GameEntity.render(self, surface)
+        GameEntity.add_blits(self, blits)
 
-        x, y = self.location
+        # The health bar is drawn with images rather than fill, so it can
+        # go in the same call to blits
+        if Spider.health_bars is None:
+            Spider.health_bars = make_health_bars()
+        empty_bar, full_bar = Spider.health_bars
+        x, y = self.world.get_render_location(self)
         w, h = self.image.get_size()
-        bar_x = x - 12
-        bar_y = y + h / 2
-        surface.fill((255, 0, 0), (bar_x, bar_y, 25, 4))
-        surface.fill((0, 255, 0), (bar_x, bar_y, self.health, 4))
+        bar_position = (x - 12, y + h / 2)
+        blits.append((empty_bar, bar_position))
+        blits.append((full_bar, bar_position, (0, 0, self.health, 4)))
 
     def process(self, time_passed):
 
@@ -194,30 +820,44 @@ class Ant(GameEntity):
         self.brain.add_state(hunting_state)
 
         self.carry_image = None
+        # The name of the entity being carried
+        self.carry_name = None
 
-    def carry(self, image):
+    def carry(self, image, name):
 
         self.carry_image = image
+        self.carry_name = name
 
     def drop(self, surface):
 
-        if self.carry_image:
-            x, y = self.location
-            w, h = self.carry_image.get_size()
-            surface.blit(self.carry_image, (x - w, y - h / 2))
+        if self.carry_name is not None:
+            if surface is not None:
+                x, y = self.location
+                w, h = self.carry_image.get_size()
+                rect = surface.blit(self.carry_image, (x - w, y - h / 2))
+                if surface is self.world.background:
+                    self.world.redraw(rect)
+            if self.carry_name == "leaf":
+                self.world.stats["leaves_delivered"] += 1
+            else:
+                self.world.stats["spiders_delivered"] += 1
             self.carry_image = None
+            self.carry_name = None
 
-    def render(self, surface):
+    def add_blits(self, blits):
 
-        GameEntity.render(self, surface)
+        GameEntity.add_blits(self, blits)
 
         if self.carry_image:
-            x, y = self.location
+            x, y = self.world.get_render_location(self)
             w, h = self.carry_image.get_size()
-            surface.blit(self.carry_image, (x - w, y - h / 2))
+            blits.append((self.carry_image, (x - w, y - h / 2)))
 
 
 class AntStateExploring(State):
+    # Nothing is urgent while exploring
+    think_interval = 4
+
     def __init__(self, ant):
 
         State.__init__(self, "exploring")
@@ -226,11 +866,21 @@ class AntStateExploring(State):
     def random_destination(self):
 
         w, h = SCREEN_SIZE
-        self.ant.destination = Vector2(randint(0, w), randint(0, h))
+        rng = self.ant.world.rng
+        self.ant.destination = Vector2(rng.randint(0, w), rng.randint(0, h))
 
     def do_actions(self):
 
-        if randint(1, 20) == 1:
+        # Head towards the leaves, if they can be smelt from here
+        scent = self.ant.world.scent
+        if scent is not None:
+            uphill = scent.get_uphill(self.ant.location, SCENT_THRESHOLD)
+            if uphill is not None:
+                self.ant.destination = self.ant.location + Vector2(*uphill) * 40.
+                return
+
+        # Otherwise change direction about once every 20 updates
+        if self.ant.world.rng.randint(1, 20 // self.think_interval) == 1:
             self.random_destination()
 
     def check_conditions(self):
@@ -250,7 +900,7 @@ class AntStateExploring(State):
 
     def entry_actions(self):
 
-        self.ant.speed = 120. + randint(-30, 30)
+        self.ant.speed = 120. + self.ant.world.rng.randint(-30, 30)
         self.random_destination()
 
 
@@ -259,27 +909,42 @@ class AntStateSeeking(State):
 
         State.__init__(self, "seeking")
         self.ant = ant
-        self.leaf_id = None
+        self.leaf = None
 
     def check_conditions(self):
 
-        leaf = self.ant.world.get(self.ant.leaf_id)
-        if leaf is None:
-            return "exploring"
-
+        leaf = self.leaf
         if self.ant.location.get_distance_to(leaf.location) < 5:
-            self.ant.carry(leaf.image)
+            self.ant.carry(leaf.image, "leaf")
             self.ant.world.remove_entity(leaf)
             return "delivering"
 
         return None
 
+    def leaf_removed(self, leaf):
+
+        self.ant.brain.transition("exploring")
+
+    def resume(self):
+
+        world = self.ant.world
+        self.leaf = world.get(self.ant.leaf_id)
+        if self.leaf is not None:
+            # Another ant may take the leaf first
+            self.ant.brain.add_subscription(world.subscribe_removed(self.leaf, self.leaf_removed))
+
     def entry_actions(self):
 
-        leaf = self.ant.world.get(self.ant.leaf_id)
-        if leaf is not None:
-            self.ant.destination = leaf.location
-            self.ant.speed = 160 + randint(-20, 20)
+        self.resume()
+        if self.leaf is None:
+            self.ant.brain.transition("exploring")
+            return
+        self.ant.destination = self.leaf.location
+        self.ant.speed = 160 + self.ant.world.rng.randint(-20, 20)
+
+    def exit_actions(self):
+
+        self.leaf = None
 
 
 class AntStateDelivering(State):
@@ -291,7 +956,7 @@ class AntStateDelivering(State):
     def check_conditions(self):
 
         if Vector2(*NEST_POSITION).get_distance_to(self.ant.location) < NEST_SIZE:
-            if (randint(1, 10) == 1):
+            if (self.ant.world.rng.randint(1, 10) == 1):
                 self.ant.drop(self.ant.world.background)
                 return "exploring"
 
@@ -300,7 +965,8 @@ class AntStateDelivering(State):
     def entry_actions(self):
 
         self.ant.speed = 60.
-        random_offset = Vector2(randint(-20, 20), randint(-20, 20))
+        rng = self.ant.world.rng
+        random_offset = Vector2(rng.randint(-20, 20), rng.randint(-20, 20))
         self.ant.destination = Vector2(*NEST_POSITION) + random_offset
 
 
@@ -309,25 +975,23 @@ class AntStateHunting(State):
 
         State.__init__(self, "hunting")
         self.ant = ant
+        self.spider = None
         self.got_kill = False
 
     def do_actions(self):
 
-        spider = self.ant.world.get(self.ant.spider_id)
-
-        if spider is None:
-            return
-
+        spider = self.spider
         self.ant.destination = spider.location
 
         if self.ant.location.get_distance_to(spider.location) < 15:
 
-            if randint(1, 5) == 1:
+            if self.ant.world.rng.randint(1, 5) == 1:
                 spider.bitten()
 
                 if spider.health <= 0:
-                    self.ant.carry(spider.image)
+                    self.ant.carry(spider.image, "spider")
                     self.ant.world.remove_entity(spider)
+                    self.ant.world.stats["spiders_killed"] += 1
                     self.got_kill = True
 
     def check_conditions(self):
@@ -335,44 +999,101 @@ class AntStateHunting(State):
         if self.got_kill:
             return "delivering"
 
-        spider = self.ant.world.get(self.ant.spider_id)
+        return None
 
-        if spider is None:
-            return "exploring"
+    def spider_removed(self, spider):
 
-        if spider.location.get_distance_to(NEST_POSITION) > NEST_SIZE * 3:
-            return "exploring"
+        self.ant.brain.transition("exploring")
 
-        return None
+    def spider_moved(self, event, spider):
+
+        # Give up once the spider is well away from the nest
+        if event == "left" and spider is self.spider:
+            self.ant.brain.transition("exploring")
+
+    def resume(self):
+
+        world = self.ant.world
+        self.spider = world.get(self.ant.spider_id)
+        if self.spider is not None:
+            brain = self.ant.brain
+            brain.add_subscription(world.subscribe_removed(self.spider, self.spider_removed))
+            brain.add_subscription(world.subscribe_radius("spider", NEST_POSITION, NEST_SIZE * 3,
+                                                          self.spider_moved))
 
     def entry_actions(self):
 
-        self.speed = 160 + randint(0, 50)
+        self.resume()
+        if self.spider is None:
+            self.ant.brain.transition("exploring")
+            return
+        self.speed = 160 + self.ant.world.rng.randint(0, 50)
 
     def exit_actions(self):
 
+        self.spider = None
         self.got_kill = False
 
 
-def run():
-    pygame.init()
-    screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+def add_ants(world, ant_image, count=ANT_COUNT):
+
+    w, h = SCREEN_SIZE
+    rng = world.rng
+    for ant_no in range(count):
+        ant = Ant(world, ant_image)
+        ant.location = Vector2(rng.randint(0, w), rng.randint(0, h))
+        ant.brain.set_state("exploring")
+        world.add_entity(ant)
+
 
-    world = World()
+def spawn_entities(world, leaf_image, spider_image):
 
+    # Leaves and spiders turn up at random, once per update
     w, h = SCREEN_SIZE
+    rng = world.rng
+
+    if rng.randint(1, 10) == 1:
+        leaf = world.create(Leaf, leaf_image)
+        leaf.location.set(rng.randint(0, w), rng.randint(0, h))
+        world.add_entity(leaf)
+
+    if rng.randint(1, 100) == 1:
+        spider = world.create(Spider, spider_image)
+        spider.location.set(-50, rng.randint(0, h))
+        spider.destination.set(w + 50, rng.randint(0, h))
+        world.add_entity(spider)
+
+
+def draw_profile(surface, font, profiler, limit=12):
+
+    # The slowest parts of the game so far, over the top of the world.
+    # Returns the rects drawn over.
+    rects = []
+    y = 0
+    for line in profiler.format_stats(limit):
+        text = font.render(line, True, (0, 0, 0), (255, 255, 255))
+        rects.append(surface.blit(text, (0, y)))
+        y += text.get_height()
+    return rects
+
+
+def run(world_class=World):
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+    # P turns profiling on and off, D prints a report of the profile
+    profile_font = pygame.font.SysFont("courier new", 11)
+
+    world = world_class()
 
     clock = pygame.time.Clock()
+    game_clock = GameClock(SIMULATION_RATE)
+    overloaded = False
 
     ant_image = pygame.image.load("ant.png").convert_alpha()
     leaf_image = pygame.image.load("leaf.png").convert_alpha()
     spider_image = pygame.image.load("spider.png").convert_alpha()
 
-    for ant_no in range(ANT_COUNT):
-        ant = Ant(world, ant_image)
-        ant.location = Vector2(randint(0, w), randint(0, h))
-        ant.brain.set_state("exploring")
-        world.add_entity(ant)
+    add_ants(world, ant_image)
 
     while True:
 
@@ -380,24 +1101,34 @@ def run():
             if event.type == QUIT:
                 pygame.quit()
                 quit()
-
-        time_passed = clock.tick(30)
-
-        if randint(1, 10) == 1:
-            leaf = Leaf(world, leaf_image)
-            leaf.location = Vector2(randint(0, w), randint(0, h))
-            world.add_entity(leaf)
-
-        if randint(1, 100) == 1:
-            spider = Spider(world, spider_image)
-            spider.location = Vector2(-50, randint(0, h))
-            spider.destination = Vector2(w + 50, randint(0, h))
-            world.add_entity(spider)
-
-        world.process(time_passed)
-        world.render(screen)
-
-        pygame.display.update()
+            if event.type == KEYDOWN:
+                if event.key == K_p:
+                    world.profiler = Profiler() if world.profiler is None else None
+                elif event.key == K_d and world.profiler is not None:
+                    print(world.profiler.report())
+
+        time_passed = clock.tick(FRAME_RATE)
+
+        for update in range(game_clock.tick(time_passed / 1000.)):
+            spawn_entities(world, leaf_image, spider_image)
+            world.process(game_clock.step * 1000.)
+
+        # Show in the title bar when the simulation can't keep up
+        if game_clock.is_overloaded():
+            pygame.display.set_caption("Ants (%.0f ms behind)" % (game_clock.lag * 1000.))
+            overloaded = True
+        elif overloaded:
+            pygame.display.set_caption("Ants")
+            overloaded = False
+        # Only the parts of the screen that have changed are drawn
+        rects = world.render_dirty(screen, game_clock.interpolation)
+        if world.profiler is not None:
+            for rect in draw_profile(screen, profile_font, world.profiler):
+                # Draw the world under the overlay again next frame
+                world.redraw(rect)
+                rects.append(rect)
+
+        pygame.display.update(rects)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import pygame
 from pygame.locals import *
 from random import randint
+from gameobjects.pool import Pool
 
 
 class Star(object):
@@ -17,6 +18,8 @@ def run():
     # screen = pygame.display.set_mode((640, 480), 0, 32)
 
     stars = []
+    # guarda as estrelas que sairam da tela, para reutiliza-las
+    star_pool = Pool(Star, Star.__init__)
 
     # adiciona algumas estrelas no primeiro frame
     for n in range(200):
@@ -40,7 +43,7 @@ def run():
         # adiciona uma nova estrela
         y = float(randint(0, 479))
         speed = float(randint(10, 300))
-        star = Star(640., y, speed)
+        star = star_pool.acquire(640., y, speed)
         stars.append(star)
         time_passed = clock.tick()
         time_passed_seconds = time_passed / 1000.0
@@ -53,11 +56,15 @@ def run():
             pygame.draw.aaline(screen, white, (new_x, star.y), (star.x+1., star.y))
             star.x = new_x
 
-        def on_screen(star):
-            return star.x > 0
-
-        # remove as estrelas que nao estejam visiveis
-        stars = list(filter(on_screen, stars))
+        # remove as estrelas que nao estejam visiveis, devolvendo-as ao pool
+        visible = 0
+        for star in stars:
+            if star.x > 0:
+                stars[visible] = star
+                visible += 1
+            else:
+                star_pool.release(star)
+        del stars[visible:]
         pygame.display.update()
 
 
@@ -6,23 +6,36 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.raw.GL.VERSION.GL_1_0 import glLoadMatrixd
 
+import numpy
+
 import pygame
 from pygame.locals import *
 
 from gameobjects.matrix44 import *
 from gameobjects.vector3 import *
+from gameobjects.bounds import Frustum
 
 SCREEN_SIZE = (800, 600)
+FOV = 60.0
+NEAR = .1
+FAR = 1000.
+
+# o mapa e dividido em blocos de CHUNK_SIZE x CHUNK_SIZE cubos
+CHUNK_SIZE = 8
 
 
 def resize(width, height):
     glViewport(0, 0, width, height)
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(60.0, float(width)/height, .1, 1000.)
+    gluPerspective(FOV, float(width)/height, NEAR, FAR)
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
+    # a mesma projecao, usada para descartar o que esta fora da tela
+    return Matrix44.perspective_projection_fov(radians(FOV), float(width)/height,
+                                               NEAR, FAR)
+
 
 class Cube(object):
     def __init__(self, position, color):
@@ -77,6 +90,28 @@ class Cube(object):
         glEnd()
 
 
+class Chunk(object):
+    def __init__(self):
+        self.cubes = []
+        self.display_list = None
+
+    def render(self):
+        if self.display_list is None:
+            # cria uma display list
+            self.display_list = glGenLists(1)
+            glNewList(self.display_list, GL_COMPILE)
+
+            # desenha os cubos
+            for cube in self.cubes:
+                cube.render()
+
+            # finaliza a display list
+            glEndList()
+
+        # renderiza a display list
+        glCallList(self.display_list)
+
+
 class Map(object):
     def __init__(self):
         map_surface = pygame.image.load("map.png")
@@ -84,6 +119,7 @@ class Map(object):
 
         w, h = map_surface.get_size()
         self.cubes = []
+        chunks = {}
 
         # cria um cubo para todos os pixels diferentes de branco
         for y in range(h):
@@ -96,31 +132,59 @@ class Map(object):
                     cube = Cube(position, gl_col)
                     self.cubes.append(cube)
 
-        map_surface.unlock()
-        self.display_list = None
+                    # cada cubo pertence a um bloco do mapa
+                    key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+                    if key not in chunks:
+                        chunks[key] = Chunk()
+                    chunks[key].cubes.append(cube)
 
-    def render(self):
-        if self.display_list is None:
-            # cria uma display list
-            self.display_list = glGenLists(1)
-            glNewList(self.display_list, GL_COMPILE)
+        map_surface.unlock()
 
-            # desenha os cubos
-            for cube in self.cubes:
-                cube.render()
+        # caixas (AABBs) que envolvem os cubos de cada bloco, em arrays para
+        # que todos os blocos sejam testados de uma vez
+        self.chunks = list(chunks.values())
+        positions = [[cube.position for cube in chunk.cubes] for chunk in self.chunks]
+        self.chunk_mins = numpy.array([numpy.min(p, axis=0) for p in positions])
+        self.chunk_maxs = numpy.array([numpy.max(p, axis=0) for p in positions]) + 1.0
 
-            # finaliza a display list
-            glEndList()
+    def render(self, frustum=None):
+        if frustum is None:
+            visible = range(len(self.chunks))
         else:
-            # renderiza a display list
-            glCallList(self.display_list)
+            # somente os blocos que aparecem na tela sao desenhados
+            visible = frustum.cull_aabbs(self.chunk_mins, self.chunk_maxs)
+
+        chunks = self.chunks
+        for chunk_no in visible:
+            chunks[chunk_no].render()
+
+
+def update_camera(camera_matrix, rotation_matrix, rotation, movement):
+    """Rotates and moves the camera matrix in place.
+
+    Every result is written in to the existing matrices (with the out
+    parameter), so once the loop is running this allocates nothing. Check
+    it with python -m benchmarks.check_camera_alloc.
+
+    camera_matrix -- The camera Matrix44, updated in place
+    rotation_matrix -- A Matrix44 used as a work buffer for the rotation
+    rotation -- Vector3 with the angles to rotate about x, y and z
+    movement -- Units to move in the 'forward' direction
+
+    """
+
+    # Not x, y, z = rotation, which would copy the vector's values, and not
+    # the Matrix44.xyz_rotation classmethod, which makes a bound method
+    rotation_matrix.make_xyz_rotation(rotation.x, rotation.y, rotation.z)
+    camera_matrix.multiply(rotation_matrix, out=camera_matrix)
+    camera_matrix.move(forward=movement)
 
 
 def run():
     pygame.init()
     screen = pygame.display.set_mode(SCREEN_SIZE, HWSURFACE|OPENGL|DOUBLEBUF)
 
-    resize(*SCREEN_SIZE)
+    projection_matrix = resize(*SCREEN_SIZE)
 
 
     clock = pygame.time.Clock()
@@ -138,6 +202,15 @@ def run():
     movement_direction = Vector3()
     movement_speed = 5.0
 
+    # matrizes e buffers reutilizados a cada frame
+    rotation = Vector3()
+    rotation_matrix = Matrix44()
+    inverse_matrix = Matrix44()
+    # a OpenGL le o memoryview diretamente, sem converter uma lista
+    gl_matrix = inverse_matrix.to_buffer()
+    view_projection = Matrix44()
+    frustum = Frustum()
+
     while True:
         for event in pygame.event.get():
             if event.type == QUIT:
@@ -180,24 +253,22 @@ def run():
         elif pressed[K_a]:
             movement_direction.z = +1.0
 
-        # calcula a matriz de rotacao e multiplica pela matriz da camera
-        rotation = rotation_direction * rotation_speed * time_passed_seconds
-        rotation_matrix = Matrix44.xyz_rotation(*rotation)
-        camera_matrix *= rotation_matrix
-
-        # calcula o movimento e soma à translacao da matriz da camera
-        heading = Vector3(camera_matrix.forward)
-        movement = heading * movement_direction.z * movement_speed
-        camera_matrix.translate += movement * time_passed_seconds
+        # calcula a rotacao e o movimento e atualiza a matriz da camera
+        rotation.set(*rotation_direction)
+        rotation *= rotation_speed * time_passed_seconds
+        movement = movement_direction.z * movement_speed * time_passed_seconds
+        update_camera(camera_matrix, rotation_matrix, rotation, movement)
 
         # carrega a matriz da camera invertida na OpenGL
-        glLoadMatrixd(camera_matrix.get_inverse().to_opengl())
+        camera_matrix.get_inverse(out=inverse_matrix)
+        glLoadMatrixd(inverse_matrix.to_buffer(out=gl_matrix))
 
         # a luz tambem deve ser transformada
         glLight(GL_LIGHT0, GL_POSITION, (0, 1.5, 1, 0))
 
-        # renderiza o mapa
-        map.render()
+        # renderiza o mapa, descartando os blocos fora do campo de visao
+        projection_matrix.multiply(inverse_matrix, out=view_projection)
+        map.render(frustum.set_matrix(view_projection))
 
         # mostra a tela
         pygame.display.flip()
@@ -1,6 +1,7 @@
 import pygame
 from pygame.locals import *
 from gameobjects.vector3 import Vector3
+from gameobjects.vector3array import Vector3Array
 from gameobjects.matrix44 import Matrix44 as Matrix
 from math import *
 from random import randint
@@ -15,6 +16,16 @@ def calculate_viewing_distance(fov, screen_width):
     return d
 
 
+def perspective_matrix(viewing_distance, center_x, center_y):
+    # projeta pontos no espaco da camera em coordenadas da tela
+    # (a divisao por w = -z / viewing_distance e feita por project_array)
+    d = viewing_distance
+    return Matrix((1., 0., 0., 0.),
+                  (0., -1., 0., 0.),
+                  (-center_x / d, -center_y / d, 1., -1. / d),
+                  (0., 0., 0., 0.))
+
+
 def run():
     pygame.init()
     screen = pygame.display.set_mode(SCREEN_SIZE, 0)
@@ -43,13 +54,16 @@ def run():
                     point_z = float(z) - CUBE_SIZE / 2
                     points.append(Vector3(point_x, point_y, point_z))
 
-    def point_z(point):
-        return point[2]
+    points = Vector3Array(points)
 
     center_x, center_y = SCREEN_SIZE
     center_x /= 2
     center_y /= 2
 
+    projection_matrix = perspective_matrix(viewing_distance, center_x, center_y)
+    # buffer reutilizado a cada frame para os pontos transformados
+    transformed_points = Vector3Array.zeros(len(points)).array
+
     ball_w, ball_h = ball.get_size()
     ball_center_x = ball_w / 2
     ball_center_y = ball_h / 2
@@ -110,21 +124,16 @@ def run():
         rotation_matrix *= Matrix.y_rotation(rotation.y)
         rotation_matrix *= Matrix.z_rotation(rotation.z)
 
-        transformed_points = []
-
         # Transforma todos os pontos e ajusta conforme a posição da câmera
-        for point in points:
-            p = rotation_matrix.transform_vec3(point) - camera_position
-            transformed_points.append(p)
+        rotation_matrix.transform_array(points, out=transformed_points)
+        transformed_points -= camera_position.as_tuple()
 
-        transformed_points.sort(key=point_z)
+        visible_points = transformed_points[transformed_points[:, 2] < 0]
+        visible_points = visible_points[visible_points[:, 2].argsort()]
 
         # Faz a projeção de perspectiva e o blit de todos os pontos
-        for x, y, z in transformed_points:
-            if z < 0:
-                x = center_x + x * -viewing_distance / z
-                y = center_y + -y * -viewing_distance / z
-                screen.blit(ball, (x-ball_center_x, y-ball_center_y))
+        for x, y, z in projection_matrix.project_array(visible_points):
+            screen.blit(ball, (x-ball_center_x, y-ball_center_y))
 
         # funacao para desenhar um unico eixo
         def draw_axis(color, axis, label):
@@ -0,0 +1,288 @@
+from math import sqrt
+
+try:
+    import numpy
+except ImportError:
+    # numpy is only needed for the batched Frustum.classify_* methods
+    numpy = None
+
+# Results of testing a volume against a frustum
+OUTSIDE = 0
+INTERSECT = 1
+INSIDE = 2
+
+
+class AABB(object):
+    """An axis aligned bounding box."""
+
+    __slots__ = ('min', 'max')
+
+    def __init__(self, min_point=(0., 0., 0.), max_point=(0., 0., 0.)):
+        """Creates an AABB from two corners.
+
+        min_point -- The corner with the lowest x, y and z
+        max_point -- The corner with the highest x, y and z
+
+        """
+
+        self.min = tuple(map(float, min_point))
+        self.max = tuple(map(float, max_point))
+
+    @classmethod
+    def from_points(cls, points):
+        """Creates the smallest AABB that contains a sequence of points."""
+
+        xs, ys, zs = zip(*points)
+        return cls((min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs)))
+
+    def __repr__(self):
+
+        return "AABB(%r, %r)" % (self.min, self.max)
+
+    def get_centre(self):
+        """Returns the centre of the box as a tuple."""
+
+        (x1, y1, z1), (x2, y2, z2) = self.min, self.max
+        return ((x1 + x2) * .5, (y1 + y2) * .5, (z1 + z2) * .5)
+
+    get_center = get_centre
+
+    def get_extents(self):
+        """Returns half the size of the box on each axis, as a tuple."""
+
+        (x1, y1, z1), (x2, y2, z2) = self.min, self.max
+        return ((x2 - x1) * .5, (y2 - y1) * .5, (z2 - z1) * .5)
+
+    def get_bounding_sphere(self):
+        """Returns a Sphere that contains the box."""
+
+        ex, ey, ez = self.get_extents()
+        return Sphere(self.get_centre(), sqrt(ex * ex + ey * ey + ez * ez))
+
+    def union(self, other):
+        """Returns an AABB that contains this box and another."""
+
+        return AABB(tuple(map(min, self.min, other.min)),
+                    tuple(map(max, self.max, other.max)))
+
+    def contains_point(self, point):
+        """Returns True if a point is inside (or on the surface of) the box."""
+
+        (x1, y1, z1), (x2, y2, z2) = self.min, self.max
+        x, y, z = point
+        return x1 <= x <= x2 and y1 <= y <= y2 and z1 <= z <= z2
+
+    def intersects(self, other):
+        """Returns True if this box overlaps another."""
+
+        (x1, y1, z1), (x2, y2, z2) = self.min, self.max
+        (ox1, oy1, oz1), (ox2, oy2, oz2) = other.min, other.max
+        return x1 <= ox2 and ox1 <= x2 and \
+               y1 <= oy2 and oy1 <= y2 and \
+               z1 <= oz2 and oz1 <= z2
+
+
+class Sphere(object):
+    """A bounding sphere. Works with Vector3.in_sphere."""
+
+    __slots__ = ('position', 'radius')
+
+    def __init__(self, position=(0., 0., 0.), radius=1.):
+        """Creates a sphere.
+
+        position -- The centre of the sphere
+        radius -- The radius of the sphere
+
+        """
+
+        self.position = tuple(map(float, position))
+        self.radius = float(radius)
+
+    @classmethod
+    def from_points(cls, points):
+        """Creates a sphere that contains a sequence of points. The sphere is
+        centred on the middle of their bounding box, so it is not always the
+        smallest possible.
+
+        """
+
+        points = list(points)
+        cx, cy, cz = AABB.from_points(points).get_centre()
+        radius_squared = 0.
+        for x, y, z in points:
+            dx = x - cx
+            dy = y - cy
+            dz = z - cz
+            radius_squared = max(radius_squared, dx * dx + dy * dy + dz * dz)
+        return cls((cx, cy, cz), sqrt(radius_squared))
+
+    def __repr__(self):
+
+        return "Sphere(%r, %r)" % (self.position, self.radius)
+
+    def contains_point(self, point):
+        """Returns True if a point is inside (or on the surface of) the sphere."""
+
+        cx, cy, cz = self.position
+        x, y, z = point
+        dx = x - cx
+        dy = y - cy
+        dz = z - cz
+        return dx * dx + dy * dy + dz * dz <= self.radius * self.radius
+
+
+class Frustum(object):
+    """The volume that can be seen through a projection, as six planes
+    (left, right, bottom, top, near, far) that face inwards.
+
+    The planes are extracted from a Matrix44 that combines the view and
+    projection matrices, i.e. projection * view (a Matrix44 product applies
+    the right hand matrix first). The planes are then in world space.
+    Include a model matrix (projection * view * model) to get planes in the
+    model's space instead.
+
+    """
+
+    __slots__ = ('planes', '_plane_array')
+
+    def __init__(self):
+
+        self.planes = [(0., 0., 0., 0.)] * 6
+        self._plane_array = None
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """Creates a Frustum from a combined view and projection matrix."""
+
+        frustum = cls()
+        frustum.set_matrix(matrix)
+        return frustum
+
+    def set_matrix(self, matrix):
+        """Extracts the planes from a combined view and projection matrix.
+
+        matrix -- A Matrix44
+
+        """
+
+        # Points are transformed as row vectors, so the clip coordinates are
+        # dot products with the columns (see Gribb & Hartmann, "Fast
+        # Extraction of Viewing Frustum Planes from the World-View-Projection
+        # Matrix")
+        c0, c1, c2, c3 = matrix.columns()
+        planes = []
+        for column, sign in ((c0, 1.), (c0, -1.),
+                             (c1, 1.), (c1, -1.),
+                             (c2, 1.), (c2, -1.)):
+            a = c3[0] + column[0] * sign
+            b = c3[1] + column[1] * sign
+            c = c3[2] + column[2] * sign
+            d = c3[3] + column[3] * sign
+            length = sqrt(a * a + b * b + c * c)
+            planes.append((a / length, b / length, c / length, d / length))
+        self.planes = planes
+        self._plane_array = None
+        return self
+
+    def contains_point(self, point):
+        """Returns True if a point is inside the frustum."""
+
+        x, y, z = point
+        for a, b, c, d in self.planes:
+            if a * x + b * y + c * z + d < 0.:
+                return False
+        return True
+
+    def classify_sphere(self, position, radius):
+        """Returns OUTSIDE, INTERSECT or INSIDE for a sphere.
+
+        position -- The centre of the sphere
+        radius -- The radius of the sphere
+
+        """
+
+        x, y, z = position
+        result = INSIDE
+        for a, b, c, d in self.planes:
+            distance = a * x + b * y + c * z + d
+            if distance < -radius:
+                return OUTSIDE
+            if distance < radius:
+                result = INTERSECT
+        return result
+
+    def classify_aabb(self, aabb):
+        """Returns OUTSIDE, INTERSECT or INSIDE for an AABB."""
+
+        cx, cy, cz = aabb.get_centre()
+        ex, ey, ez = aabb.get_extents()
+        result = INSIDE
+        for a, b, c, d in self.planes:
+            distance = a * cx + b * cy + c * cz + d
+            # How far the box reaches towards (or away from) the plane
+            reach = abs(a) * ex + abs(b) * ey + abs(c) * ez
+            if distance < -reach:
+                return OUTSIDE
+            if distance < reach:
+                result = INTERSECT
+        return result
+
+    def _get_plane_array(self):
+        if numpy is None:
+            raise ImportError("numpy is required to classify arrays of volumes")
+        if self._plane_array is None:
+            self._plane_array = numpy.array(self.planes, dtype=numpy.float64)
+        return self._plane_array
+
+    def _classify(self, distances, reach):
+        # Classifies N volumes from N x 6 arrays of distances to the planes
+        # and how far the volumes reach
+        result = numpy.full(len(distances), INTERSECT, dtype=numpy.int8)
+        result[(distances >= reach).all(axis=1)] = INSIDE
+        result[(distances < -reach).any(axis=1)] = OUTSIDE
+        return result
+
+    def classify_spheres(self, positions, radii):
+        """Classifies many spheres at once. Returns an array of OUTSIDE,
+        INTERSECT or INSIDE values. Requires numpy.
+
+        positions -- An N x 3 array of sphere centres (or a Vector3Array)
+        radii -- An array of N radii, or a single radius for all spheres
+
+        """
+
+        planes = self._get_plane_array()
+        positions = numpy.asarray(positions, dtype=numpy.float64)
+        distances = numpy.dot(positions, planes[:, :3].T)
+        distances += planes[:, 3]
+        reach = numpy.asarray(radii, dtype=numpy.float64).reshape(-1, 1)
+        return self._classify(distances, reach)
+
+    def classify_aabbs(self, mins, maxs):
+        """Classifies many AABBs at once. Returns an array of OUTSIDE,
+        INTERSECT or INSIDE values. Requires numpy.
+
+        mins -- An N x 3 array of the minimum corners of the boxes
+        maxs -- An N x 3 array of the maximum corners of the boxes
+
+        """
+
+        planes = self._get_plane_array()
+        mins = numpy.asarray(mins, dtype=numpy.float64)
+        maxs = numpy.asarray(maxs, dtype=numpy.float64)
+        normals = planes[:, :3].T
+        distances = numpy.dot((mins + maxs) * .5, normals)
+        distances += planes[:, 3]
+        reach = numpy.dot((maxs - mins) * .5, numpy.abs(normals))
+        return self._classify(distances, reach)
+
+    def cull_aabbs(self, mins, maxs):
+        """Returns the indices of the AABBs that are at least partly inside
+        the frustum. Requires numpy.
+
+        mins -- An N x 3 array of the minimum corners of the boxes
+        maxs -- An N x 3 array of the maximum corners of the boxes
+
+        """
+
+        return numpy.flatnonzero(self.classify_aabbs(mins, maxs))
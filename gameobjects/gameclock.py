@@ -0,0 +1,107 @@
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+
+class GameClock(object):
+    """Runs a simulation at a fixed rate, however fast frames are rendered.
+
+    Each frame, call tick with the time since the last frame (or without it
+    to use the system clock). It returns the number of fixed size updates
+    to run, which may be 0 when frames are rendered faster than the
+    simulation rate. The time left over is kept for the next frame, and
+    interpolation says how far that is through the next update, so a frame
+    can be drawn between the last two simulated positions:
+
+        updates = game_clock.tick(clock.tick(60) / 1000.)
+        for update in range(updates):
+            # step is in seconds, World.process takes milliseconds
+            world.process(game_clock.step * 1000.)
+        world.render(screen, game_clock.interpolation)
+
+    If the simulation can't keep up, no more than max_updates are run in a
+    frame and the rest of the time is dropped, so the game slows down
+    rather than falling ever further behind. lag and dropped_time report
+    how far behind it is.
+
+    """
+
+    def __init__(self, update_rate=30., max_updates=5):
+        """Creates a GameClock.
+
+        update_rate -- Number of simulation updates per second
+        max_updates -- Most updates to run in one frame
+
+        """
+
+        self.update_rate = float(update_rate)
+        self.step = 1. / self.update_rate
+        self.max_updates = max_updates
+        # Fraction of the way through the next update (0 to 1)
+        self.interpolation = 0.
+        # Real time the simulation was behind at the last tick, in seconds
+        self.lag = 0.
+        # Total time dropped because the simulation couldn't keep up
+        self.dropped_time = 0.
+        # Number of updates run, and frames ticked
+        self.update_count = 0
+        self.frame_count = 0
+        self._accumulator = 0.
+        self._last_time = None
+
+    def tick(self, time_passed=None):
+        """Advances the clock by one frame, and returns the number of
+        simulation updates to run.
+
+        time_passed -- Time since the last frame, in seconds. If None, the
+        time is read from the system clock.
+
+        """
+
+        if time_passed is None:
+            now = perf_counter()
+            if self._last_time is None:
+                time_passed = 0.
+            else:
+                time_passed = now - self._last_time
+            self._last_time = now
+
+        step = self.step
+        accumulator = self._accumulator + time_passed
+        self.lag = accumulator
+        updates = int(accumulator / step)
+        if updates > self.max_updates:
+            dropped_updates = updates - self.max_updates
+            accumulator -= dropped_updates * step
+            self.dropped_time += dropped_updates * step
+            updates = self.max_updates
+        accumulator -= updates * step
+        # Guard against rounding leaving a tiny negative remainder
+        if accumulator < 0.:
+            accumulator = 0.
+        self._accumulator = accumulator
+        self.interpolation = accumulator / step
+
+        self.update_count += updates
+        self.frame_count += 1
+        return updates
+
+    def is_overloaded(self):
+        """Returns True if the last tick had to drop time, because the
+        simulation could not keep up.
+
+        """
+
+        return self.lag >= (self.max_updates + 1) * self.step
+
+    def reset(self):
+        """Discards any time waiting to be simulated, e.g. after loading or
+        when unpausing, so there isn't a burst of updates.
+
+        """
+
+        self._accumulator = 0.
+        self._last_time = None
+        self.interpolation = 0.
+        self.lag = 0.
@@ -0,0 +1,503 @@
+"""Records the input a pygame program reads, frame by frame, and plays it
+back, so a demo can be run again on exactly the same input (to compare
+frame times, for example).
+
+Recording wraps the pygame functions that read input (pygame.event.get,
+pygame.key.get_pressed, pygame.mouse.get_rel and so on) and saves what
+they return on each frame. A frame ends each time a pygame.time.Clock
+ticks, and the time the tick returned is saved with it. Playing back
+replaces the same functions with ones that return the saved values, and
+the clocks with a virtual clock that returns the saved times without
+waiting, so the program sees the same input and the same time passing,
+however fast it actually runs.
+
+The random module is seeded from the recording too, so a program that
+takes its random numbers from it runs the same way.
+
+Some code decides how much work to do by the real time it takes, which the
+virtual clock can't cover: played back more slowly (with profiling on,
+say) it would do something different. A method like that can be counted
+with add_counted, if it returns how much work it did and takes a limit
+argument to do that much instead. What it returns is recorded, and passed
+back as its limit when playing. ThinkScheduler.run, with a time budget,
+is one:
+
+    recorder.add_counted(ThinkScheduler, "run")
+
+Record a demo, then play it back without a window and print the frame
+times:
+
+    python -m gameobjects.inputreplay record keys.json cap6/keymovement.py
+    python -m gameobjects.inputreplay play keys.json cap6/keymovement.py
+
+Methods to count are given with --count, when recording and playing:
+
+    python -m gameobjects.inputreplay record ants.json cap7/antsstatemachine.py \
+        --count gameobjects.scheduler.ThinkScheduler.run
+
+"""
+
+import os
+import sys
+import json
+import inspect
+import random
+import runpy
+from importlib import import_module
+from optparse import OptionParser
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+import pygame
+
+FORMAT_VERSION = 1
+
+# The functions wrapped, as (module, function name)
+INPUT_FUNCTIONS = (
+    (pygame.event, "get"),
+    (pygame.event, "poll"),
+    (pygame.event, "wait"),
+    (pygame.key, "get_pressed"),
+    (pygame.key, "get_mods"),
+    (pygame.mouse, "get_pos"),
+    (pygame.mouse, "get_rel"),
+    (pygame.mouse, "get_pressed"),
+    (pygame.time, "get_ticks"),
+)
+
+SIMPLE_TYPES = (bool, int, float, str, type(None))
+
+# get_pressed returns a ScancodeWrapper (a tuple indexed by key
+# constants) in pygame 2, and a plain tuple before that
+KEY_STATE_CLASS = getattr(pygame.key, "ScancodeWrapper", tuple)
+
+
+class ReplayFinished(Exception):
+    """Raised when a program asks for more frames than were recorded."""
+    pass
+
+
+def _get_key(module, name):
+    return module.__name__.split(".")[-1] + "." + name
+
+
+def _get_counted_key(owner, name):
+    # Counts are saved under the class (or module) name and the method name
+    return owner.__name__.split(".")[-1] + "." + name
+
+
+def _encode_value(value):
+    # Lists and tuples become lists, anything that can't be saved as
+    # JSON (such as the window an event is for) becomes None
+    if isinstance(value, SIMPLE_TYPES):
+        return value
+    if isinstance(value, (tuple, list)):
+        return [_encode_value(item) for item in value]
+    return None
+
+
+def _decode_value(value):
+    if isinstance(value, list):
+        return tuple(_decode_value(item) for item in value)
+    return value
+
+
+def _encode_event(event):
+    return [event.type, dict((name, _encode_value(value))
+                             for name, value in event.dict.items())]
+
+
+def _decode_event(data):
+    event_type, attributes = data
+    return pygame.event.Event(event_type, dict((name, _decode_value(value))
+                                               for name, value in attributes.items()))
+
+
+def encode(key, result):
+    """Converts what an input function returned in to a value that can be
+    saved as JSON.
+
+    """
+
+    if key == "event.get":
+        return [_encode_event(event) for event in result]
+    if key in ("event.poll", "event.wait"):
+        return _encode_event(result)
+    if key == "key.get_pressed":
+        # Just the indices of the keys that are down
+        return [len(result), [index for index, pressed in enumerate(result) if pressed]]
+    return _encode_value(result)
+
+
+def decode(key, value):
+    """The reverse of encode."""
+
+    if key == "event.get":
+        return [_decode_event(data) for data in value]
+    if key in ("event.poll", "event.wait"):
+        return _decode_event(value)
+    if key == "key.get_pressed":
+        key_count, indices = value
+        pressed = [False] * key_count
+        for index in indices:
+            pressed[index] = True
+        return KEY_STATE_CLASS(pressed)
+    return _decode_value(value)
+
+
+class _Replacer(object):
+    # Replaces functions in modules, and puts them back
+
+    def __init__(self):
+        self.originals = []
+
+    def replace(self, module, name, function):
+        self.originals.append((module, name, getattr(module, name)))
+        setattr(module, name, function)
+
+    def restore(self):
+        for module, name, function in reversed(self.originals):
+            setattr(module, name, function)
+        del self.originals[:]
+
+
+class InputRecorder(object):
+    """Records the input read by a pygame program, frame by frame."""
+
+    def __init__(self, seed=None):
+        """Creates an InputRecorder.
+
+        seed -- Seed for the random module, or None to choose one
+
+        """
+
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.seed = seed
+        # (milliseconds, {function key: [values]}) for each frame
+        self.frames = []
+        self._frame = {}
+        self._counted = []
+        self._replacer = _Replacer()
+
+    def add_counted(self, owner, name):
+        """Records what a method returns each time it is called, so it can
+        be played back as the method's limit. Call before install.
+
+        owner -- The class (or module) the method is in
+        name -- Name of the method
+
+        """
+
+        self._counted.append((owner, name))
+
+    def install(self):
+        """Starts recording, and seeds the random module."""
+
+        random.seed(self.seed)
+        for module, name in INPUT_FUNCTIONS:
+            self._replacer.replace(module, name,
+                                   self._make_recorder(_get_key(module, name), getattr(module, name)))
+        for owner, name in self._counted:
+            self._replacer.replace(owner, name,
+                                   self._make_recorder(_get_counted_key(owner, name), getattr(owner, name)))
+        recorder = self
+        Clock = pygame.time.Clock
+
+        class RecordingClock(object):
+            # A Clock that ends a frame on each tick
+
+            def __init__(self):
+                self.clock = Clock()
+
+            def tick(self, framerate=0):
+                return recorder._end_frame(self.clock.tick(framerate))
+
+            def tick_busy_loop(self, framerate=0):
+                return recorder._end_frame(self.clock.tick_busy_loop(framerate))
+
+            def __getattr__(self, name):
+                return getattr(self.clock, name)
+
+        self._replacer.replace(pygame.time, "Clock", RecordingClock)
+
+    def uninstall(self):
+        """Stops recording. The last frame is kept, even if the clock has
+        not ticked since.
+
+        """
+
+        self._replacer.restore()
+        if self._frame:
+            self.frames.append((0, self._frame))
+            self._frame = {}
+
+    def _make_recorder(self, key, function):
+
+        def record(*args, **kwargs):
+            result = function(*args, **kwargs)
+            values = self._frame.get(key)
+            if values is None:
+                values = self._frame[key] = []
+            values.append(encode(key, result))
+            return result
+
+        return record
+
+    def _end_frame(self, time_passed):
+        self.frames.append((time_passed, self._frame))
+        self._frame = {}
+        return time_passed
+
+    def save(self, filename):
+        """Saves the recording as JSON."""
+
+        with open(filename, "w") as replay_file:
+            json.dump({"version": FORMAT_VERSION, "seed": self.seed,
+                       "frames": self.frames}, replay_file, separators=(",", ":"))
+
+
+class InputPlayer(object):
+    """Plays back the input recorded by an InputRecorder, with a virtual
+    clock, and times each frame.
+
+    """
+
+    def __init__(self, frames, seed):
+        """Creates an InputPlayer.
+
+        frames -- The frames from an InputRecorder
+        seed -- The seed the random module had when recording
+
+        """
+
+        self.frames = frames
+        self.seed = seed
+        self.frame_number = 0
+        # Real time taken by each frame, in seconds
+        self.frame_times = []
+        self._calls = {}
+        self._last_values = {}
+        self._frame_start = None
+        self._counted = []
+        self._replacer = _Replacer()
+
+    @classmethod
+    def load(cls, filename):
+        """Loads a recording saved by InputRecorder.save."""
+
+        with open(filename) as replay_file:
+            data = json.load(replay_file)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError("Unsupported recording version %r" % (data.get("version"),))
+        return cls(data["frames"], data["seed"])
+
+    def add_counted(self, owner, name):
+        """Plays back what a method returned when recording, by passing it
+        as the method's limit argument. Call before install.
+
+        owner -- The class (or module) the method is in
+        name -- Name of the method
+
+        """
+
+        self._counted.append((owner, name))
+
+    def install(self):
+        """Starts playing back, and seeds the random module."""
+
+        random.seed(self.seed)
+        for module, name in INPUT_FUNCTIONS:
+            self._replacer.replace(module, name, self._make_player(_get_key(module, name)))
+        for owner, name in self._counted:
+            self._replacer.replace(owner, name,
+                                   self._make_counted_player(_get_counted_key(owner, name), getattr(owner, name)))
+        player = self
+
+        class VirtualClock(object):
+            # A Clock that returns the recorded times, without waiting
+
+            def __init__(self):
+                self.time_passed = 0
+
+            def tick(self, framerate=0):
+                self.time_passed = player._end_frame()
+                return self.time_passed
+
+            tick_busy_loop = tick
+
+            def get_time(self):
+                return self.time_passed
+
+            get_rawtime = get_time
+
+            def get_fps(self):
+                if not self.time_passed:
+                    return 0.
+                return 1000. / self.time_passed
+
+        self._replacer.replace(pygame.time, "Clock", VirtualClock)
+
+    def uninstall(self):
+        """Stops playing back."""
+
+        self._replacer.restore()
+
+    def _get_recorded(self, key):
+        # Returns the next value recorded for a key on this frame, or None
+        # if it was called more often than when recording
+        if self.frame_number >= len(self.frames):
+            raise ReplayFinished()
+        values = self.frames[self.frame_number][1].get(key, ())
+        call_number = self._calls.get(key, 0)
+        self._calls[key] = call_number + 1
+        if call_number < len(values):
+            return values[call_number]
+        return None
+
+    def _make_player(self, key):
+
+        def play(*args, **kwargs):
+            value = self._get_recorded(key)
+            if value is not None:
+                value = decode(key, value)
+                self._last_values[key] = value
+                return value
+            # Called more often than when recording
+            if key == "event.get":
+                return []
+            if key in self._last_values:
+                return self._last_values[key]
+            raise ReplayFinished("No recorded input for pygame.%s" % key)
+
+        return play
+
+    def _make_counted_player(self, key, function):
+        signature = inspect.signature(function)
+
+        def play_counted(*args, **kwargs):
+            # Does as much as when recording. If nothing was recorded, the
+            # method is left to decide
+            arguments = signature.bind(*args, **kwargs)
+            if arguments.arguments.get("limit") is None:
+                arguments.arguments["limit"] = self._get_recorded(key)
+            return function(*arguments.args, **arguments.kwargs)
+
+        return play_counted
+
+    def _end_frame(self):
+        if self.frame_number >= len(self.frames):
+            raise ReplayFinished()
+        time_passed = self.frames[self.frame_number][0]
+        self.frame_number += 1
+        self._calls.clear()
+        # Frames are timed from one tick to the next, so the time the
+        # program takes to start up isn't counted
+        now = perf_counter()
+        if self._frame_start is not None:
+            self.frame_times.append(now - self._frame_start)
+        self._frame_start = now
+        return time_passed
+
+    def report(self):
+        """Returns a summary of the frame times, as a string."""
+
+        times = sorted(self.frame_times)
+        if not times:
+            return "No frames played"
+
+        def percentile(percent):
+            return times[min(len(times) - 1, int(len(times) * percent / 100.))] * 1e3
+
+        total = sum(times)
+        virtual_time = sum(frame[0] for frame in self.frames[1:len(times) + 1]) / 1000.
+        lines = ["%i frames, %.1f s of recorded time played in %.2f s"
+                 % (len(times), virtual_time, total),
+                 "  mean   %8.3f ms" % (total / len(times) * 1e3),
+                 "  median %8.3f ms" % percentile(50),
+                 "  95%%    %8.3f ms" % percentile(95),
+                 "  99%%    %8.3f ms" % percentile(99),
+                 "  worst  %8.3f ms" % (times[-1] * 1e3)]
+        return "\n".join(lines)
+
+
+def run_script(script, hook):
+    """Runs a pygame script as if it were the main program, from its own
+    directory, with a recorder or player installed. Returns when the
+    script exits, or runs out of recorded input.
+
+    """
+
+    script = os.path.abspath(script)
+    script_path = os.path.dirname(script)
+    cwd = os.getcwd()
+    argv = sys.argv[:]
+    os.chdir(script_path)
+    sys.path.insert(0, script_path)
+    sys.argv = [script]
+    hook.install()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except (SystemExit, ReplayFinished):
+        pass
+    finally:
+        hook.uninstall()
+        sys.argv = argv
+        sys.path.remove(script_path)
+        os.chdir(cwd)
+
+
+def import_method(path):
+    """Returns the class (or module) and the name of a method, from its
+    full dotted name, such as gameobjects.scheduler.ThinkScheduler.run.
+
+    """
+
+    owner_path, name = path.rsplit(".", 1)
+    module_name, _, owner_name = owner_path.rpartition(".")
+    try:
+        owner = import_module(owner_path)
+    except ImportError:
+        if not module_name:
+            raise
+        owner = getattr(import_module(module_name), owner_name)
+    if not hasattr(owner, name):
+        raise AttributeError("%s has no attribute %r" % (owner_path, name))
+    return owner, name
+
+
+def run():
+    parser = OptionParser(usage="%prog record|play RECORDING SCRIPT [options]")
+    parser.add_option("-w", "--window", action="store_true", default=False,
+                      help="show the window when playing back")
+    parser.add_option("-c", "--count", action="append", default=[], metavar="METHOD",
+                      help="count what a method does, by its full name "
+                           "(eg. gameobjects.scheduler.ThinkScheduler.run)")
+    options, args = parser.parse_args()
+    if len(args) != 3 or args[0] not in ("record", "play"):
+        parser.error("expected record or play, a recording and a script")
+    command, filename, script = args
+    counted = [import_method(path) for path in options.count]
+
+    if command == "record":
+        recorder = InputRecorder()
+        for owner, name in counted:
+            recorder.add_counted(owner, name)
+        run_script(script, recorder)
+        recorder.save(filename)
+        print("Recorded %i frames" % len(recorder.frames))
+    else:
+        if not options.window:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        player = InputPlayer.load(filename)
+        for owner, name in counted:
+            player.add_counted(owner, name)
+        run_script(script, player)
+        print(player.report())
+
+
+if __name__ == "__main__":
+    run()
@@ -2,7 +2,13 @@ from gameobjects.util import format_number
 from gameobjects.vector3 import Vector3
 
 from math import sin, cos, tan, sqrt, pi, radians
+from array import array
 
+try:
+    import numpy
+except ImportError:
+    # numpy is only needed for the *_array methods
+    numpy = None
 
 # import psyco
 # psyco.full()
@@ -19,6 +25,31 @@ class Matrix44Error(Exception):
         return "%s (%s)" % (self.description, self.code)
 
 
+# The kinds of transform a Matrix44 may contain. Each kind includes all the
+# kinds before it, so the kind of a product is the greater of the two kinds.
+IDENTITY = 0  # No transform
+TRANSLATION = 1  # Translation only
+RIGID = 2  # Rotation and translation
+AFFINE = 3  # Rotation, translation, scale and shear (right column is 0, 0, 0, 1)
+PROJECTIVE = 4  # Anything else
+
+_kind_names = ("identity", "translation", "rigid", "affine", "projective")
+
+
+def _classify(m):
+    # Works out the kind of a list of 16 values. Rotations are not detected,
+    # the values are only taken to be rigid if they come from a rotation
+    if m[3] != 0. or m[7] != 0. or m[11] != 0. or m[15] != 1.:
+        return PROJECTIVE
+    if m[0] != 1. or m[1] != 0. or m[2] != 0. or \
+       m[4] != 0. or m[5] != 1. or m[6] != 0. or \
+       m[8] != 0. or m[9] != 0. or m[10] != 1.:
+        return AFFINE
+    if m[12] != 0. or m[13] != 0. or m[14] != 0.:
+        return TRANSLATION
+    return IDENTITY
+
+
 class Row(tuple):
     """Represents the contents of a row when accessed through a property.
 
@@ -56,12 +87,22 @@ class Row(tuple):
 
 
 class Matrix44(object):
+    """A 4x4 transform matrix.
+
+    The matrix keeps track of the kind of transform it contains (identity,
+    translation, rigid, affine or projective), so that multiplying,
+    inverting and transforming can use the cheapest calculation that gives
+    the correct result. The kind is set by the make_* methods, and updated
+    by multiplies and when values are changed.
+
+    """
+
     _identity = ((1.0, 0.0, 0.0, 0.0),
                  (0.0, 1.0, 0.0, 0.0),
                  (0.0, 0.0, 1.0, 0.0),
                  (0.0, 0.0, 0.0, 1.0))
 
-    __slots__ = ('_m',)
+    __slots__ = ('_m', '_kind')
 
     def __init__(self, *args):
 
@@ -76,11 +117,13 @@ class Matrix44(object):
 
         if not args:
             self._m = [1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1.]
+            self._kind = IDENTITY
             return
 
 
         elif len(args) == 4:
             self._m = [1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1.]
+            self._kind = IDENTITY
 
             row_0, row_1, row_2, row_3 = self._setters
             r1, r2, r3, r4 = args
@@ -89,6 +132,7 @@ class Matrix44(object):
             row_1(self, r2)
             row_2(self, r3)
             row_3(self, r4)
+            self._kind = _classify(self._m)
 
         else:
             raise TypeError("Matrix44.__init__() takes 0, or 4 arguments (%i given)" % len(args))
@@ -108,18 +152,31 @@ class Matrix44(object):
     def _set_row_0(self, values):
         values = tuple(values)[:4]
         self._m[0:len(values)] = list(map(float, values))
+        self._changed_row(0, values)
 
     def _set_row_1(self, values):
         values = tuple(values)[:4]
         self._m[4:4 + len(values)] = list(map(float, values))
+        self._changed_row(1, values)
 
     def _set_row_2(self, values):
         values = tuple(values)[:4]
         self._m[8:8 + len(values)] = list(map(float, values))
+        self._changed_row(2, values)
 
     def _set_row_3(self, values):
         values = tuple(values)[:4]
         self._m[12:12 + len(values)] = list(map(float, values))
+        self._changed_row(3, values)
+
+    def _changed_row(self, row_no, values):
+        # Updates the kind after a row has been set
+        if len(values) == 4 and values[3] != (1. if row_no == 3 else 0.):
+            self._kind = PROJECTIVE
+        else:
+            kind = TRANSLATION if row_no == 3 else AFFINE
+            if self._kind < kind:
+                self._kind = kind
 
     _getters = (_get_row_0, _get_row_1, _get_row_2, _get_row_3)
     _setters = (_set_row_0, _set_row_1, _set_row_2, _set_row_3)
@@ -137,14 +194,58 @@ class Matrix44(object):
     forward = _row2
     translate = _row3
 
-    def to_opengl(self):
+    def _get_kind(self):
+        return self._kind
+
+    kind = property(_get_kind, None, None, "The kind of transform (IDENTITY, "
+                                           "TRANSLATION, RIGID, AFFINE or "
+                                           "PROJECTIVE).")
+
+    def to_opengl(self, out=None):
 
         """Converts the matrix in to a list of values, suitable for using
         with glLoadMatrix*
 
+        out -- Optional list of 16 values to store the result in
+
+        """
+
+        if out is None:
+            return self._m[:]
+        out[0], out[1], out[2], out[3], \
+        out[4], out[5], out[6], out[7], \
+        out[8], out[9], out[10], out[11], \
+        out[12], out[13], out[14], out[15] = self._m
+        return out
+
+    def to_buffer(self, typecode='d', out=None):
+
+        """Packs the matrix in to a contiguous block of floats, and returns
+        a memoryview of it. PyOpenGL can use a memoryview directly, without
+        the conversion it has to do for the list returned by to_opengl.
+
+        typecode -- 'd' for doubles (use with glLoadMatrixd) or 'f' for floats
+        (use with glLoadMatrixf)
+        out -- Optional memoryview (or array) of 16 values, of the same
+        typecode, to store the result in, such as a previous return value of
+        to_buffer
+
         """
 
-        return self._m[:]
+        if out is None:
+            return memoryview(array(typecode, self._m))
+        # Written a value at a time, as unpacking the values in to a call
+        # would make a new list each time
+        out[0], out[1], out[2], out[3], \
+        out[4], out[5], out[6], out[7], \
+        out[8], out[9], out[10], out[11], \
+        out[12], out[13], out[14], out[15] = self._m
+        return out
+
+    def __buffer__(self, flags):
+        # Python 3.12+ buffer protocol, so memoryview(matrix) works. The view
+        # is of a copy of the values, as doubles
+        return memoryview(array('d', self._m))
 
     def set(self, row1, row2, row3, row4):
 
@@ -188,6 +289,7 @@ class Matrix44(object):
         m._m = list(map(float, iterable))
         if len(m._m) != 16:
             raise ValueError("Iterable must have 16 values")
+        m._kind = _classify(m._m)
         return m
 
     @classmethod
@@ -196,6 +298,7 @@ class Matrix44(object):
 
         m = cls.__new__(cls, object)
         m._m = copy_Matrix44._m[:]
+        m._kind = copy_Matrix44._kind
         return m
 
     @classmethod
@@ -208,100 +311,128 @@ class Matrix44(object):
 
         m = cls.__new__(cls, object)
         m._m = [0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., ]
+        m._kind = PROJECTIVE
         return m
 
     @classmethod
-    def identity(cls):
-        """Creates and identity Matrix44."""
+    def identity(cls, out=None):
+        """Creates and identity Matrix44.
 
-        m = cls.__new__(cls, object)
-        m._m = [1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1.]
-        return m
+        out -- Optional Matrix44 to store the result in
+
+        """
+
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_identity()
 
     @classmethod
-    def scale(cls, scale_x, scale_y=None, scale_z=None):
+    def scale(cls, scale_x, scale_y=None, scale_z=None, out=None):
         """Creates a scale Matrix44.
         If one parameter is given the scale is uniform,
         if three parameters are give the scale is different (potentialy) on each x axis.
 
+        out -- Optional Matrix44 to store the result in
+
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_scale(scale_x, scale_y, scale_z)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_scale(scale_x, scale_y, scale_z)
 
     @classmethod
-    def translation(cls, x, y, z):
+    def translation(cls, x, y, z, out=None):
         """Creates a translation Matrix44 to (x, y, z).
 
         x -- X Coordinate
         y -- Y Coordinate
         z -- Z Coordinate
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_translation(x, y, z)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_translation(x, y, z)
 
     @classmethod
-    def x_rotation(cls, angle):
+    def x_rotation(cls, angle, out=None):
         """Creates a Matrix44 that does a rotation about the x axis.
 
         angle -- Angle of rotation (in radians)
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_x_rotation(angle)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_x_rotation(angle)
 
     @classmethod
-    def y_rotation(cls, angle):
+    def y_rotation(cls, angle, out=None):
         """Creates a Matrix44 that does a rotation about the y axis.
 
         angle -- Angle of rotation (in radians)
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_y_rotation(angle)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_y_rotation(angle)
 
     @classmethod
-    def z_rotation(cls, angle):
+    def z_rotation(cls, angle, out=None):
         """Creates a Matrix44 that does a rotation about the z axis.
 
         angle -- Angle of rotation (in radians)
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_z_rotation(angle)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_z_rotation(angle)
 
     @classmethod
-    def rotation_about_axis(cls, axis, angle):
+    def rotation_about_axis(cls, axis, angle, out=None):
         """Creates a Matrix44 that does a rotation about an axis.
 
         axis -- A vector of the axis
         angle -- Angle of rotation
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_rotation_about_axis(axis, angle)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_rotation_about_axis(axis, angle)
 
     @classmethod
-    def xyz_rotation(cls, angle_x, angle_y, angle_z):
+    def xyz_rotation(cls, angle_x, angle_y, angle_z, out=None):
         """Creates a Matrix44 that does a rotation about each axis.
 
         angle_x -- Angle of rotation, about x
         angle_y -- Angle of rotation, about y
         angle_z -- Angle of rotation, about z
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_xyz_rotation(angle_x, angle_y, angle_z)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_xyz_rotation(angle_x, angle_y, angle_z)
 
     @classmethod
-    def perspective_projection(cls, left, right, top, bottom, near, far):
+    def perspective_projection(cls, left, right, top, bottom, near, far, out=None):
         """Creates a Matrix44 that projects points in to 2d space.
 
         left -- Coordinate of left of screen
@@ -310,30 +441,36 @@ class Matrix44(object):
         bottom -- Coordination of the borrom of the screen
         near -- Coordination of the near clipping plane
         far -- Coordinate of the far clipping plane
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_perspective_projection(left,
-                                             right,
-                                             top,
-                                             bottom,
-                                             near,
-                                             far)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_perspective_projection(left,
+                                               right,
+                                               top,
+                                               bottom,
+                                               near,
+                                               far)
 
     @classmethod
-    def perspective_projection_fov(cls, fov, aspect, near, far):
+    def perspective_projection_fov(cls, fov, aspect, near, far, out=None):
         """Creates a Matrix44 that projects points in to 2d space
 
         fov -- The field of view (in radians)
         aspect -- The aspect ratio of the screen (width / height)
         near -- Coordinate of the near clipping plane
         far -- Coordinate of the far clipping plane
+        out -- Optional Matrix44 to store the result in
 
         """
 
-        m = cls.__new__(cls, object)
-        return m.make_perspective_projection_fov(fov, aspect, near, far)
+        if out is None:
+            out = cls.__new__(cls, object)
+            out._m = None
+        return out.make_perspective_projection_fov(fov, aspect, near, far)
 
     def __str__(self):
         """'Pretty' formatting of the Matrix44."""
@@ -395,6 +532,13 @@ class Matrix44(object):
             raise IndexError("Row and Column should be 0, 1, 2 or 3")
         except TypeError:
             raise TypeError("Must be a number")
+        if col == 3:
+            if value != (1. if row == 3 else 0.):
+                self._kind = PROJECTIVE
+        else:
+            kind = TRANSLATION if row == 3 else AFFINE
+            if self._kind < kind:
+                self._kind = kind
 
     def __getitem__(self, coord):
         """Gets an individual element in the Matrix44.
@@ -423,10 +567,74 @@ class Matrix44(object):
 
         return self.get_inverse()
 
+    def _store(self, m, kind):
+        # Stores the 16 values of m in this matrix. They are written in to
+        # the existing list one at a time, which allocates nothing (unlike
+        # a slice assignment or a new list)
+        values = self._m
+        if values is None:
+            self._m = list(m)
+        else:
+            values[0], values[1], values[2], values[3], \
+            values[4], values[5], values[6], values[7], \
+            values[8], values[9], values[10], values[11], \
+            values[12], values[13], values[14], values[15] = m
+        self._kind = kind
+        return self
+
+    def _output(self, m, kind, out):
+        # Stores the 16 values of m in out (a new Matrix44 if it is None).
+        # The same as out._store, written out here to save a call
+        if out is None:
+            out = self.__new__(self.__class__, object)
+            out._m = list(m)
+        else:
+            values = out._m
+            values[0], values[1], values[2], values[3], \
+            values[4], values[5], values[6], values[7], \
+            values[8], values[9], values[10], values[11], \
+            values[12], values[13], values[14], values[15] = m
+        out._kind = kind
+        return out
+
     def __mul__(self, rhs):
         """Returns the result of multiplying this Matrix44 by another, called
         by the * (multiply) operator."""
 
+        return self.multiply(rhs)
+
+    def multiply(self, rhs, out=None):
+        """Returns the result of multiplying this Matrix44 by another, same
+        as the * operator.
+
+        rhs -- A Matrix44
+        out -- Optional Matrix44 to store the result in, may be self or rhs
+
+        """
+
+        kind1 = self._kind
+        kind2 = rhs._kind
+        kind = kind1 if kind1 > kind2 else kind2
+
+        if kind1 == IDENTITY:
+            return self._output(rhs._m, kind2, out)
+        if kind2 == IDENTITY:
+            return self._output(self._m, kind1, out)
+
+        if kind == TRANSLATION:
+            m1 = self._m
+            m2 = rhs._m
+            return self._output((1., 0., 0., 0.,
+                                 0., 1., 0., 0.,
+                                 0., 0., 1., 0.,
+                                 m1[12] + m2[12], m1[13] + m2[13], m1[14] + m2[14], 1.),
+                                TRANSLATION, out)
+
+        if kind != PROJECTIVE:
+            # Both right columns are (0, 0, 0, 1), so a quarter of the
+            # multiplies can be skipped
+            return self._output(self._affine_product(rhs), kind, out)
+
         m1_0, m1_1, m1_2, m1_3, \
         m1_4, m1_5, m1_6, m1_7, \
         m1_8, m1_9, m1_10, m1_11, \
@@ -437,7 +645,7 @@ class Matrix44(object):
         m2_8, m2_9, m2_10, m2_11, \
         m2_12, m2_13, m2_14, m2_15 = rhs._m
 
-        retm = [m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8 + m2_3 * m1_12,
+        retm = (m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8 + m2_3 * m1_12,
                 m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9 + m2_3 * m1_13,
                 m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10 + m2_3 * m1_14,
                 m2_0 * m1_3 + m2_1 * m1_7 + m2_2 * m1_11 + m2_3 * m1_15,
@@ -455,17 +663,13 @@ class Matrix44(object):
                 m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m2_15 * m1_12,
                 m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m2_15 * m1_13,
                 m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m2_15 * m1_14,
-                m2_12 * m1_3 + m2_13 * m1_7 + m2_14 * m1_11 + m2_15 * m1_15]
-
-        ret = self.__new__(self.__class__, object)
-        ret._m = retm
-
-        return ret
-
-    def __imul__(self, rhs):
+                m2_12 * m1_3 + m2_13 * m1_7 + m2_14 * m1_11 + m2_15 * m1_15)
 
-        """Multiplies this Matrix44 by another, called by the *= operator."""
+        return self._output(retm, PROJECTIVE, out)
 
+    def _affine_product(self, rhs):
+        # The values of the product of two matrices with right columns of
+        # (0, 0, 0, 1)
         m1_0, m1_1, m1_2, m1_3, \
         m1_4, m1_5, m1_6, m1_7, \
         m1_8, m1_9, m1_10, m1_11, \
@@ -476,39 +680,50 @@ class Matrix44(object):
         m2_8, m2_9, m2_10, m2_11, \
         m2_12, m2_13, m2_14, m2_15 = rhs._m
 
-        self._m = [m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8 + m2_3 * m1_12,
-                   m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9 + m2_3 * m1_13,
-                   m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10 + m2_3 * m1_14,
-                   m2_0 * m1_3 + m2_1 * m1_7 + m2_2 * m1_11 + m2_3 * m1_15,
+        return (m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8,
+                m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9,
+                m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10,
+                0.0,
 
-                   m2_4 * m1_0 + m2_5 * m1_4 + m2_6 * m1_8 + m2_7 * m1_12,
-                   m2_4 * m1_1 + m2_5 * m1_5 + m2_6 * m1_9 + m2_7 * m1_13,
-                   m2_4 * m1_2 + m2_5 * m1_6 + m2_6 * m1_10 + m2_7 * m1_14,
-                   m2_4 * m1_3 + m2_5 * m1_7 + m2_6 * m1_11 + m2_7 * m1_15,
+                m2_4 * m1_0 + m2_5 * m1_4 + m2_6 * m1_8,
+                m2_4 * m1_1 + m2_5 * m1_5 + m2_6 * m1_9,
+                m2_4 * m1_2 + m2_5 * m1_6 + m2_6 * m1_10,
+                0.0,
 
-                   m2_8 * m1_0 + m2_9 * m1_4 + m2_10 * m1_8 + m2_11 * m1_12,
-                   m2_8 * m1_1 + m2_9 * m1_5 + m2_10 * m1_9 + m2_11 * m1_13,
-                   m2_8 * m1_2 + m2_9 * m1_6 + m2_10 * m1_10 + m2_11 * m1_14,
-                   m2_8 * m1_3 + m2_9 * m1_7 + m2_10 * m1_11 + m2_11 * m1_15,
+                m2_8 * m1_0 + m2_9 * m1_4 + m2_10 * m1_8,
+                m2_8 * m1_1 + m2_9 * m1_5 + m2_10 * m1_9,
+                m2_8 * m1_2 + m2_9 * m1_6 + m2_10 * m1_10,
+                0.0,
 
-                   m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m2_15 * m1_12,
-                   m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m2_15 * m1_13,
-                   m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m2_15 * m1_14,
-                   m2_12 * m1_3 + m2_13 * m1_7 + m2_14 * m1_11 + m2_15 * m1_15]
+                m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m1_12,
+                m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m1_13,
+                m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m1_14,
+                1.0)
 
-        return self
+    def __imul__(self, rhs):
+
+        """Multiplies this Matrix44 by another, called by the *= operator."""
+
+        return self.multiply(rhs, self)
 
     def fast_mul(self, rhs):
 
         """Multiplies this matrix by another. Assumes that both matrices have
         a right column of (0, 0, 0, 1). This is true for matrices composed
-        of rotations, translations and scales. fast_mul is approximately 25%
-        quicker than the *= operator.
+        of rotations, translations and scales. The *= operator now does the
+        same when it knows the matrices are affine, so fast_mul is only
+        needed for matrices whose values were set directly.
 
         rhs -- A matrix
 
         """
 
+        kind = rhs._kind
+        if kind > self._kind:
+            self._kind = kind if kind < AFFINE else AFFINE
+
+        # The same values as _affine_product, written out here to save a
+        # call, as this is used in tight loops
         m1_0, m1_1, m1_2, m1_3, \
         m1_4, m1_5, m1_6, m1_7, \
         m1_8, m1_9, m1_10, m1_11, \
@@ -646,6 +861,10 @@ class Matrix44(object):
 
         except IndexError:
             raise IndexError("Column should be 0, 1, 2 or 3")
+        if col_no == 3:
+            self._kind = _classify(m)
+        elif self._kind < AFFINE:
+            self._kind = AFFINE
 
     def transform_vec3(self, v):
         """Transforms a vector and returns the result as a Vector3.
@@ -669,9 +888,12 @@ class Matrix44(object):
 
         m = self._m
         x, y, z = v
-        return (x * m[0] + y * m[4] + z * m[8] + m[12],
-                x * m[1] + y * m[5] + z * m[9] + m[13],
-                x * m[2] + y * m[6] + z * m[10] + m[14])
+        if self._kind > TRANSLATION:
+            return (x * m[0] + y * m[4] + z * m[8] + m[12],
+                    x * m[1] + y * m[5] + z * m[9] + m[13],
+                    x * m[2] + y * m[6] + z * m[10] + m[14])
+        # Identity or translation only, so there is nothing to multiply
+        return (x + m[12], y + m[13], z + m[14])
 
     def transform4(self, v):
         """Transforms a 4d vector and returns the result as a tuple.
@@ -767,6 +989,52 @@ class Matrix44(object):
                    x * m_1 + y * m_5 + z * m_9 + w * m_13,
                    x * m_2 + y * m_6 + z * m_10 + w * m_14)
 
+    def _get_array_matrix(self, points):
+
+        if numpy is None:
+            raise ImportError("numpy is required to transform arrays")
+        points = numpy.asarray(points)
+        if points.dtype.kind != 'f':
+            points = points.astype(numpy.float64)
+        return points, numpy.array(self._m, dtype=points.dtype).reshape(4, 4)
+
+    def transform_array(self, points, out=None):
+        """Transforms an array of points in a single vectorized step, and
+        returns the result as an array of the same shape.
+
+        points -- An N x 3 array of points (or a Vector3Array), or an N x 4
+        array of homogeneous points
+        out -- An optional array to write the result in to, must have the
+        same shape as points
+
+        """
+
+        points, m = self._get_array_matrix(points)
+        size = points.shape[-1]
+        if size == 3:
+            out = numpy.matmul(points, m[:3, :3], out=out)
+            out += m[3, :3]
+            return out
+        elif size == 4:
+            return numpy.matmul(points, m, out=out)
+        raise ValueError("Points must have 3 or 4 components")
+
+    def project_array(self, points, out=None):
+        """Transforms an N x 3 array of points, and divides the result by
+        the w component (a perspective divide). Returns an N x 3 array.
+
+        points -- An N x 3 array of points (or a Vector3Array)
+        out -- An optional N x 3 array to write the result in to
+
+        """
+
+        points, m = self._get_array_matrix(points)
+        if points.shape[-1] != 3:
+            raise ValueError("Points must have 3 components")
+        transformed = numpy.matmul(points, m[:3])
+        transformed += m[3]
+        return numpy.divide(transformed[:, :3], transformed[:, 3:], out=out)
+
     def rotate_vec3(self, v):
         """Rotates a Vector3 and returns the result.
         The translation part of the Matrix44 is ignored.
@@ -809,16 +1077,16 @@ class Matrix44(object):
     def make_identity(self):
         """Makes an identity Matrix44."""
 
-        self._m = [1., 0., 0., 0.,
-                   0., 1., 0., 0.,
-                   0., 0., 1., 0.,
-                   0., 0., 0., 1.]
+        self._store((1., 0., 0., 0.,
+                     0., 1., 0., 0.,
+                     0., 0., 1., 0.,
+                     0., 0., 0., 1.), IDENTITY)
         return self
 
     def make_copy(self, other):
         """Makes a copy of another Matrix44."""
 
-        self._m = other._m[:]
+        self._store(other._m, other._kind)
         return self
 
     def make_scale(self, scale_x, scale_y=None, scale_z=None):
@@ -832,19 +1100,19 @@ class Matrix44(object):
         if scale_z is None:
             scale_z = scale_x
 
-        self._m = [float(scale_x), 0., 0., 0.,
-                   0., float(scale_y), 0., 0.,
-                   0., 0., float(scale_z), 0.,
-                   0., 0., 0., 1.]
+        self._store((float(scale_x), 0., 0., 0.,
+                     0., float(scale_y), 0., 0.,
+                     0., 0., float(scale_z), 0.,
+                     0., 0., 0., 1.), AFFINE)
         return self
 
     def make_translation(self, x, y, z):
         """Makes a translation Matrix44."""
 
-        self._m = [1., 0., 0., 0.,
-                   0., 1., 0., 0.,
-                   0., 0., 1., 0.,
-                   float(x), float(y), float(z), 1.]
+        self._store((1., 0., 0., 0.,
+                     0., 1., 0., 0.,
+                     0., 0., 1., 0.,
+                     float(x), float(y), float(z), 1.), TRANSLATION)
         return self
 
     def make_x_rotation(self, angle):
@@ -853,10 +1121,10 @@ class Matrix44(object):
         cos_a = cos(angle)
         sin_a = sin(angle)
 
-        self._m = [1., 0., 0., 0.,
-                   0., cos_a, sin_a, 0.,
-                   0., -sin_a, cos_a, 0.,
-                   0., 0., 0., 1.]
+        self._store((1., 0., 0., 0.,
+                     0., cos_a, sin_a, 0.,
+                     0., -sin_a, cos_a, 0.,
+                     0., 0., 0., 1.), RIGID)
         return self
 
     def make_y_rotation(self, angle):
@@ -865,10 +1133,10 @@ class Matrix44(object):
         cos_a = cos(angle)
         sin_a = sin(angle)
 
-        self._m = [cos_a, 0., -sin_a, 0.,
-                   0., 1., 0., 0.,
-                   sin_a, 0., cos_a, 0.,
-                   0., 0., 0., 1.]
+        self._store((cos_a, 0., -sin_a, 0.,
+                     0., 1., 0., 0.,
+                     sin_a, 0., cos_a, 0.,
+                     0., 0., 0., 1.), RIGID)
         return self
 
     def make_z_rotation(self, angle):
@@ -877,10 +1145,10 @@ class Matrix44(object):
         cos_a = cos(angle)
         sin_a = sin(angle)
 
-        self._m = [cos_a, sin_a, 0., 0.,
-                   -sin_a, cos_a, 0., 0.,
-                   0., 0., 1., 0.,
-                   0., 0., 0., 1.]
+        self._store((cos_a, sin_a, 0., 0.,
+                     -sin_a, cos_a, 0., 0.,
+                     0., 0., 1., 0.,
+                     0., 0., 0., 1.), RIGID)
         return self
 
     def make_rotation_about_axis(self, axis, angle):
@@ -896,10 +1164,15 @@ class Matrix44(object):
         omc = 1. - c
         x, y, z = axis
 
-        self._m = [x * x * omc + c, y * x * omc + z * s, x * z * omc - y * s, 0.,
-                   x * y * omc - z * s, y * y * omc + c, y * z * omc + x * s, 0.,
-                   x * z * omc + y * s, y * z * omc - x * s, z * z * omc + c, 0.,
-                   0., 0., 0., 1.]
+        # It is only a pure rotation if the axis is unit length
+        if abs(x * x + y * y + z * z - 1.) < 1e-9:
+            kind = RIGID
+        else:
+            kind = AFFINE
+        self._store((x * x * omc + c, y * x * omc + z * s, x * z * omc - y * s, 0.,
+                     x * y * omc - z * s, y * y * omc + c, y * z * omc + x * s, 0.,
+                     x * z * omc + y * s, y * z * omc - x * s, z * z * omc + c, 0.,
+                     0., 0., 0., 1.), kind)
         return self
 
     def make_xyz_rotation(self, angle_x, angle_y, angle_z):
@@ -928,11 +1201,10 @@ class Matrix44(object):
         #     | -ADE+BF   ADF+BE   AC  0 |
         #     |  0        0        0   1 |
 
-        self._m = [cy * cz, sxsy * cz + cx * sz, -cxsy * cz + sx * sz, 0.,
-                   -cy * sz, -sxsy * sz + cx * cz, cxsy * sz + sx * cz, 0.,
-                   sy, -sx * cy, cx * cy, 0.,
-                   0., 0., 0., 1.]
-
+        self._store((cy * cz, sxsy * cz + cx * sz, -cxsy * cz + sx * sz, 0.,
+                     -cy * sz, -sxsy * sz + cx * cz, cxsy * sz + sx * cz, 0.,
+                     sy, -sx * cy, cx * cy, 0.,
+                     0., 0., 0., 1.), RIGID)
         return self
 
     def make_perspective_projection(self, left, right, top, bottom, near, far):
@@ -947,11 +1219,11 @@ class Matrix44(object):
 
         """
 
-        self._m = [(2. * near) / (right - left), 0., 0., 0.,
-                   0., (2. * near) / (top - bottom), 0., 0.,
-                   (right + left) / (right - left), (top + bottom) / (top - bottom), -((far + near) / (far - near)),
-                   -1.,
-                   0., 0., -((2. * far * near) / (far - near)), 0.]
+        self._store(((2. * near) / (right - left), 0., 0., 0.,
+                     0., (2. * near) / (top - bottom), 0., 0.,
+                     (right + left) / (right - left), (top + bottom) / (top - bottom), -((far + near) / (far - near)),
+                     -1.,
+                     0., 0., -((2. * far * near) / (far - near)), 0.), PROJECTIVE)
         return self
 
     def make_perspective_projection_fov(self, fov, aspect, near, far):
@@ -983,73 +1255,81 @@ class Matrix44(object):
     def transpose(self):
         """Swaps the rows for columns."""
 
-        m00, m01, m02, m03, \
-        m10, m11, m12, m13, \
-        m20, m21, m22, m23, \
-        m30, m31, m32, m33 = self._m
+        self.get_transpose(out=self)
 
-        self._m = [m00, m10, m20, m30,
-                   m01, m11, m21, m31,
-                   m02, m12, m22, m32,
-                   m03, m13, m23, m33]
+    def _transposed_kind(self, m):
+        # Returns the kind of the transposed values m. A transposed rotation
+        # is still a rotation, but a transposed translation is a projection
+        kind = self._kind
+        if kind != PROJECTIVE and m[3] == 0. and m[7] == 0. and m[11] == 0.:
+            return kind
+        return _classify(m)
 
-    def get_transpose(self):
+    def get_transpose(self, out=None):
         """Returns a Matrix44 that is a copy of this, but with rows and
-        columns swapped."""
+        columns swapped.
+
+        out -- Optional Matrix44 to store the result in, may be self
+
+        """
 
         m00, m01, m02, m03, \
         m10, m11, m12, m13, \
         m20, m21, m22, m23, \
         m30, m31, m32, m33 = self._m
 
-        ret = self.__new__(self.__class__, object)
-
-        ret._m = [m00, m10, m20, m30,
-                  m01, m11, m21, m31,
-                  m02, m12, m22, m32,
-                  m03, m13, m23, m33]
-
-        return ret
+        m = (m00, m10, m20, m30,
+             m01, m11, m21, m31,
+             m02, m12, m22, m32,
+             m03, m13, m23, m33)
+        return self._output(m, self._transposed_kind(m), out)
 
-    def get_inverse_rot_trans(self):
+    def get_inverse_rot_trans(self, out=None):
         """Returns the inverse of a Matrix44 with only rotation and
-        translation. This is faster than the general get_inverse method."""
+        translation. This is faster than the general get_inverse method.
 
-        ret = self.copy()
-        m = ret._m
+        out -- Optional Matrix44 to store the result in, may be self
+
+        """
 
         i0, i1, i2, i3, \
         i4, i5, i6, i7, \
         i8, i9, i10, i11, \
         i12, i13, i14, i15 = self._m
 
-        m[1] = i4
-        m[4] = i1
-        m[2] = i8
-        m[8] = i2
-        m[6] = i9
-        m[9] = i6
-
-        m[12] = (m[0] * -i12 +
-                 m[4] * -i13 +
-                 m[8] * -i14)
+        return self._output((i0, i4, i8, i3,
+                             i1, i5, i9, i7,
+                             i2, i6, i10, i11,
+                             -(i0 * i12 + i1 * i13 + i2 * i14),
+                             -(i4 * i12 + i5 * i13 + i6 * i14),
+                             -(i8 * i12 + i9 * i13 + i10 * i14),
+                             i15), self._kind, out)
 
-        m[13] = (m[1] * -i12 +
-                 m[5] * -i13 +
-                 m[9] * -i14)
+    def get_inverse(self, out=None):
 
-        m[14] = (m[2] * -i12 +
-                 m[6] * -i13 +
-                 m[10] * -i14)
+        """Returns the inverse (matrix with the opposite effect) of this
+        matrix. The calculation used depends on the kind of the matrix, so
+        inverting a rotation and translation is as quick as calling
+        get_inverse_rot_trans.
 
-        return ret
+        out -- Optional Matrix44 to store the result in, may be self
 
-    def get_inverse(self):
+        """
 
-        """Returns the inverse (matrix with the opposite effect) of this
-        matrix."""
+        kind = self._kind
+        if kind == RIGID:
+            return self.get_inverse_rot_trans(out)
+        elif kind == TRANSLATION:
+            m = self._m
+            return self._output((1., 0., 0., 0.,
+                                 0., 1., 0., 0.,
+                                 0., 0., 1., 0.,
+                                 -m[12], -m[13], -m[14], 1.), TRANSLATION, out)
+        elif kind == IDENTITY:
+            return self._output(self._m, IDENTITY, out)
+        elif kind == PROJECTIVE:
+            return self._get_projective_inverse(out)
 
-        ret = self.__new__(self.__class__, object)
         i = self._m
 
         i0, i1, i2, i3, \
@@ -1057,59 +1337,122 @@ class Matrix44(object):
         i8, i9, i10, i11, \
         i12, i13, i14, i15 = i
 
-        negpos = [0., 0.]
+        # Sum the positive and negative terms of the determinant apart
+        pos = neg = 0.
         temp = i0 * i5 * i10
-        negpos[temp > 0.] += temp
+        if temp > 0.:
+            pos += temp
+        else:
+            neg += temp
 
         temp = i1 * i6 * i8
-        negpos[temp > 0.] += temp
+        if temp > 0.:
+            pos += temp
+        else:
+            neg += temp
 
         temp = i2 * i4 * i9
-        negpos[temp > 0.] += temp
+        if temp > 0.:
+            pos += temp
+        else:
+            neg += temp
 
         temp = -i2 * i5 * i8
-        negpos[temp > 0.] += temp
+        if temp > 0.:
+            pos += temp
+        else:
+            neg += temp
 
         temp = -i1 * i4 * i10
-        negpos[temp > 0.] += temp
+        if temp > 0.:
+            pos += temp
+        else:
+            neg += temp
 
         temp = -i0 * i6 * i9
-        negpos[temp > 0.] += temp
+        if temp > 0.:
+            pos += temp
+        else:
+            neg += temp
 
-        det_1 = negpos[0] + negpos[1]
+        det_1 = neg + pos
 
-        if (det_1 == 0.) or (abs(det_1 / (negpos[1] - negpos[0])) < \
+        if (det_1 == 0.) or (abs(det_1 / (pos - neg)) < \
                                      (2. * 0.00000000000000001)):
             raise Matrix44Error("notivertable", "This Matrix44 can not be inverted")
 
         det_1 = 1. / det_1
 
-        ret._m = [(i5 * i10 - i6 * i9) * det_1,
-                  -(i1 * i10 - i2 * i9) * det_1,
-                  (i1 * i6 - i2 * i5) * det_1,
-                  0.0,
-                  -(i4 * i10 - i6 * i8) * det_1,
-                  (i0 * i10 - i2 * i8) * det_1,
-                  -(i0 * i6 - i2 * i4) * det_1,
-                  0.0,
-                  (i4 * i9 - i5 * i8) * det_1,
-                  -(i0 * i9 - i1 * i8) * det_1,
-                  (i0 * i5 - i1 * i4) * det_1,
-                  0.0,
-                  0.0, 0.0, 0.0, 1.0]
-
-        m = ret._m
-        m[12] = - (i12 * m[0] + i13 * m[4] + i14 * m[8])
-        m[13] = - (i12 * m[1] + i13 * m[5] + i14 * m[9])
-        m[14] = - (i12 * m[2] + i13 * m[6] + i14 * m[10])
-
-        return ret
+        m0 = (i5 * i10 - i6 * i9) * det_1
+        m1 = -(i1 * i10 - i2 * i9) * det_1
+        m2 = (i1 * i6 - i2 * i5) * det_1
+        m4 = -(i4 * i10 - i6 * i8) * det_1
+        m5 = (i0 * i10 - i2 * i8) * det_1
+        m6 = -(i0 * i6 - i2 * i4) * det_1
+        m8 = (i4 * i9 - i5 * i8) * det_1
+        m9 = -(i0 * i9 - i1 * i8) * det_1
+        m10 = (i0 * i5 - i1 * i4) * det_1
+
+        return self._output((m0, m1, m2, 0.0,
+                             m4, m5, m6, 0.0,
+                             m8, m9, m10, 0.0,
+                             -(i12 * m0 + i13 * m4 + i14 * m8),
+                             -(i12 * m1 + i13 * m5 + i14 * m9),
+                             -(i12 * m2 + i13 * m6 + i14 * m10),
+                             1.0), AFFINE, out)
+
+    def _get_projective_inverse(self, out):
+        # General 4x4 inverse, from the 2x2 sub-determinants of the top and
+        # bottom two rows
+        a00, a01, a02, a03, \
+        a10, a11, a12, a13, \
+        a20, a21, a22, a23, \
+        a30, a31, a32, a33 = self._m
+
+        s0 = a00 * a11 - a10 * a01
+        s1 = a00 * a12 - a10 * a02
+        s2 = a00 * a13 - a10 * a03
+        s3 = a01 * a12 - a11 * a02
+        s4 = a01 * a13 - a11 * a03
+        s5 = a02 * a13 - a12 * a03
+
+        c5 = a22 * a33 - a32 * a23
+        c4 = a21 * a33 - a31 * a23
+        c3 = a21 * a32 - a31 * a22
+        c2 = a20 * a33 - a30 * a23
+        c1 = a20 * a32 - a30 * a22
+        c0 = a20 * a31 - a30 * a21
+
+        det = s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0
+        if det == 0.:
+            raise Matrix44Error("notivertable", "This Matrix44 can not be inverted")
+        d = 1. / det
+
+        return self._output(((a11 * c5 - a12 * c4 + a13 * c3) * d,
+                             (-a01 * c5 + a02 * c4 - a03 * c3) * d,
+                             (a31 * s5 - a32 * s4 + a33 * s3) * d,
+                             (-a21 * s5 + a22 * s4 - a23 * s3) * d,
+
+                             (-a10 * c5 + a12 * c2 - a13 * c1) * d,
+                             (a00 * c5 - a02 * c2 + a03 * c1) * d,
+                             (-a30 * s5 + a32 * s2 - a33 * s1) * d,
+                             (a20 * s5 - a22 * s2 + a23 * s1) * d,
+
+                             (a10 * c4 - a11 * c2 + a13 * c0) * d,
+                             (-a00 * c4 + a01 * c2 - a03 * c0) * d,
+                             (a30 * s4 - a31 * s2 + a33 * s0) * d,
+                             (-a20 * s4 + a21 * s2 - a23 * s0) * d,
+
+                             (-a10 * c3 + a11 * c1 - a12 * c0) * d,
+                             (a00 * c3 - a01 * c1 + a02 * c0) * d,
+                             (-a30 * s3 + a31 * s1 - a32 * s0) * d,
+                             (a20 * s3 - a21 * s1 + a22 * s0) * d), PROJECTIVE, out)
 
     def invert(self):
 
         """Inverts this matrix."""
 
-        self._m[:] = self.get_inverse()._m
+        self.get_inverse(out=self)
 
     def move(self, forward=None, right=None, up=None):
 
@@ -1123,17 +1466,25 @@ class Matrix44(object):
 
         """
 
+        m = self._m
+
         if forward is not None:
-            self.translate = Vector3(self.translate) + \
-                             Vector3(self.forward) * forward
+            m[12] += m[8] * forward
+            m[13] += m[9] * forward
+            m[14] += m[10] * forward
 
         if right is not None:
-            self.translate = Vector3(self.translate) + \
-                             Vector3(self.right) * right
+            m[12] += m[0] * right
+            m[13] += m[1] * right
+            m[14] += m[2] * right
 
         if up is not None:
-            self.translate = Vector3(self.translate) + \
-                             Vector3(self.up) * up
+            m[12] += m[4] * up
+            m[13] += m[5] * up
+            m[14] += m[6] * up
+
+        if self._kind == IDENTITY:
+            self._kind = TRANSLATION
 
 
 # def test():
@@ -0,0 +1,69 @@
+class Pool(object):
+    """Keeps objects that are no longer needed, and hands them out again in
+    place of new ones. Reusing objects saves the time taken to create them,
+    along with any vectors and other objects they own, and puts less work
+    on the garbage collector.
+
+    """
+
+    def __init__(self, factory, reset=None, max_size=None):
+        """Creates an empty pool.
+
+        factory -- Called to create a new object, with the arguments given
+        to acquire
+        reset -- Called with an object being reused, then the arguments
+        given to acquire. It should leave the object as factory would.
+        max_size -- Most objects to keep for reuse, or None for no limit
+
+        """
+
+        self.factory = factory
+        self.reset = reset
+        self.max_size = max_size
+        self._free = []
+        # Number of objects created, reused and released
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+
+    def __len__(self):
+        """Returns the number of objects waiting to be reused."""
+
+        return len(self._free)
+
+    def prefill(self, count, *args, **kwargs):
+        """Creates objects ahead of time, so they can be acquired later
+        without creating anything.
+
+        count -- Number of objects to create
+
+        """
+
+        for _ in range(count):
+            self._free.append(self.factory(*args, **kwargs))
+        self.created += count
+
+    def acquire(self, *args, **kwargs):
+        """Returns an object from the pool, or a new one if the pool is
+        empty. The arguments are passed to reset or factory.
+
+        """
+
+        if self._free:
+            obj = self._free.pop()
+            if self.reset is not None:
+                self.reset(obj, *args, **kwargs)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.factory(*args, **kwargs)
+
+    def release(self, obj):
+        """Puts an object in the pool to be reused. The object must not be
+        used again until it has been acquired.
+
+        """
+
+        self.released += 1
+        if self.max_size is None or len(self._free) < self.max_size:
+            self._free.append(obj)
@@ -0,0 +1,91 @@
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+
+class Profiler(object):
+    """Collects the number of calls and the total time taken for named
+    parts of a game, such as the thinking of each state or the drawing of
+    each type of entity.
+
+    Keys are tuples of strings, e.g. ("ant", "exploring", "do_actions").
+    The code being measured takes the times itself (with the timer
+    attribute) and passes them to add, so it only pays for profiling when
+    it has a Profiler to pass them to.
+
+    """
+
+    def __init__(self, timer=perf_counter):
+        """Creates an empty Profiler.
+
+        timer -- Function that returns the time in seconds
+
+        """
+
+        self.timer = timer
+        # Maps keys on to [call count, total time]
+        self._stats = {}
+        self.start_time = timer()
+
+    def __len__(self):
+
+        return len(self._stats)
+
+    def add(self, key, time_taken, count=1):
+        """Records calls to a part of the game.
+
+        key -- Tuple of names for the part
+        time_taken -- Total time taken by the calls, in seconds
+        count -- Number of calls
+
+        """
+
+        stats = self._stats.get(key)
+        if stats is None:
+            self._stats[key] = [count, time_taken]
+        else:
+            stats[0] += count
+            stats[1] += time_taken
+
+    def get_stats(self):
+        """Returns a list of (key, call count, total time), slowest first."""
+
+        stats = [(key, count, total) for key, (count, total) in self._stats.items()]
+        stats.sort(key=lambda item: item[2], reverse=True)
+        return stats
+
+    def reset(self):
+        """Forgets all the calls recorded so far."""
+
+        self._stats.clear()
+        self.start_time = self.timer()
+
+    def format_stats(self, limit=None):
+        """Returns a list of lines, one for each key, slowest first.
+
+        limit -- Most lines to return, or None for all of them
+
+        """
+
+        stats = self.get_stats()
+        if limit is not None:
+            stats = stats[:limit]
+        total_time = sum(total for count, total in self._stats.values()) or 1.
+        return ["%-36s %8i %10.2f ms %8.1f us %5.1f%%"
+                % ("/".join(key), count, total * 1e3, total / count * 1e6,
+                   total / total_time * 100.)
+                for key, count, total in stats]
+
+    def report(self, limit=None):
+        """Returns a table of the calls recorded, slowest first, as a string.
+
+        limit -- Most rows to include, or None for all of them
+
+        """
+
+        elapsed = self.timer() - self.start_time
+        lines = ["Profile of %.1f s" % elapsed,
+                 "%-36s %8s %13s %11s %6s" % ("", "calls", "total", "per call", "share")]
+        lines.extend(self.format_stats(limit))
+        return "\n".join(lines)
@@ -0,0 +1,480 @@
+from math import sin, cos, acos, sqrt
+
+from gameobjects.util import format_number
+from gameobjects.vector3 import Vector3
+from gameobjects.matrix44 import Matrix44, RIGID
+
+try:
+    import numpy
+except ImportError:
+    # numpy is only needed for slerp_array
+    numpy = None
+
+
+class Quaternion(object):
+    """A rotation, stored as a unit quaternion (w, x, y, z).
+
+    Multiplying quaternions combines rotations in the same order as
+    multiplying the equivalent Matrix44s, ie.
+    (q1 * q2).to_matrix44() == q1.to_matrix44() * q2.to_matrix44()
+
+    """
+
+    __slots__ = ('w', 'x', 'y', 'z')
+
+    def __init__(self, w=1., x=0., y=0., z=0.):
+        """Creates a quaternion from 4 values. No arguments result in the
+        identity quaternion (no rotation).
+
+        """
+
+        self.w = float(w)
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    @classmethod
+    def from_floats(cls, w, x, y, z):
+        """Creates a Quaternion from individual float values.
+        Warning: There is no checking (for efficiency) here: w, x, y, z _must_
+        be floats.
+
+        """
+
+        q = cls.__new__(cls, object)
+        q.w = w
+        q.x = x
+        q.y = y
+        q.z = z
+        return q
+
+    @classmethod
+    def identity(cls):
+        """Creates an identity Quaternion (no rotation)."""
+
+        return cls.from_floats(1., 0., 0., 0.)
+
+    @classmethod
+    def from_axis_angle(cls, axis, angle):
+        """Creates a Quaternion that does a rotation about an axis.
+
+        axis -- A unit vector of the axis
+        angle -- Angle of rotation (in radians)
+
+        """
+
+        x, y, z = axis
+        s = sin(angle * .5)
+        return cls.from_floats(cos(angle * .5), x * s, y * s, z * s)
+
+    @classmethod
+    def x_rotation(cls, angle):
+        """Creates a Quaternion that does a rotation about the x axis."""
+
+        return cls.from_floats(cos(angle * .5), sin(angle * .5), 0., 0.)
+
+    @classmethod
+    def y_rotation(cls, angle):
+        """Creates a Quaternion that does a rotation about the y axis."""
+
+        return cls.from_floats(cos(angle * .5), 0., sin(angle * .5), 0.)
+
+    @classmethod
+    def z_rotation(cls, angle):
+        """Creates a Quaternion that does a rotation about the z axis."""
+
+        return cls.from_floats(cos(angle * .5), 0., 0., sin(angle * .5))
+
+    @classmethod
+    def xyz_rotation(cls, angle_x, angle_y, angle_z, out=None):
+        """Creates a Quaternion that does a rotation about each axis, the same
+        rotation as Matrix44.xyz_rotation.
+
+        angle_x -- Angle of rotation, about x
+        angle_y -- Angle of rotation, about y
+        angle_z -- Angle of rotation, about z
+        out -- Optional Quaternion to store the result in
+
+        """
+
+        if out is None:
+            out = cls.__new__(cls, object)
+        return out.make_xyz_rotation(angle_x, angle_y, angle_z)
+
+    @classmethod
+    def from_matrix44(cls, matrix):
+        """Creates a Quaternion from the rotation part of a Matrix44. The
+        matrix should not contain a scale.
+
+        matrix -- A Matrix44
+
+        """
+
+        m = matrix._m
+        m00 = m[0]
+        m11 = m[5]
+        m22 = m[10]
+        trace = m00 + m11 + m22
+
+        if trace > 0.:
+            s = sqrt(trace + 1.) * 2.
+            q = cls.from_floats(.25 * s,
+                                (m[6] - m[9]) / s,
+                                (m[8] - m[2]) / s,
+                                (m[1] - m[4]) / s)
+        elif m00 > m11 and m00 > m22:
+            s = sqrt(1. + m00 - m11 - m22) * 2.
+            q = cls.from_floats((m[6] - m[9]) / s,
+                                .25 * s,
+                                (m[4] + m[1]) / s,
+                                (m[8] + m[2]) / s)
+        elif m11 > m22:
+            s = sqrt(1. + m11 - m00 - m22) * 2.
+            q = cls.from_floats((m[8] - m[2]) / s,
+                                (m[4] + m[1]) / s,
+                                .25 * s,
+                                (m[9] + m[6]) / s)
+        else:
+            s = sqrt(1. + m22 - m00 - m11) * 2.
+            q = cls.from_floats((m[1] - m[4]) / s,
+                                (m[8] + m[2]) / s,
+                                (m[9] + m[6]) / s,
+                                .25 * s)
+        return q
+
+    def copy(self):
+        """Returns a copy of this quaternion."""
+
+        return self.from_floats(self.w, self.x, self.y, self.z)
+
+    __copy__ = copy
+
+    def set(self, w, x, y, z):
+        """Sets the components of this quaternion."""
+
+        self.w = float(w)
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+        return self
+
+    def make_xyz_rotation(self, angle_x, angle_y, angle_z):
+        """Makes a rotation about each axis, the same rotation as
+        Matrix44.make_xyz_rotation."""
+
+        cx = cos(angle_x * .5)
+        sx = sin(angle_x * .5)
+        cy = cos(angle_y * .5)
+        sy = sin(angle_y * .5)
+        cz = cos(angle_z * .5)
+        sz = sin(angle_z * .5)
+
+        # x_rotation * y_rotation * z_rotation, expanded
+        self.w = cx * cy * cz - sx * sy * sz
+        self.x = sx * cy * cz + cx * sy * sz
+        self.y = cx * sy * cz - sx * cy * sz
+        self.z = cx * cy * sz + sx * sy * cz
+        return self
+
+    def __str__(self):
+
+        return "(%s, %s, %s, %s)" % (format_number(self.w),
+                                     format_number(self.x),
+                                     format_number(self.y),
+                                     format_number(self.z))
+
+    def __repr__(self):
+
+        return "Quaternion(%s, %s, %s, %s)" % (self.w, self.x, self.y, self.z)
+
+    def __len__(self):
+
+        return 4
+
+    def __iter__(self):
+        """Iterates the components in w, x, y, z order."""
+
+        return iter((self.w, self.x, self.y, self.z))
+
+    def as_tuple(self):
+        """Returns a tuple of the w, x, y, z components."""
+
+        return (self.w, self.x, self.y, self.z)
+
+    def __eq__(self, rhs):
+
+        w, x, y, z = rhs
+        return self.w == w and self.x == x and self.y == y and self.z == z
+
+    def __ne__(self, rhs):
+
+        return not self.__eq__(rhs)
+
+    __hash__ = None
+
+    def __mul__(self, rhs):
+        """Returns the rotation of this quaternion combined with another,
+        called by the * operator.
+
+        rhs -- A Quaternion
+
+        """
+
+        aw = self.w
+        ax = self.x
+        ay = self.y
+        az = self.z
+        bw = rhs.w
+        bx = rhs.x
+        by = rhs.y
+        bz = rhs.z
+        return self.from_floats(aw * bw - ax * bx - ay * by - az * bz,
+                                aw * bx + ax * bw + ay * bz - az * by,
+                                aw * by - ax * bz + ay * bw + az * bx,
+                                aw * bz + ax * by - ay * bx + az * bw)
+
+    def __imul__(self, rhs):
+        """Combines another rotation with this one, called by the *=
+        operator."""
+
+        aw = self.w
+        ax = self.x
+        ay = self.y
+        az = self.z
+        bw = rhs.w
+        bx = rhs.x
+        by = rhs.y
+        bz = rhs.z
+        self.w = aw * bw - ax * bx - ay * by - az * bz
+        self.x = aw * bx + ax * bw + ay * bz - az * by
+        self.y = aw * by - ax * bz + ay * bw + az * bx
+        self.z = aw * bz + ax * by - ay * bx + az * bw
+        return self
+
+    def __neg__(self):
+        """Returns the negation of this quaternion (the same rotation)."""
+
+        return self.from_floats(-self.w, -self.x, -self.y, -self.z)
+
+    def get_conjugate(self):
+        """Returns the conjugate, which for a unit quaternion is the inverse
+        rotation."""
+
+        return self.from_floats(self.w, -self.x, -self.y, -self.z)
+
+    get_inverse = get_conjugate
+
+    def dot(self, other):
+        """Returns the dot product of this quaternion with another."""
+
+        return (self.w * other.w + self.x * other.x +
+                self.y * other.y + self.z * other.z)
+
+    def get_length(self):
+        """Returns the length of the quaternion (1 for a rotation)."""
+
+        w = self.w
+        x = self.x
+        y = self.y
+        z = self.z
+        return sqrt(w * w + x * x + y * y + z * z)
+
+    def normalise(self):
+        """Scales the quaternion to be length 1. Multiplying many rotations
+        together will accumulate small errors, normalise occasionally to
+        correct them.
+
+        """
+
+        w = self.w
+        x = self.x
+        y = self.y
+        z = self.z
+        l = sqrt(w * w + x * x + y * y + z * z)
+        try:
+            l = 1. / l
+        except ZeroDivisionError:
+            self.w = 1.
+            self.x = self.y = self.z = 0.
+            return self
+        self.w = w * l
+        self.x = x * l
+        self.y = y * l
+        self.z = z * l
+        return self
+
+    normalize = normalise
+
+    def get_normalised(self):
+
+        return self.copy().normalise()
+
+    get_normalized = get_normalised
+
+    def get_axis_angle(self):
+        """Returns a tuple of the axis (a Vector3) and the angle of rotation
+        (in radians)."""
+
+        w = min(max(self.w, -1.), 1.)
+        s = sqrt(1. - w * w)
+        if s < 1e-12:
+            return Vector3.from_floats(1., 0., 0.), 0.
+        return Vector3.from_floats(self.x / s, self.y / s, self.z / s), 2. * acos(w)
+
+    def rotate(self, v):
+        """Rotates a vector and returns the result as a tuple.
+
+        v -- Vector to rotate
+
+        """
+
+        w = self.w
+        qx = self.x
+        qy = self.y
+        qz = self.z
+        x, y, z = v
+        # t = 2 * cross(q.xyz, v)
+        tx = 2. * (qy * z - qz * y)
+        ty = 2. * (qz * x - qx * z)
+        tz = 2. * (qx * y - qy * x)
+        # v + w * t + cross(q.xyz, t)
+        return (x + w * tx + qy * tz - qz * ty,
+                y + w * ty + qz * tx - qx * tz,
+                z + w * tz + qx * ty - qy * tx)
+
+    def rotate_vec3(self, v):
+        """Rotates a vector and returns the result as a Vector3.
+
+        v -- Vector to rotate
+
+        """
+
+        return Vector3.from_floats(*self.rotate(v))
+
+    def to_matrix44(self, out=None):
+        """Converts the rotation to a Matrix44. The quaternion should be
+        normalised (unit length).
+
+        out -- Optional Matrix44 to store the result in
+
+        """
+
+        w = self.w
+        x = self.x
+        y = self.y
+        z = self.z
+        x2 = x + x
+        y2 = y + y
+        z2 = z + z
+        xx = x * x2
+        yy = y * y2
+        zz = z * z2
+        xy = x * y2
+        xz = x * z2
+        yz = y * z2
+        wx = w * x2
+        wy = w * y2
+        wz = w * z2
+
+        m = (1. - (yy + zz), xy + wz, xz - wy, 0.,
+             xy - wz, 1. - (xx + zz), yz + wx, 0.,
+             xz + wy, yz - wx, 1. - (xx + yy), 0.,
+             0., 0., 0., 1.)
+
+        if out is None:
+            out = Matrix44.__new__(Matrix44, object)
+            out._m = list(m)
+        else:
+            # Written in to the existing list, which allocates nothing
+            values = out._m
+            values[0], values[1], values[2], values[3], \
+            values[4], values[5], values[6], values[7], \
+            values[8], values[9], values[10], values[11], \
+            values[12], values[13], values[14], values[15] = m
+        out._kind = RIGID
+        return out
+
+    def nlerp(self, other, t):
+        """Returns a rotation part way between this one and another, by
+        normalised linear interpolation. Quicker than slerp, but the speed of
+        rotation is not constant.
+
+        other -- The Quaternion to interpolate to
+        t -- Amount to interpolate (0 is this rotation, 1 is other)
+
+        """
+
+        if self.dot(other) < 0.:
+            t = -t
+        it = 1. - abs(t)
+        return self.from_floats(self.w * it + other.w * t,
+                                self.x * it + other.x * t,
+                                self.y * it + other.y * t,
+                                self.z * it + other.z * t).normalise()
+
+    def slerp(self, other, t):
+        """Returns a rotation part way between this one and another, by
+        spherical linear interpolation (a constant speed of rotation).
+
+        other -- The Quaternion to interpolate to
+        t -- Amount to interpolate (0 is this rotation, 1 is other)
+
+        """
+
+        cos_omega = self.dot(other)
+        sign = 1.
+        if cos_omega < 0.:
+            # Take the shortest path
+            cos_omega = -cos_omega
+            sign = -1.
+
+        if cos_omega > .9995:
+            # Very close, nlerp is accurate and avoids dividing by ~0
+            return self.nlerp(other, t)
+
+        omega = acos(cos_omega)
+        sin_omega = sin(omega)
+        a = sin((1. - t) * omega) / sin_omega
+        b = sign * sin(t * omega) / sin_omega
+        return self.from_floats(self.w * a + other.w * b,
+                                self.x * a + other.x * b,
+                                self.y * a + other.y * b,
+                                self.z * a + other.z * b)
+
+
+def slerp_array(q1, q2, t, out=None):
+    """Spherical linear interpolation of many rotations at once. Useful for
+    blending animations. Requires numpy.
+
+    q1 -- N x 4 array of quaternions (w, x, y, z) to interpolate from
+    q2 -- N x 4 array of quaternions to interpolate to
+    t -- Amount to interpolate, a single value or an array of N values
+    out -- Optional N x 4 array to store the result in
+
+    """
+
+    if numpy is None:
+        raise ImportError("numpy is required for slerp_array")
+
+    q1 = numpy.asarray(q1, dtype=numpy.float64)
+    q2 = numpy.asarray(q2, dtype=numpy.float64)
+    cos_omega = numpy.einsum('ij,ij->i', q1, q2)
+    t = numpy.broadcast_to(numpy.asarray(t, dtype=numpy.float64), cos_omega.shape)
+
+    # Take the shortest path
+    sign = numpy.where(cos_omega < 0., -1., 1.)
+    cos_omega = numpy.minimum(numpy.abs(cos_omega), 1.)
+
+    omega = numpy.arccos(cos_omega)
+    sin_omega = numpy.sin(omega)
+    # Use linear interpolation (then normalise) where the rotations are very
+    # close, to avoid dividing by ~0
+    close = cos_omega > .9995
+    sin_omega[close] = 1.
+    a = numpy.where(close, 1. - t, numpy.sin((1. - t) * omega) / sin_omega)
+    b = numpy.where(close, t, numpy.sin(t * omega) / sin_omega) * sign
+
+    out = numpy.multiply(q1, a[:, None], out=out)
+    out += q2 * b[:, None]
+    out[close] /= numpy.sqrt(numpy.einsum('ij,ij->i', out[close], out[close]))[:, None]
+    return out
@@ -0,0 +1,146 @@
+from math import sqrt
+
+from numpy import zeros, empty, add, multiply, float64, asarray, clip
+
+
+class ScalarField(object):
+    """A grid of values covering a 2D area, that spread in to neighbouring
+    cells and fade away over time, like a scent or a pheromone trail.
+
+    Amounts are deposited at points in the area, and update spreads and
+    fades the whole grid at once with numpy, so its cost depends only on
+    the number of cells, not on how many things deposit or sample. Agents
+    can steer by sampling the field, or by following its gradient towards
+    the strongest source nearby.
+
+    """
+
+    __slots__ = ('size', 'cell_size', 'diffusion', 'half_life', 'values', '_spread')
+
+    def __init__(self, size, cell_size=16., diffusion=5., half_life=4.):
+        """Creates a field of zeros.
+
+        size -- (width, height) of the area covered
+        cell_size -- Width and height of each cell
+        diffusion -- How fast values spread, in cells squared per second
+        half_life -- Time in seconds for values to fade to half, or None
+        for them not to fade
+
+        """
+
+        width, height = size
+        self.size = (width, height)
+        self.cell_size = float(cell_size)
+        self.diffusion = diffusion
+        self.half_life = half_life
+        columns = max(1, int(-(-width // cell_size)))
+        rows = max(1, int(-(-height // cell_size)))
+        # The value in each cell, indexed by [row, column]
+        self.values = zeros((rows, columns), dtype=float64)
+        self._spread = empty((rows, columns), dtype=float64)
+
+    def _get_cell(self, x, y):
+        # Points outside the area are in the nearest cell on its edge
+        rows, columns = self.values.shape
+        cell_size = self.cell_size
+        column = min(max(int(x // cell_size), 0), columns - 1)
+        row = min(max(int(y // cell_size), 0), rows - 1)
+        return row, column
+
+    def clear(self):
+        """Sets every cell to zero."""
+
+        self.values.fill(0.)
+
+    def deposit(self, position, amount):
+        """Adds an amount to the cell containing a point."""
+
+        x, y = position
+        self.values[self._get_cell(x, y)] += amount
+
+    def deposit_many(self, positions, amount):
+        """Adds to the cells containing many points at once.
+
+        positions -- A sequence of (x, y), or an N x 2 array
+        amount -- The amount to add for each point, or an array of N
+        amounts
+
+        """
+
+        positions = asarray(positions, dtype=float64).reshape(-1, 2)
+        if not len(positions):
+            return
+        rows, columns = self.values.shape
+        cells = (positions // self.cell_size).astype(int)
+        cell_columns = clip(cells[:, 0], 0, columns - 1)
+        cell_rows = clip(cells[:, 1], 0, rows - 1)
+        # Unlike +=, add.at adds once for every point in the same cell
+        add.at(self.values, (cell_rows, cell_columns), amount)
+
+    def sample(self, position):
+        """Returns the value at a point."""
+
+        x, y = position
+        return float(self.values[self._get_cell(x, y)])
+
+    def get_gradient(self, position):
+        """Returns the gradient at a point, as (x, y) change in value per
+        unit of distance. It points the way the value rises fastest.
+
+        """
+
+        x, y = position
+        row, column = self._get_cell(x, y)
+        values = self.values
+        rows, columns = values.shape
+        left = max(column - 1, 0)
+        right = min(column + 1, columns - 1)
+        top = max(row - 1, 0)
+        bottom = min(row + 1, rows - 1)
+        cell_size = self.cell_size
+        dx = dy = 0.
+        if right != left:
+            dx = (values[row, right] - values[row, left]) / ((right - left) * cell_size)
+        if bottom != top:
+            dy = (values[bottom, column] - values[top, column]) / ((bottom - top) * cell_size)
+        return (float(dx), float(dy))
+
+    def get_uphill(self, position, min_gradient=0.):
+        """Returns the unit vector (as a tuple) pointing up the gradient at a
+        point, or None if the gradient is no more than min_gradient.
+
+        """
+
+        dx, dy = self.get_gradient(position)
+        length = sqrt(dx * dx + dy * dy)
+        if length <= min_gradient or length == 0.:
+            return None
+        return (dx / length, dy / length)
+
+    def update(self, time_passed):
+        """Spreads and fades the values.
+
+        time_passed -- Time since the last update, in seconds
+
+        """
+
+        values = self.values
+        spread = self._spread
+        # Each cell moves towards the mean of its four neighbours. Cells on
+        # the edge count themselves in place of the missing neighbours, so
+        # nothing is lost over the edge.
+        rate = min(self.diffusion * time_passed, .25)
+        multiply(values, -4., out=spread)
+        spread[1:, :] += values[:-1, :]
+        spread[:-1, :] += values[1:, :]
+        spread[:, 1:] += values[:, :-1]
+        spread[:, :-1] += values[:, 1:]
+        spread[0, :] += values[0, :]
+        spread[-1, :] += values[-1, :]
+        spread[:, 0] += values[:, 0]
+        spread[:, -1] += values[:, -1]
+        spread *= rate
+        values += spread
+
+        if self.half_life is not None:
+            values *= 0.5 ** (time_passed / self.half_life)
@@ -0,0 +1,165 @@
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+
+class ThinkScheduler(object):
+    """Decides which AI objects think on each update, so that the time spent
+    on AI doesn't grow without limit as more objects are added.
+
+    A thinker is any object with a think method. If it also has a
+    get_think_interval method, that returns how many updates to wait before
+    it thinks again (1 to think every update); it is asked after each think,
+    so a StateMachine can return a different interval for each state.
+    Thinkers with the same interval are spread over the updates, rather
+    than all thinking on the same one.
+
+    With a budget, run stops starting new thinks once the budget has been
+    used up. The thinkers that missed out go first on the next update, so
+    every thinker still gets a turn, just later than it asked for. run can
+    also be given a limit on the number of thinks, which is used in place
+    of the budget.
+
+    """
+
+    def __init__(self, budget=None):
+        """Creates a ThinkScheduler.
+
+        budget -- Most time to spend thinking in one update, in seconds, or
+        None for no limit. At least one thinker always runs.
+
+        """
+
+        self.budget = budget
+        # Number of the next update
+        self.update = 0
+        # Number of thinks run, and thinkers left waiting, in the last update
+        self.think_count = 0
+        self.backlog = 0
+        # Maps update numbers on to the thinkers due then
+        self._calendar = {}
+        # Maps thinkers on to the update they are due
+        self._due = {}
+        # (due update, thinker) for thinkers that missed out on the budget
+        self._late = []
+        # Number of thinkers added with each interval
+        self._added = {}
+
+    def __len__(self):
+
+        return len(self._due)
+
+    def __contains__(self, thinker):
+
+        return thinker in self._due
+
+    def _schedule(self, thinker, update):
+        self._due[thinker] = update
+        thinkers = self._calendar.get(update)
+        if thinkers is None:
+            self._calendar[update] = [thinker]
+        else:
+            thinkers.append(thinker)
+
+    def add(self, thinker, update=None):
+        """Adds a thinker, which will first think within its interval.
+
+        thinker -- An object with a think method
+        update -- The update to first think on, or None to choose one.
+        Thinkers added for the same update think in the order they were
+        added. An update that has passed means as soon as possible.
+
+        """
+
+        if thinker in self._due:
+            raise ValueError("Thinker is already scheduled")
+        if update is not None:
+            if update < self.update:
+                self._due[thinker] = update
+                self._late.append((update, thinker))
+            else:
+                self._schedule(thinker, update)
+            return
+        interval = self._get_interval(thinker)
+        # Spread new thinkers with the same interval over its updates
+        added = self._added.get(interval, 0)
+        self._added[interval] = added + 1
+        self._schedule(thinker, self.update + added % interval)
+
+    def remove(self, thinker):
+        """Removes a thinker, so it won't think again."""
+
+        # Entries left in the calendar are skipped when they come up
+        del self._due[thinker]
+
+    def get_schedule(self):
+        """Returns a list of (update, thinker) for every thinker, in the order
+        they will think. Adding them in this order to a new ThinkScheduler
+        (with the same update number) gives the same schedule.
+
+        """
+
+        due = self._due
+        schedule = [entry for entry in self._late if due.get(entry[1]) == entry[0]]
+        for update in sorted(self._calendar):
+            schedule.extend((update, thinker) for thinker in self._calendar[update]
+                            if due.get(thinker) == update)
+        return schedule
+
+    def _get_interval(self, thinker):
+        get_think_interval = getattr(thinker, "get_think_interval", None)
+        if get_think_interval is None:
+            return 1
+        return max(1, int(get_think_interval()))
+
+    def run(self, think=None, limit=None):
+        """Runs the thinkers due on this update, and any left over from
+        earlier updates. Returns the number of thinks run.
+
+        think -- Called with each thinker in place of its think method (to
+        time it, for example), or None to call think
+        limit -- Most thinks to run, in place of the time budget, or None to
+        use the budget. Unlike the budget, this doesn't depend on how fast
+        the thinkers run, so the same limits give the same thinking (when
+        replaying a recording, for example).
+
+        """
+
+        update = self.update
+        self.update = update + 1
+
+        due = self._due
+        waiting = self._late
+        scheduled = self._calendar.pop(update, None)
+        if scheduled is not None:
+            waiting.extend((update, thinker) for thinker in scheduled)
+        self._late = []
+
+        budget = self.budget
+        start = perf_counter()
+        think_count = 0
+        for position, (due_update, thinker) in enumerate(waiting):
+            # Skip thinkers that have been removed, or rescheduled since
+            if due.get(thinker) != due_update:
+                continue
+            if limit is not None:
+                stop = think_count >= limit
+            else:
+                stop = think_count and budget is not None and perf_counter() - start >= budget
+            if stop:
+                self._late = [entry for entry in waiting[position:]
+                              if due.get(entry[1]) == entry[0]]
+                break
+            if think is None:
+                thinker.think()
+            else:
+                think(thinker)
+            think_count += 1
+            # The thinker may have removed itself
+            if thinker in due:
+                self._schedule(thinker, update + self._get_interval(thinker))
+
+        self.think_count = think_count
+        self.backlog = len(self._late)
+        return think_count
@@ -0,0 +1,129 @@
+# Handles keep the slot number in the low bits, and the generation above
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+class SlotMap(object):
+    """Stores objects under integer handles, with constant time add, remove
+    and lookup.
+
+    The objects are kept packed together in a list, so iterating over them
+    is as fast as iterating over a list. Removing an object moves the last
+    one in to its place, so the order changes as objects are removed.
+
+    A handle is made of a slot number and a generation. The generation of a
+    slot goes up each time its object is removed, so an old handle never
+    finds the object that reuses its slot.
+
+    """
+
+    __slots__ = ('_values', '_slots', '_indices', '_generations', '_free')
+
+    def __init__(self):
+
+        # The objects, packed together, and the slot each one is in
+        self._values = []
+        self._slots = []
+        # For each slot, the index of its object in _values, and the
+        # generation of the handle that finds it
+        self._indices = []
+        self._generations = []
+        # Slots with no object
+        self._free = []
+
+    def __len__(self):
+
+        return len(self._values)
+
+    def __iter__(self):
+
+        return iter(self._values)
+
+    def __contains__(self, handle):
+
+        return self._find(handle) is not None
+
+    def __getitem__(self, handle):
+
+        index = self._find(handle)
+        if index is None:
+            raise KeyError(handle)
+        return self._values[index]
+
+    def _find(self, handle):
+        # Returns the index of a handle's object in _values, or None
+        try:
+            slot = handle & INDEX_MASK
+            if self._generations[slot] == handle >> INDEX_BITS:
+                return self._indices[slot]
+        except (IndexError, TypeError):
+            pass
+        return None
+
+    def add(self, value):
+        """Stores an object, and returns its handle."""
+
+        values = self._values
+        if self._free:
+            slot = self._free.pop()
+            self._indices[slot] = len(values)
+            generation = self._generations[slot]
+        else:
+            slot = len(self._indices)
+            self._indices.append(len(values))
+            self._generations.append(0)
+            generation = 0
+        values.append(value)
+        self._slots.append(slot)
+        return (generation << INDEX_BITS) | slot
+
+    def remove(self, handle):
+        """Removes the object with a handle, and returns it."""
+
+        slot = handle & INDEX_MASK
+        generations = self._generations
+        if slot >= len(generations) or generations[slot] != handle >> INDEX_BITS:
+            raise KeyError(handle)
+        indices = self._indices
+        index = indices[slot]
+        values = self._values
+        slots = self._slots
+        value = values[index]
+        # Move the last object in to the gap
+        last_value = values.pop()
+        last_slot = slots.pop()
+        if index < len(values):
+            values[index] = last_value
+            slots[index] = last_slot
+            indices[last_slot] = index
+        generations[slot] += 1
+        self._free.append(slot)
+        return value
+
+    def get(self, handle, default=None):
+        """Returns the object with a handle, or default if there is no such
+        object (because it has been removed).
+
+        """
+
+        try:
+            slot = handle & INDEX_MASK
+            if self._generations[slot] == handle >> INDEX_BITS:
+                return self._values[self._indices[slot]]
+        except (IndexError, TypeError):
+            pass
+        return default
+
+    def values(self):
+        """Returns a list of the objects."""
+
+        return self._values[:]
+
+    def handles(self):
+        """Returns a list of the handles of the objects, in the same order as
+        values().
+
+        """
+
+        generations = self._generations
+        return [(generations[slot] << INDEX_BITS) | slot for slot in self._slots]
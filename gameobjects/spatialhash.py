@@ -0,0 +1,262 @@
+from math import floor
+from heapq import heappush, heapreplace
+
+
+class SpatialHash(object):
+    """A uniform grid of square cells, for quickly finding objects near a
+    2D position.
+
+    Each object is stored in the cell that contains its position, so a
+    query only has to look at the objects in the few cells that overlap
+    the search area, rather than at every object. Call update whenever an
+    object moves; it does nothing more than store the new position, unless
+    the object has moved in to another cell.
+
+    """
+
+    __slots__ = ('cell_size', '_cells', '_object_cells')
+
+    def __init__(self, cell_size=64.):
+        """Creates an empty grid.
+
+        cell_size -- Width and height of each cell. Roughly the radius of the
+        most common query works well.
+
+        """
+
+        self.cell_size = float(cell_size)
+        # Maps cell coordinates on to a dictionary of object: (x, y)
+        self._cells = {}
+        # Maps objects on to their cell coordinates
+        self._object_cells = {}
+
+    def __len__(self):
+
+        return len(self._object_cells)
+
+    def __contains__(self, obj):
+
+        return obj in self._object_cells
+
+    def __iter__(self):
+
+        return iter(self._object_cells)
+
+    def _get_cell(self, x, y):
+        cell_size = self.cell_size
+        return (int(floor(x / cell_size)), int(floor(y / cell_size)))
+
+    def insert(self, obj, position):
+        """Adds an object to the grid.
+
+        obj -- Any hashable object
+        position -- The position of the object (a Vector2 or a tuple)
+
+        """
+
+        if obj in self._object_cells:
+            raise ValueError("Object is already in the grid")
+        x, y = position
+        cell = self._get_cell(x, y)
+        cell_objects = self._cells.get(cell)
+        if cell_objects is None:
+            cell_objects = self._cells[cell] = {}
+        cell_objects[obj] = (x, y)
+        self._object_cells[obj] = cell
+
+    def update(self, obj, position):
+        """Changes the position of an object in the grid.
+
+        obj -- An object in the grid
+        position -- The new position of the object
+
+        """
+
+        x, y = position
+        cell_size = self.cell_size
+        cell = (int(floor(x / cell_size)), int(floor(y / cell_size)))
+        old_cell = self._object_cells[obj]
+        if cell == old_cell:
+            self._cells[cell][obj] = (x, y)
+            return
+
+        cells = self._cells
+        old_cell_objects = cells[old_cell]
+        del old_cell_objects[obj]
+        if not old_cell_objects:
+            del cells[old_cell]
+        cell_objects = cells.get(cell)
+        if cell_objects is None:
+            cell_objects = cells[cell] = {}
+        cell_objects[obj] = (x, y)
+        self._object_cells[obj] = cell
+
+    def remove(self, obj):
+        """Removes an object from the grid."""
+
+        cell = self._object_cells.pop(obj)
+        cell_objects = self._cells[cell]
+        del cell_objects[obj]
+        if not cell_objects:
+            del self._cells[cell]
+
+    def get_position(self, obj):
+        """Returns the position of an object, as stored in the grid."""
+
+        return self._cells[self._object_cells[obj]][obj]
+
+    def items(self):
+        """Returns a list of (object, position) for every object in the grid.
+        Inserting them in this order in to an empty grid gives the same grid,
+        down to the order queries find objects in.
+
+        """
+
+        return [item for cell_objects in self._cells.values() for item in cell_objects.items()]
+
+    def _iter_cells(self, x, y, radius):
+        # Yields the dictionaries of objects in the cells that overlap the
+        # square around a circle
+        cells = self._cells
+        cell_x1, cell_y1 = self._get_cell(x - radius, y - radius)
+        cell_x2, cell_y2 = self._get_cell(x + radius, y + radius)
+        for cell_y in range(cell_y1, cell_y2 + 1):
+            for cell_x in range(cell_x1, cell_x2 + 1):
+                cell_objects = cells.get((cell_x, cell_y))
+                if cell_objects is not None:
+                    yield cell_objects
+
+    def _iter_ring(self, cell_x, cell_y, ring):
+        # Yields the dictionaries of objects in the cells that are exactly
+        # ring cells away from a cell (a square outline)
+        cells = self._cells
+        if ring == 0:
+            cell_objects = cells.get((cell_x, cell_y))
+            if cell_objects is not None:
+                yield cell_objects
+            return
+        for x in range(cell_x - ring, cell_x + ring + 1):
+            cell_objects = cells.get((x, cell_y - ring))
+            if cell_objects is not None:
+                yield cell_objects
+            cell_objects = cells.get((x, cell_y + ring))
+            if cell_objects is not None:
+                yield cell_objects
+        for y in range(cell_y - ring + 1, cell_y + ring):
+            cell_objects = cells.get((cell_x - ring, y))
+            if cell_objects is not None:
+                yield cell_objects
+            cell_objects = cells.get((cell_x + ring, y))
+            if cell_objects is not None:
+                yield cell_objects
+
+    def _iter_rings(self, x, y):
+        # Yields (ring, cells) for rings of cells spreading out from the
+        # cell containing (x, y). Nothing in later rings is closer to (x, y)
+        # than ring * cell_size. Once the rings would cover more cells than
+        # are occupied, the remaining occupied cells are yielded as one last
+        # ring, so searching an empty or sparse grid ends quickly.
+        cell_x, cell_y = self._get_cell(x, y)
+        cells = self._cells
+        ring = 0
+        while (2 * ring + 1) * (2 * ring + 1) <= len(cells):
+            yield ring, self._iter_ring(cell_x, cell_y, ring)
+            ring += 1
+        remaining = [cell_objects for (cx, cy), cell_objects in cells.items()
+                     if max(abs(cx - cell_x), abs(cy - cell_y)) >= ring]
+        yield None, remaining
+
+    def query_radius(self, position, radius):
+        """Returns a list of the objects that are closer to a position than
+        a given radius.
+
+        position -- The centre of the search
+        radius -- The distance to search
+
+        """
+
+        x, y = position
+        radius_squared = radius * radius
+        found = []
+        for cell_objects in self._iter_cells(x, y, radius):
+            for obj, (ox, oy) in cell_objects.items():
+                dx = ox - x
+                dy = oy - y
+                if dx * dx + dy * dy < radius_squared:
+                    found.append(obj)
+        return found
+
+    def nearest(self, position, radius=None):
+        """Returns the object closest to a position, or None if there are no
+        objects closer than the given radius.
+
+        position -- The centre of the search
+        radius -- The distance to search, or None for no limit
+
+        """
+
+        x, y = position
+        closest = None
+        if radius is None:
+            closest_distance_squared = float("inf")
+        else:
+            closest_distance_squared = radius * radius
+        cell_size = self.cell_size
+        for ring, ring_cells in self._iter_rings(x, y):
+            for cell_objects in ring_cells:
+                for obj, (ox, oy) in cell_objects.items():
+                    dx = ox - x
+                    dy = oy - y
+                    distance_squared = dx * dx + dy * dy
+                    if distance_squared < closest_distance_squared:
+                        closest = obj
+                        closest_distance_squared = distance_squared
+            if ring is not None:
+                reach = ring * cell_size
+                if reach * reach >= closest_distance_squared:
+                    break
+        return closest
+
+    def k_nearest(self, position, k, radius=None):
+        """Returns a list of up to k objects closest to a position, nearest
+        first.
+
+        position -- The centre of the search
+        k -- The maximum number of objects to return
+        radius -- The distance to search, or None for no limit
+
+        """
+
+        if k <= 0:
+            return []
+        x, y = position
+        if radius is None:
+            limit = float("inf")
+        else:
+            limit = radius * radius
+        # A max heap (by negated distance) of the k closest so far. The count
+        # keeps objects from being compared when distances are equal.
+        heap = []
+        count = 0
+        cell_size = self.cell_size
+        for ring, ring_cells in self._iter_rings(x, y):
+            for cell_objects in ring_cells:
+                for obj, (ox, oy) in cell_objects.items():
+                    dx = ox - x
+                    dy = oy - y
+                    distance_squared = dx * dx + dy * dy
+                    if distance_squared < limit:
+                        count += 1
+                        if len(heap) < k:
+                            heappush(heap, (-distance_squared, count, obj))
+                            if len(heap) == k:
+                                limit = -heap[0][0]
+                        else:
+                            heapreplace(heap, (-distance_squared, count, obj))
+                            limit = -heap[0][0]
+            if ring is not None:
+                reach = ring * cell_size
+                if reach * reach >= limit:
+                    break
+        heap.sort(reverse=True)
+        return [obj for _, _, obj in heap]
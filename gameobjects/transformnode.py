@@ -0,0 +1,138 @@
+from gameobjects.matrix44 import Matrix44
+
+
+class TransformNode(object):
+    """A node in a hierarchy of transforms (a scene graph).
+
+    Each node has a local matrix (relative to its parent) and a world matrix,
+    which is the local matrix combined with the world matrices of all its
+    ancestors. World matrices are cached, and only recalculated when the node,
+    or one of its ancestors, has changed. So if nothing has moved, getting
+    the world matrices does no matrix multiplies at all.
+
+    """
+
+    __slots__ = ('_local', '_world', '_parent', '_children', '_dirty')
+
+    def __init__(self, local=None, parent=None):
+        """Creates a transform node.
+
+        local -- The local Matrix44 (copied), defaults to identity
+        parent -- The parent TransformNode, or None for a root node
+
+        """
+
+        self._local = Matrix44()
+        if local is not None:
+            self._local.make_copy(local)
+        self._world = Matrix44()
+        self._parent = None
+        self._children = []
+        self._dirty = True
+        if parent is not None:
+            parent.add_child(self)
+
+    def _get_local(self):
+        return self._local
+
+    def _set_local(self, matrix):
+        self._local.make_copy(matrix)
+        self.invalidate()
+
+    local = property(_get_local, _set_local, None, "Local matrix. If you modify "
+                                                   "it in place, call invalidate().")
+
+    def _get_parent(self):
+        return self._parent
+
+    parent = property(_get_parent, None, None, "Parent node (or None).")
+
+    def _get_children(self):
+        return tuple(self._children)
+
+    children = property(_get_children, None, None, "Tuple of child nodes.")
+
+    def _get_dirty(self):
+        return self._dirty
+
+    dirty = property(_get_dirty, None, None, "True if the world matrix needs "
+                                             "to be recalculated.")
+
+    def add_child(self, node):
+        """Attaches a node to this one, detaching it from any previous parent.
+
+        node -- The child TransformNode
+
+        """
+
+        if node._parent is not None:
+            node._parent.remove_child(node)
+        node._parent = self
+        self._children.append(node)
+        node.invalidate()
+
+    def remove_child(self, node):
+        """Detaches a child node, which becomes a root node."""
+
+        self._children.remove(node)
+        node._parent = None
+        node.invalidate()
+
+    def invalidate(self):
+        """Marks the world matrix of this node, and all its descendants, as
+        needing to be recalculated. Called automatically when the local
+        matrix is set, call it yourself after modifying the local matrix in
+        place.
+
+        """
+
+        # A dirty node always has dirty descendants, so there is no need to
+        # go below one
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if not node._dirty:
+                node._dirty = True
+                stack.extend(node._children)
+
+    def get_world_matrix(self):
+        """Returns the world matrix, recalculating it only if required.
+        The same Matrix44 object is returned every time, do not modify it.
+
+        """
+
+        if self._dirty:
+            parent = self._parent
+            world = self._world
+            if parent is None:
+                world.make_copy(self._local)
+            else:
+                # Transform by the local matrix, then by the parent's world
+                world.make_copy(parent.get_world_matrix())
+                world *= self._local
+            self._dirty = False
+        return self._world
+
+    world = property(get_world_matrix, None, None, "World matrix (read only).")
+
+    def update(self):
+        """Recalculates the world matrices of this node and all its
+        descendants that have changed.
+
+        """
+
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._dirty:
+                node.get_world_matrix()
+            stack.extend(node._children)
+
+    def iter_nodes(self):
+        """Iterates over this node and all its descendants (depth first)."""
+
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node._children))
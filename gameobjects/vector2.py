@@ -105,6 +105,21 @@ class Vector2(object):
 
     y = property(get_y, set_y, None, "y component.")
 
+    def set(self, x, y):
+        """Sets the components of this vector.
+        x -- x component
+        y -- y component
+
+        """
+
+        v = self._v
+        try:
+            v[0] = x * 1.0
+            v[1] = y * 1.0
+        except TypeError:
+            raise TypeError("Must be a number")
+        return self
+
     # u = property(get_x, set_y, None, "u component (alias for x).")
     # v = property(get_y, set_y, None, "v component (alias for y).")
 
@@ -0,0 +1,355 @@
+from math import sqrt
+from array import array
+
+from gameobjects.util import format_number
+from gameobjects.vector2 import Vector2
+
+try:
+    import numpy
+except ImportError:
+    # numpy is only needed for Vector2Pool.arrays
+    numpy = None
+
+
+class Vector2Pool(object):
+    """Stores a large number of 2D vectors compactly, with the x and y
+    components in two parallel arrays of doubles (a struct of arrays).
+
+    Vectors are handed out as Vector2View objects, which support the same
+    operations as Vector2 but read and write the pool. A Vector2View uses
+    about two thirds of the memory of a Vector2, and the whole pool can be
+    updated at once through the numpy arrays returned by arrays().
+
+    """
+
+    __slots__ = ('_x', '_y', '_end', '_free')
+
+    def __init__(self, capacity=0):
+        """Creates an empty pool.
+
+        capacity -- Number of vectors to reserve space for
+
+        """
+
+        self._x = array('d', bytes(capacity * 8))
+        self._y = array('d', bytes(capacity * 8))
+        # Vectors past _end have never been used, freed vectors before it
+        # are kept in _free
+        self._end = 0
+        self._free = []
+
+    def __len__(self):
+        """Returns the number of vectors in use."""
+
+        return self._end - len(self._free)
+
+    def _get_capacity(self):
+        return len(self._x)
+
+    capacity = property(_get_capacity, None, None, "Number of vectors the "
+                                                   "pool has space for.")
+
+    def new(self, x=0., y=0.):
+        """Returns a Vector2View of a vector in the pool.
+
+        x -- The x value (defaults to 0.), or a container of 2 values
+        y -- The y value (defaults to 0.)
+
+        """
+
+        if hasattr(x, "__getitem__"):
+            x, y = x
+        xs = self._x
+        ys = self._y
+        if self._free:
+            index = self._free.pop()
+            xs[index] = x
+            ys[index] = y
+        else:
+            index = self._end
+            self._end = index + 1
+            if index < len(xs):
+                xs[index] = x
+                ys[index] = y
+            else:
+                xs.append(x)
+                ys.append(y)
+        v = Vector2View.__new__(Vector2View)
+        v._xs = xs
+        v._ys = ys
+        v._i = index
+        return v
+
+    def free(self, v):
+        """Returns a vector to the pool, so its space can be reused. The
+        Vector2View must not be used after it has been freed.
+
+        v -- A Vector2View from this pool
+
+        """
+
+        if v._xs is not self._x:
+            raise ValueError("Vector is not from this pool")
+        index = v._i
+        self._x[index] = 0.
+        self._y[index] = 0.
+        self._free.append(index)
+
+    def arrays(self):
+        """Returns the x and y components as a pair of numpy arrays, which
+        share memory with the pool (so changing the arrays changes the
+        vectors). Includes free and unused vectors, which are zero.
+
+        Don't keep the arrays while calling new, the pool can't grow while
+        they exist.
+
+        """
+
+        if numpy is None:
+            raise ImportError("numpy is required for Vector2Pool.arrays")
+        return (numpy.frombuffer(self._x, dtype=numpy.float64),
+                numpy.frombuffer(self._y, dtype=numpy.float64))
+
+
+class Vector2View(object):
+    """A 2D vector stored in a Vector2Pool. Supports the same operations
+    as Vector2, operators that create a new vector return a Vector2.
+
+    """
+
+    __slots__ = ('_xs', '_ys', '_i')
+
+    _gameobjects_vector = 2
+
+    def copy(self):
+        """Returns a copy of this vector, as a Vector2."""
+
+        i = self._i
+        return Vector2.from_floats(self._xs[i], self._ys[i])
+
+    __copy__ = copy
+
+    def _get_index(self):
+        return self._i
+
+    index = property(_get_index, None, None, "Index of the vector in the pool.")
+
+    def get_x(self):
+        return self._xs[self._i]
+
+    def set_x(self, x):
+        try:
+            self._xs[self._i] = x
+        except TypeError:
+            raise TypeError("Must be a number")
+
+    x = property(get_x, set_x, None, "x component.")
+
+    def get_y(self):
+        return self._ys[self._i]
+
+    def set_y(self, y):
+        try:
+            self._ys[self._i] = y
+        except TypeError:
+            raise TypeError("Must be a number")
+
+    y = property(get_y, set_y, None, "y component.")
+
+    def set(self, x, y):
+        """Sets both components."""
+
+        i = self._i
+        self._xs[i] = x
+        self._ys[i] = y
+        return self
+
+    def __str__(self):
+
+        i = self._i
+        return "(%s, %s)" % (format_number(self._xs[i]), format_number(self._ys[i]))
+
+    def __repr__(self):
+
+        i = self._i
+        return "Vector2View(%s, %s)" % (self._xs[i], self._ys[i])
+
+    def __iter__(self):
+
+        i = self._i
+        return iter((self._xs[i], self._ys[i]))
+
+    def __len__(self):
+
+        return 2
+
+    def __getitem__(self, index):
+        """Gets a component as though the vector were a list."""
+
+        if index == 0 or index == -2:
+            return self._xs[self._i]
+        if index == 1 or index == -1:
+            return self._ys[self._i]
+        raise IndexError("There are 2 values in this object, index should be 0 or 1")
+
+    def __setitem__(self, index, value):
+        """Sets a component as though the vector were a list."""
+
+        if index == 0 or index == -2:
+            self._xs[self._i] = value
+        elif index == 1 or index == -1:
+            self._ys[self._i] = value
+        else:
+            raise IndexError("There are 2 values in this object, index should be 0 or 1!")
+
+    def as_tuple(self):
+        """Converts this vector to a tuple."""
+
+        i = self._i
+        return (self._xs[i], self._ys[i])
+
+    def __eq__(self, rhs):
+        i = self._i
+        xx, yy = rhs
+        return self._xs[i] == xx and self._ys[i] == yy
+
+    def __ne__(self, rhs):
+        i = self._i
+        xx, yy = rhs
+        return self._xs[i] != xx or self._ys[i] != yy
+
+    __hash__ = None
+
+    def __bool__(self):
+
+        i = self._i
+        return bool(self._xs[i] or self._ys[i])
+
+    __nonzero__ = __bool__
+
+    def __add__(self, rhs):
+        i = self._i
+        xx, yy = rhs
+        return Vector2.from_floats(self._xs[i] + xx, self._ys[i] + yy)
+
+    __radd__ = __add__
+
+    def __iadd__(self, rhs):
+        i = self._i
+        xx, yy = rhs
+        self._xs[i] += xx
+        self._ys[i] += yy
+        return self
+
+    def __sub__(self, rhs):
+        i = self._i
+        xx, yy = rhs
+        return Vector2.from_floats(self._xs[i] - xx, self._ys[i] - yy)
+
+    def __rsub__(self, lhs):
+        i = self._i
+        xx, yy = lhs
+        return Vector2.from_floats(xx - self._xs[i], yy - self._ys[i])
+
+    def __isub__(self, rhs):
+        i = self._i
+        xx, yy = rhs
+        self._xs[i] -= xx
+        self._ys[i] -= yy
+        return self
+
+    def __mul__(self, rhs):
+        """Return the result of multiplying this vector with a scalar or a vector-list object."""
+        i = self._i
+        if hasattr(rhs, "__getitem__"):
+            xx, yy = rhs
+            return Vector2.from_floats(self._xs[i] * xx, self._ys[i] * yy)
+        return Vector2.from_floats(self._xs[i] * rhs, self._ys[i] * rhs)
+
+    __rmul__ = __mul__
+
+    def __imul__(self, rhs):
+        """Multiplys this vector with a scalar or a vector-list object."""
+        i = self._i
+        if hasattr(rhs, "__getitem__"):
+            xx, yy = rhs
+        else:
+            xx = yy = rhs
+        self._xs[i] *= xx
+        self._ys[i] *= yy
+        return self
+
+    def __truediv__(self, rhs):
+        """Return the result of dividing this vector by a scalar or a vector-list object."""
+        i = self._i
+        if hasattr(rhs, "__getitem__"):
+            xx, yy = rhs
+            return Vector2.from_floats(self._xs[i] / xx, self._ys[i] / yy)
+        return Vector2.from_floats(self._xs[i] / rhs, self._ys[i] / rhs)
+
+    __div__ = __truediv__
+
+    def __itruediv__(self, rhs):
+        """Divides this vector with a scalar or a vector-list object."""
+        i = self._i
+        if hasattr(rhs, "__getitem__"):
+            xx, yy = rhs
+        else:
+            xx = yy = rhs
+        self._xs[i] /= xx
+        self._ys[i] /= yy
+        return self
+
+    __idiv__ = __itruediv__
+
+    def __neg__(self):
+        """Return the negation of this vector."""
+        i = self._i
+        return Vector2.from_floats(-self._xs[i], -self._ys[i])
+
+    def __pos__(self):
+
+        return self.copy()
+
+    def get_length(self):
+        """Returns the length of this vector."""
+        i = self._i
+        x = self._xs[i]
+        y = self._ys[i]
+        return sqrt(x * x + y * y)
+
+    get_magnitude = get_length
+
+    def normalise(self):
+        """Normalises this vector."""
+        i = self._i
+        x = self._xs[i]
+        y = self._ys[i]
+        l = sqrt(x * x + y * y)
+        if l:
+            self._xs[i] = x / l
+            self._ys[i] = y / l
+        return self
+
+    normalize = normalise
+
+    def get_normalised(self):
+        i = self._i
+        x = self._xs[i]
+        y = self._ys[i]
+        l = sqrt(x * x + y * y)
+        return Vector2.from_floats(x / l, y / l)
+
+    get_normalized = get_normalised
+
+    def get_distance_to(self, p):
+        """Returns the distance to a point.
+
+        p -- A Vector2 or list-like object with at least 2 values.
+
+        """
+        i = self._i
+        xx, yy = p
+        dx = xx - self._xs[i]
+        dy = yy - self._ys[i]
+        return sqrt(dx * dx + dy * dy)
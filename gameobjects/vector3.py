@@ -79,7 +79,7 @@ class Vector3(object):
         """Returns a copy of this vector."""
 
         v = self.__new__(self.__class__, object)
-        v._v = self._v[:]
+        v._v = list(self._v)
         return v
         # return self.from_floats(self._v[0], self._v[1], self._v[2])
 
@@ -124,14 +124,16 @@ class Vector3(object):
 
     def _set_length(self, length):
         v = self._v
-        try:
-            x, y, z = v
-            l = length / sqrt(x * x + y * y + z * z)
-        except ZeroDivisionError:
+        x, y, z = v
+        l = sqrt(x * x + y * y + z * z)
+        # Checked rather than caught, as _v may be a row of a Vector3Array,
+        # which divides by zero without raising ZeroDivisionError
+        if l == 0.:
             v[0] = 0.
             v[1] = 0.
             v[2] = 0.
             return self
+        l = length / l
 
         v[0] = x * l
         v[1] = y * l
@@ -244,6 +246,9 @@ class Vector3(object):
 
         """
 
+        if hasattr(rhs, "_gameobjects_array"):
+            # Let the array add this vector to each of its vectors
+            return NotImplemented
         x, y, z = self._v
         ox, oy, oz = rhs
         return self.from_floats(x + ox, y + oy, z + oz)
@@ -281,6 +286,8 @@ class Vector3(object):
 
         """
 
+        if hasattr(rhs, "_gameobjects_array"):
+            return NotImplemented
         x, y, z = self._v
         ox, oy, oz = rhs
         return self.from_floats(x - ox, y - oy, z - oz)
@@ -349,6 +356,8 @@ class Vector3(object):
 
         x, y, z = self._v
         if hasattr(rhs, "__getitem__"):
+            if hasattr(rhs, "_gameobjects_array"):
+                return NotImplemented
             ox, oy, oz = rhs
             return self.from_floats(x * ox, y * oy, z * oz)
         else:
@@ -516,14 +525,14 @@ class Vector3(object):
 
         """
         v = self._v
-        try:
-            x, y, z = v
-            l = new_length / sqrt(x * x + y * y + z * z)
-        except ZeroDivisionError:
+        x, y, z = v
+        l = sqrt(x * x + y * y + z * z)
+        if l == 0.:
             v[0] = 0.0
             v[1] = 0.0
             v[2] = 0.0
             return self
+        l = new_length / l
 
         v[0] = x * l
         v[1] = y * l
@@ -562,14 +571,16 @@ class Vector3(object):
         v = self._v
         x, y, z = v
         l = sqrt(x * x + y * y + z * z)
-        try:
-            v[0] /= l
-            v[1] /= l
-            v[2] /= l
-        except ZeroDivisionError:
+        # A null vector stays null. This is checked rather than caught, as
+        # _v may be a row of a Vector3Array, which gives NaN for 0 / 0
+        if l == 0.:
             v[0] = 0.0
             v[1] = 0.0
             v[2] = 0.0
+        else:
+            v[0] /= l
+            v[1] /= l
+            v[2] /= l
         return self
 
     normalize = normalise
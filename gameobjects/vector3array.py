@@ -0,0 +1,341 @@
+from numpy import array, asarray, ndarray, float64, zeros, sqrt, einsum, cross
+
+from gameobjects.vector3 import Vector3
+
+
+class Vector3Array(object):
+    """A batch of 3D vectors, stored as one contiguous N x 3 array.
+
+    The methods mirror the Vector3 API, but operate on every vector at once.
+    Methods that return a single number per vector on Vector3 (get_length,
+    dot, get_distance_to...) return a numpy array of N values here.
+
+    """
+
+    __slots__ = ('_a',)
+
+    # Tells Vector3 to leave operations with an array to the array
+    _gameobjects_array = 3
+
+    def __init__(self, points=(), dtype=float64):
+        """Creates a Vector3Array from a sequence of points.
+
+        points -- A sequence of Vector3s (or collections of 3 values), or an
+        N x 3 array. The values are always copied.
+        dtype -- float64 (the default) or float32
+
+        """
+
+        self._a = array(points, dtype=dtype).reshape(-1, 3)
+
+    @classmethod
+    def zeros(cls, count, dtype=float64):
+        """Creates a Vector3Array of null vectors.
+
+        count -- Number of vectors
+        dtype -- float64 (the default) or float32
+
+        """
+
+        v = cls.__new__(cls, object)
+        v._a = zeros((count, 3), dtype=dtype)
+        return v
+
+    @classmethod
+    def from_array(cls, a):
+        """Wraps an existing N x 3 array without copying it.
+        Warning: No copy is made, changes to the array are seen by the
+        Vector3Array (and vice versa).
+
+        """
+
+        if a.ndim != 2 or a.shape[1] != 3:
+            raise ValueError("Array must have a shape of (N, 3)")
+        if not a.flags.c_contiguous:
+            raise ValueError("Array must be C contiguous")
+        v = cls.__new__(cls, object)
+        v._a = a
+        return v
+
+    def _get_array(self):
+        return self._a
+
+    array = property(_get_array, None, None, "The underlying N x 3 array.")
+
+    def _get_dtype(self):
+        return self._a.dtype
+
+    dtype = property(_get_dtype, None, None, "Type of the components.")
+
+    def copy(self):
+        """Returns a copy of this array of vectors."""
+
+        v = self.__new__(self.__class__, object)
+        v._a = self._a.copy()
+        return v
+
+    __copy__ = copy
+
+    def __array__(self, dtype=None, copy=None):
+
+        if dtype is None or dtype == self._a.dtype:
+            return self._a
+        return self._a.astype(dtype)
+
+    def to_buffer(self, dtype=None):
+        """Returns a memoryview of the vectors, which can be given to
+        OpenGL (e.g. glVertexPointer or glBufferData) without a copy.
+
+        dtype -- Optional type of the components, if it is not the type of the
+        array (e.g. float32 for an array of float64) the values are copied
+
+        """
+
+        a = self._a
+        if dtype is not None and dtype != a.dtype:
+            a = a.astype(dtype)
+        return memoryview(a)
+
+    def __buffer__(self, flags):
+        # Python 3.12+ buffer protocol, views the array without a copy
+        return memoryview(self._a)
+
+    def __len__(self):
+
+        return len(self._a)
+
+    def __iter__(self):
+        """Iterates over the vectors, yielding Vector3 views of each row."""
+
+        from_row = Vector3.__new__
+        for row in self._a:
+            v = from_row(Vector3, object)
+            v._v = row
+            yield v
+
+    def __getitem__(self, index):
+        """Retrieves a vector, given its index.
+        An integer index returns a Vector3 that views the row (so changing the
+        Vector3 changes the array). A slice returns a Vector3Array view.
+
+        """
+
+        a = self._a[index]
+        if a.ndim == 1:
+            v = Vector3.__new__(Vector3, object)
+            v._v = a
+            return v
+        v = self.__new__(self.__class__, object)
+        v._a = a
+        return v
+
+    def __setitem__(self, index, value):
+
+        self._a[index] = self._values(value)
+
+    def __repr__(self):
+
+        return "Vector3Array(%s)" % ", ".join(str(v) for v in self)
+
+    @staticmethod
+    def _values(other):
+        if isinstance(other, Vector3Array):
+            return other._a
+        if isinstance(other, Vector3):
+            return other._v
+        return other
+
+    def __eq__(self, rhs):
+
+        return (self._a == self._values(rhs)).all(axis=-1)
+
+    def __ne__(self, rhs):
+
+        return (self._a != self._values(rhs)).any(axis=-1)
+
+    __hash__ = None
+
+    def __add__(self, rhs):
+        """Returns the result of adding a vector, or an array of vectors, to
+        every vector in this array."""
+
+        return self._wrap(self._a + self._values(rhs))
+
+    __radd__ = __add__
+
+    def __iadd__(self, rhs):
+
+        self._a += self._values(rhs)
+        return self
+
+    def __sub__(self, rhs):
+
+        return self._wrap(self._a - self._values(rhs))
+
+    def __rsub__(self, lhs):
+
+        return self._wrap(self._values(lhs) - self._a)
+
+    def __isub__(self, rhs):
+
+        self._a -= self._values(rhs)
+        return self
+
+    def __mul__(self, rhs):
+        """Returns the result of multiplying every vector by a scalar, a
+        vector, a Vector3Array, or a 1D numpy array of N scalars (one per
+        vector).
+
+        """
+
+        return self._wrap(self._a * self._scale_values(rhs))
+
+    __rmul__ = __mul__
+
+    def __imul__(self, rhs):
+
+        self._a *= self._scale_values(rhs)
+        return self
+
+    def __truediv__(self, rhs):
+
+        return self._wrap(self._a / self._scale_values(rhs))
+
+    def __itruediv__(self, rhs):
+
+        self._a /= self._scale_values(rhs)
+        return self
+
+    __div__ = __truediv__
+    __idiv__ = __itruediv__
+
+    def __neg__(self):
+
+        return self._wrap(-self._a)
+
+    def __pos__(self):
+
+        return self.copy()
+
+    def _wrap(self, a):
+        v = self.__new__(self.__class__, object)
+        v._a = a
+        return v
+
+    def _scale_values(self, scale):
+        # A 1D numpy array holds one scalar per vector, anything else is
+        # broadcast across the components
+        if isinstance(scale, ndarray) and scale.ndim == 1:
+            return scale.reshape(-1, 1)
+        return self._values(scale)
+
+    def scale(self, scale):
+        """Scales the vectors in place. Same as the *= operator.
+
+        scale -- A scalar, a vector, or a 1D numpy array of one scalar per vector
+
+        """
+
+        self._a *= self._scale_values(scale)
+        return self
+
+    def dot(self, other):
+        """Returns the dot products of each vector with another vector (or
+        array of vectors), as an array.
+
+        other -- A vector, tuple or Vector3Array
+
+        """
+
+        a = self._a
+        other = asarray(self._values(other), dtype=a.dtype)
+        if other.ndim == 1:
+            return a.dot(other)
+        return einsum('ij,ij->i', a, other)
+
+    def cross(self, other):
+        """Returns the cross products of each vector with another vector (or
+        array of vectors), as a new Vector3Array.
+
+        other -- A vector, tuple or Vector3Array
+
+        """
+
+        return self._wrap(cross(self._a, self._values(other)))
+
+    def get_length_squared(self):
+        """Returns the squared lengths of the vectors, as an array."""
+
+        a = self._a
+        return einsum('ij,ij->i', a, a)
+
+    def get_length(self):
+        """Returns the lengths of the vectors, as an array."""
+
+        return sqrt(self.get_length_squared())
+
+    get_magnitude = get_length
+
+    def normalise(self):
+        """Scales every vector to be length 1. Null vectors are left as null
+        vectors.
+
+        """
+
+        lengths = self.get_length()
+        lengths[lengths == 0.] = 1.
+        self._a /= lengths[:, None]
+        return self
+
+    normalize = normalise
+
+    def get_normalised(self):
+
+        return self.copy().normalise()
+
+    get_normalized = get_normalised
+
+    def get_distance_to_squared(self, p):
+        """Returns the squared distances of every vector to a point (or to
+        the corresponding vector of another array), as an array.
+
+        p -- A position as a vector, tuple or Vector3Array
+
+        """
+
+        d = self._a - self._values(p)
+        return einsum('ij,ij->i', d, d)
+
+    def get_distance_to(self, p):
+        """Returns the distances of every vector to a point (or to the
+        corresponding vector of another array), as an array.
+
+        p -- A position as a vector, tuple or Vector3Array
+
+        """
+
+        return sqrt(self.get_distance_to_squared(p))
+
+    def in_sphere(self, sphere):
+        """Returns an array of bools, True for the vectors (treated as
+        positions) that are contained in the given sphere.
+
+        """
+
+        radius = sphere.radius
+        return self.get_distance_to_squared(sphere.position) <= radius * radius
+
+
+def distance3d_squared(p1, p2):
+    """Returns the squared distances between two arrays of points (either may
+    also be a single point)."""
+
+    d = asarray(Vector3Array._values(p1)) - Vector3Array._values(p2)
+    return einsum('...i,...i->...', d, d)
+
+
+def distance3d(p1, p2):
+    """Returns the distances between two arrays of points (either may also be
+    a single point)."""
+
+    return sqrt(distance3d_squared(p1, p2))